@@ -0,0 +1,158 @@
+import contextlib
+import pickle
+import sqlite3
+import threading
+import zlib
+
+from cache import LRUCache
+
+
+class AlmacenGrafos:
+    """Guarda un grafo por identificador (sesión o id explícito).
+
+    Las peticiones sobre un mismo grafo se serializan con un candado por grafo;
+    grafos distintos no se bloquean entre sí. Los candados se reparten por hash
+    del id en un arreglo fijo, así su número no crece con las sesiones. Las
+    subclases solo implementan _cargar, _guardar y _borrar.
+    """
+
+    def __init__(self, candados=64):
+        self._candados = [threading.Lock() for _ in range(candados)]
+
+    def _candado(self, grafo_id):
+        return self._candados[zlib.crc32(grafo_id.encode()) % len(self._candados)]
+
+    @contextlib.contextmanager
+    def bloquear(self, grafo_id, modificar=False):
+        """Entrega el grafo (o None si no existe) con su candado tomado.
+
+        Con modificar=True el grafo se vuelve a guardar al salir sin errores.
+        """
+        with self._candado(grafo_id), self._transaccion(modificar):
+            grafo = self._cargar(grafo_id)
+            yield grafo
+            if modificar and grafo is not None:
+                self._guardar(grafo_id, grafo)
+
+    def guardar(self, grafo_id, grafo):
+        """Crea o reemplaza el grafo del identificador"""
+        with self._candado(grafo_id), self._transaccion(True):
+            self._guardar(grafo_id, grafo)
+
+    def borrar(self, grafo_id):
+        with self._candado(grafo_id), self._transaccion(True):
+            self._borrar(grafo_id)
+
+    def _transaccion(self, escritura):
+        return contextlib.nullcontext()
+
+    def _cargar(self, grafo_id):
+        raise NotImplementedError
+
+    def _guardar(self, grafo_id, grafo):
+        raise NotImplementedError
+
+    def _borrar(self, grafo_id):
+        raise NotImplementedError
+
+
+class AlmacenMemoria(AlmacenGrafos):
+    """Grafos en memoria del proceso; los menos usados (o vencidos) se descartan.
+
+    El vencimiento cuenta desde el último uso, también desde las consultas que
+    no modifican el grafo.
+    """
+
+    def __init__(self, maxsize=256, ttl=None, candados=64):
+        super().__init__(candados)
+        self.grafos = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def _cargar(self, grafo_id):
+        return self.grafos.get(grafo_id, refresh=True)
+
+    def _guardar(self, grafo_id, grafo):
+        self.grafos.put(grafo_id, grafo)
+
+    def _borrar(self, grafo_id):
+        self.grafos.pop(grafo_id)
+
+    def stats(self):
+        return self.grafos.stats()
+
+
+class AlmacenSQLite(AlmacenGrafos):
+    """Grafos serializados en un archivo SQLite local, compartido entre procesos.
+
+    Cada modificación carga y guarda el grafo dentro de una transacción
+    BEGIN IMMEDIATE, así dos procesos no pierden cambios del otro. Cada hilo
+    usa su propia conexión.
+
+    Cada proceso conserva además los últimos grafos que usó. Si la fila
+    guardada sigue teniendo el mismo uid y version, se reutiliza ese objeto en
+    lugar de deserializarlo, y con él su forma compacta y sus árboles de
+    caminos; si otro proceso lo modificó, se vuelve a cargar de la fila.
+    """
+
+    def __init__(self, ruta, candados=64, recientes=64):
+        super().__init__(candados)
+        self.ruta = ruta
+        self._local = threading.local()
+        self._recientes = LRUCache(maxsize=recientes)
+        with contextlib.closing(sqlite3.connect(ruta)) as conexion, conexion:
+            conexion.execute('CREATE TABLE IF NOT EXISTS grafos '
+                             '(id TEXT PRIMARY KEY, datos BLOB NOT NULL, uid TEXT, version INTEGER)')
+            # Archivos creados antes de guardar uid y version: sus filas solo no aprovechan la caché
+            columnas = {fila[1] for fila in conexion.execute('PRAGMA table_info(grafos)')}
+            for columna, tipo in (('uid', 'TEXT'), ('version', 'INTEGER')):
+                if columna not in columnas:
+                    conexion.execute(f'ALTER TABLE grafos ADD COLUMN {columna} {tipo}')
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            # Sin transacciones implícitas: se abren explícitamente en _transaccion
+            conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+            self._local.conexion = conexion
+        return conexion
+
+    @contextlib.contextmanager
+    def _transaccion(self, escritura):
+        if not escritura:
+            yield
+            return
+        conexion = self._conexion()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            conexion.execute('ROLLBACK')
+            # Un grafo en memoria pudo quedar modificado a medias sin cambiar de versión
+            self._recientes.clear()
+            raise
+        conexion.execute('COMMIT')
+
+    def _cargar(self, grafo_id):
+        conexion = self._conexion()
+        fila = conexion.execute('SELECT uid, version FROM grafos WHERE id = ?', (grafo_id,)).fetchone()
+        if fila is None:
+            self._recientes.pop(grafo_id)
+            return None
+        grafo = self._recientes.get(grafo_id)
+        if grafo is not None and (grafo.uid, grafo.version) == fila:
+            return grafo
+        grafo = pickle.loads(conexion.execute('SELECT datos FROM grafos WHERE id = ?', (grafo_id,)).fetchone()[0])
+        self._recientes.put(grafo_id, grafo)
+        return grafo
+
+    def _guardar(self, grafo_id, grafo):
+        self._conexion().execute('INSERT OR REPLACE INTO grafos (id, datos, uid, version) VALUES (?, ?, ?, ?)',
+                                 (grafo_id, pickle.dumps(grafo, protocol=pickle.HIGHEST_PROTOCOL),
+                                  grafo.uid, grafo.version))
+        self._recientes.put(grafo_id, grafo)
+
+    def _borrar(self, grafo_id):
+        self._conexion().execute('DELETE FROM grafos WHERE id = ?', (grafo_id,))
+        self._recientes.pop(grafo_id)
+
+    def stats(self):
+        return {'grafos': self._conexion().execute('SELECT COUNT(*) FROM grafos').fetchone()[0]}
@@ -1,16 +1,35 @@
+import csv
+import html
+import io
 import itertools
+import json
+import math
+import os
+import random
+import tempfile
+import uuid
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 import re
 from itertools import product
-import heapq
 from collections import defaultdict
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import networkx as nx
 from io import BytesIO
 from tree import ExpressionTree
+from almacen_grafos import AlmacenMemoria, AlmacenSQLite
+from grafo_compacto import GrafoCompacto, heuristica_alt, heuristica_euclidiana
+from cache import LRUCache
+import automata_regex
+import bdd
+import exportar_grafo
+from ejecutor_regex import MOTORES, EjecutorRegex, ErrorEjecucion, buscar_en_archivo
+import minimizacion
+import motor_regex
+import reescritura
+import sat
 import base64
 import warnings
 warnings.filterwarnings('ignore')
@@ -19,18 +38,61 @@ app = Flask(__name__, static_folder='static', static_url_path='/static')
 
 # ============ PROYECTO 1: TABLAS DE VERDAD ============
 class TruthTableGenerator:
-    def __init__(self):
+    MAX_VARIABLES = 20
+    # Las tablas completas solo se guardan en caché hasta este número de filas
+    MAX_CACHED_ROWS = 1024
+
+    def __init__(self, cache=None):
         self.history_stack = []
+        self.cache = cache if cache is not None else LRUCache()
 
     def detect_variables(self, expression):
+        # Igual que el árbol: cualquier letra es una variable (p, q, ..., A, α, ...)
         variables = set()
-        valid_vars = set('pqrstuvwxy')
         for char in expression:
-            if char in valid_vars:
+            if char.isalpha():
                 variables.add(char)
         return variables
 
-    def generate_truth_table(self, expression):
+    def evaluate(self, expression):
+        """Valida la expresión y calcula su columna de resultados.
+
+        Devuelve un diccionario con "error" o "warning", o bien con "tree" (un
+        CompactExpressionTree), "variables", "expression" y "result_column"
+        (bit i = resultado de la fila i).
+        El resultado se guarda en caché con la expresión sin espacios como clave.
+        """
+        key = ''.join(expression.split())
+        return self._cached(key, lambda: self._evaluate(expression))
+
+    def evaluate_bdd(self, expression):
+        """Igual que evaluate, pero representa el resultado con un BDD en lugar de
+        una columna de bits: el diccionario trae "bdd" y "root" y no tiene límite
+        de variables, porque nunca recorre las 2^n filas.
+        """
+        key = ''.join(expression.split())
+        return self._cached(('bdd', key), lambda: self._evaluate_bdd(expression))
+
+    def _cached(self, key, factory):
+        """Como cache.get_or_create, pero sin guardar los errores.
+
+        Se analiza el texto original y las posiciones de un error se refieren a
+        él, con sus espacios; otra escritura con la misma clave las tendría en
+        otro lugar.
+        """
+        result = self.cache.get(key)
+        if result is None:
+            result = factory()
+            if "error" not in result:
+                self.cache.put(key, result)
+        return result
+
+    def _parse(self, expression, max_variables=None):
+        """Construye el árbol de la expresión.
+
+        Devuelve {"error": ...}, {"warning": ...} o {"tree": ExpressionTree}; los
+        errores de sintaxis se propagan como ValueError.
+        """
         expr = expression.strip()
         if not expr:
             return {"error": "Por favor ingrese una expresión lógica."}
@@ -39,39 +101,58 @@ class TruthTableGenerator:
         if not variables:
             return {"error": "No se detectaron variables en la expresión."}
 
-        if len(variables) > 10:
-            return {"error": "Máximo 10 variables permitidas."}
+        if max_variables is not None and len(variables) > max_variables:
+            return {"error": f"Máximo {max_variables} variables permitidas."}
 
-        try:
-            tree = ExpressionTree(expr)
-            tree.build_tree()
+        # Se analiza el texto sin recortar para que las posiciones de los errores sean las del usuario
+        tree = ExpressionTree(expression)
+        tree.build_tree()
 
-            detected_vars = sorted(variables)
-            tree_vars = sorted(tree.variables)
+        detected_vars = sorted(variables)
+        tree_vars = sorted(tree.variables)
 
-            if detected_vars != tree_vars:
-                return {"warning": f"Variables detectadas: {detected_vars}\nVariables en árbol: {tree_vars}"}
+        if detected_vars != tree_vars:
+            return {"warning": f"Variables detectadas: {detected_vars}\nVariables en árbol: {tree_vars}"}
 
-            var_list = sorted(tree.variables)
-            combinations = list(itertools.product([False, True], repeat=len(var_list)))
+        return {"tree": tree}
 
-            table_data = []
-            for combination in combinations:
-                var_dict = dict(zip(var_list, combination))
-                result = tree.evaluate(var_dict)
+    def _evaluate(self, expression):
+        try:
+            parsed = self._parse(expression, self.MAX_VARIABLES)
+            if "tree" not in parsed:
+                return parsed
 
-                row_values = {}
-                for var in var_list:
-                    row_values[var] = 'V' if var_dict[var] else 'F'
-                row_values['result'] = 'V' if result else 'F'
-                table_data.append(row_values)
+            # En caché se guarda la representación en arreglos, más compacta que los nodos
+            compact = parsed["tree"].to_compact()
 
+            # Toda la tabla se calcula en una sola pasada sobre columnas de bits
+            var_list, result_column = compact.evaluate_columns()
             return {
-                "success": True,
+                "tree": compact,
                 "variables": var_list,
-                "table_data": table_data,
-                "num_rows": len(combinations),
-                "expression": tree.inorder_expression()
+                "result_column": result_column,
+                "expression": compact.inorder_expression()
+            }
+
+        except Exception as e:
+            return {
+                "error": f"Error al generar la tabla de verdad:\n\n{str(e)}\n\nVerifique que la expresión esté bien formada.\nEjemplo válido: [ p ∧ q ∨ ¬r ]"
+            }
+
+    def _evaluate_bdd(self, expression):
+        try:
+            parsed = self._parse(expression)
+            if "tree" not in parsed:
+                return parsed
+
+            compact = parsed["tree"].to_compact()
+            manager = bdd.BDD(compact.variables)
+            return {
+                "tree": compact,
+                "variables": compact.variables,
+                "bdd": manager,
+                "root": manager.from_compact(compact),
+                "expression": compact.inorder_expression()
             }
 
         except Exception as e:
@@ -79,8 +160,199 @@ class TruthTableGenerator:
                 "error": f"Error al generar la tabla de verdad:\n\n{str(e)}\n\nVerifique que la expresión esté bien formada.\nEjemplo válido: [ p ∧ q ∨ ¬r ]"
             }
 
+    def check_equivalence(self, first, second):
+        evaluations = [self.evaluate_bdd(first), self.evaluate_bdd(second)]
+        for evaluation in evaluations:
+            if "tree" not in evaluation:
+                return evaluation
+
+        same, assignment = bdd.equivalent(evaluations[0]["tree"], evaluations[1]["tree"])
+        return {
+            "success": True,
+            "equivalent": same,
+            "expressions": [evaluation["expression"] for evaluation in evaluations],
+            "counterexample": {var: 'V' if value else 'F' for var, value in assignment.items()} if assignment else None
+        }
+
+    def analyze(self, expression):
+        """Clasifica la expresión con un resolvedor SAT, sin límite de variables.
+
+        Devuelve la clasificación, un testigo y un contraejemplo en formato de fila.
+        """
+        key = ''.join(expression.split())
+        return self._cached(('analyze', key), lambda: self._analyze(expression))
+
+    def _analyze(self, expression):
+        try:
+            parsed = self._parse(expression)
+            if "tree" not in parsed:
+                return parsed
+
+            compact = parsed["tree"].to_compact()
+            response = {
+                "success": True,
+                "variables": compact.variables,
+                "expression": compact.inorder_expression()
+            }
+            response.update(sat.analyze(compact))
+            return response
+
+        except Exception as e:
+            return {
+                "error": f"Error al analizar la expresión:\n\n{str(e)}\n\nVerifique que la expresión esté bien formada.\nEjemplo válido: [ p ∧ q ∨ ¬r ]"
+            }
+
+    def iter_rows(self, evaluation, offset=0, limit=None, chunk_size=4096):
+        """Genera pares (valores, resultado) con 'V'/'F' sin materializar la tabla completa."""
+        var_list = evaluation["variables"]
+        num_rows = 2 ** len(var_list)
+        end = num_rows if limit is None else min(num_rows, offset + limit)
+
+        if "bdd" in evaluation:
+            for values, result in evaluation["bdd"].iter_rows(evaluation["root"], offset, limit):
+                yield tuple('V' if value else 'F' for value in values), 'V' if result else 'F'
+            return
+
+        result_column = evaluation["result_column"]
+        combinations = self._combinations(len(var_list), offset, end)
+
+        for start in range(offset, end, chunk_size):
+            count = min(chunk_size, end - start)
+            window = (result_column >> start) & ((1 << count) - 1)
+            results = format(window, f'0{count}b')[::-1]
+            for result, combination in zip(results, combinations):
+                yield combination, 'V' if result == '1' else 'F'
+
+    @staticmethod
+    def _combinations(num_vars, start, end, low_bits=12):
+        """Valores 'F'/'V' de las filas start..end-1 sin recorrer las filas anteriores a start.
+
+        En la fila i la variable j vale el bit num_vars-1-j de i: los bits altos
+        son un prefijo fijo en cada bloque de 2^low_bits filas y los bajos se
+        recorren con itertools.product.
+        """
+        low = min(num_vars, low_bits)
+        high = num_vars - low
+        block = 1 << low
+        for base in range(start - start % block, end, block):
+            prefix = tuple('V' if base >> (num_vars - 1 - j) & 1 else 'F' for j in range(high))
+            suffixes = itertools.product('FV', repeat=low)
+            for suffix in itertools.islice(suffixes, max(start - base, 0), min(end - base, block)):
+                yield prefix + suffix
+
+    def summarize(self, evaluation):
+        num_rows = 2 ** len(evaluation["variables"])
+        if "bdd" in evaluation:
+            # Conteo de modelos sobre el BDD, sin enumerar filas
+            true_rows = evaluation["bdd"].count(evaluation["root"])
+        else:
+            true_rows = evaluation["result_column"].bit_count()
+
+        if true_rows == num_rows:
+            classification = "tautology"
+        elif true_rows == 0:
+            classification = "contradiction"
+        else:
+            classification = "contingency"
+
+        return {
+            "classification": classification,
+            "satisfiable": true_rows > 0,
+            "true_rows": true_rows,
+            "false_rows": num_rows - true_rows
+        }
+
+    def generate_truth_table(self, expression, offset=0, limit=None, encoding="rows", backend="bitset"):
+        evaluation = self.evaluate_bdd(expression) if backend == "bdd" else self.evaluate(expression)
+        if "tree" not in evaluation:
+            return evaluation
+
+        var_list = evaluation["variables"]
+        num_rows = 2 ** len(var_list)
+        end = num_rows if limit is None else min(num_rows, offset + limit)
+
+        if limit is None and len(var_list) > self.MAX_VARIABLES:
+            return {"error": f"Máximo {self.MAX_VARIABLES} variables permitidas para la tabla completa."}
+
+        response = {
+            "success": True,
+            "variables": var_list,
+            "num_rows": num_rows,
+            "offset": offset,
+            "expression": evaluation["expression"]
+        }
+
+        if encoding == "bits":
+            # Columna de resultados empaquetada en hexadecimal: bit i = fila offset + i
+            if "bdd" in evaluation:
+                window = 0
+                for i, (_, result) in enumerate(self.iter_rows(evaluation, offset, limit)):
+                    if result == 'V':
+                        window |= 1 << i
+            else:
+                window = (evaluation["result_column"] >> offset) & ((1 << max(end - offset, 0)) - 1)
+            response["encoding"] = "bits"
+            response["result_bits"] = format(window, 'x')
+            response["count"] = max(end - offset, 0)
+            return response
+
+        if num_rows <= self.MAX_CACHED_ROWS:
+            if "table_data" not in evaluation:
+                evaluation["table_data"] = self.build_rows(evaluation)
+            response["table_data"] = evaluation["table_data"][offset:end]
+        else:
+            response["table_data"] = self.build_rows(evaluation, offset, limit)
+        return response
+
+    def build_rows(self, evaluation, offset=0, limit=None):
+        var_list = evaluation["variables"]
+        table_data = []
+        for combination, result in self.iter_rows(evaluation, offset, limit):
+            row_values = dict(zip(var_list, combination))
+            row_values['result'] = result
+            table_data.append(row_values)
+        return table_data
+
+    def generate_summary(self, expression, backend="bitset"):
+        evaluation = self.evaluate_bdd(expression) if backend == "bdd" else self.evaluate(expression)
+        if "tree" not in evaluation:
+            return evaluation
+
+        var_list = evaluation["variables"]
+        response = {
+            "success": True,
+            "variables": var_list,
+            "num_rows": 2 ** len(var_list),
+            "expression": evaluation["expression"]
+        }
+        response.update(self.summarize(evaluation))
+        return response
+
+    def stream_truth_table(self, evaluation, chunk_size=1024):
+        """Genera la tabla como NDJSON: cabecera, una fila [valores..., resultado] por línea y resumen."""
+        var_list = evaluation["variables"]
+
+        yield json.dumps({
+            "variables": var_list,
+            "num_rows": 2 ** len(var_list),
+            "expression": evaluation["expression"]
+        }, ensure_ascii=False) + "\n"
+
+        lines = []
+        for combination, result in self.iter_rows(evaluation):
+            # Las celdas solo contienen 'V'/'F', así que la línea se arma sin json.dumps
+            lines.append('["' + '","'.join(combination) + '","' + result + '"]')
+            if len(lines) == chunk_size:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
 
-generator = TruthTableGenerator()
+        yield json.dumps({"summary": self.summarize(evaluation)}) + "\n"
+
+
+generator = TruthTableGenerator(LRUCache(maxsize=int(os.environ.get('EXPRESSION_CACHE_SIZE', 256)),
+                                         ttl=float(os.environ.get('EXPRESSION_CACHE_TTL', 600))))
 
 
 @app.route('/tablas-verdad')
@@ -90,11 +362,69 @@ def tablas_verdad_html():
 
 @app.route('/generate_table', methods=['POST'])
 def generate_table():
-    expression = request.json.get('expression', '')
-    result = generator.generate_truth_table(expression)
+    data = request.json
+    expression = data.get('expression', '')
+    mode = data.get('mode', 'full')
+    backend = data.get('backend', 'bitset')
+
+    if backend not in ('bitset', 'bdd'):
+        return jsonify({"error": f"Backend no válido: {backend}"})
+
+    if mode == 'summary':
+        return jsonify(generator.generate_summary(expression, backend))
+
+    if mode == 'stream':
+        if backend == 'bdd':
+            evaluation = generator.evaluate_bdd(expression)
+        else:
+            evaluation = generator.evaluate(expression)
+        if "tree" not in evaluation:
+            return jsonify(evaluation)
+        if len(evaluation["variables"]) > generator.MAX_VARIABLES:
+            return jsonify({"error": f"Máximo {generator.MAX_VARIABLES} variables permitidas para la tabla completa."})
+        return Response(stream_with_context(generator.stream_truth_table(evaluation)),
+                        mimetype='application/x-ndjson')
+
+    if mode not in ('full', 'page'):
+        return jsonify({"error": f"Modo no válido: {mode}"})
+
+    offset, limit = 0, None
+    if mode == 'page':
+        try:
+            offset = max(int(data.get('offset', 0)), 0)
+            limit = max(int(data.get('limit', 1024)), 0)
+        except (TypeError, ValueError):
+            return jsonify({"error": "offset y limit deben ser enteros."})
+
+    result = generator.generate_truth_table(expression, offset, limit, data.get('encoding', 'rows'), backend)
     return jsonify(result)
 
 
+@app.route('/check_equivalence', methods=['POST'])
+def check_equivalence():
+    data = request.json
+    result = generator.check_equivalence(data.get('expression1', ''), data.get('expression2', ''))
+    return jsonify(result)
+
+
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    expression = request.json.get('expression', '')
+    return jsonify(generator.analyze(expression))
+
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        'expressions': generator.cache.stats(),
+        'simplificaciones': SimplificadorBooleano.cache.stats(),
+        'regex': patrones_compilados.stats(),
+        'grafos': almacen_grafos.stats(),
+        'imagenes_grafos': imagenes_grafos.stats(),
+        'automatas_grafos': automatas_grafos.stats()
+    })
+
+
 @app.route('/detect_variables', methods=['POST'])
 def detect_variables():
     expression = request.json.get('expression', '')
@@ -105,41 +435,118 @@ def detect_variables():
     return jsonify({
         'variables': list(sorted(variables)),
         'num_vars': num_vars,
-        'num_rows': num_rows
+        'num_rows': num_rows,
+        'max_vars': generator.MAX_VARIABLES
     })
 
 # ============ PROYECTO 2: SIMPLIFICACIÓN BOOLEANA ============
 
 class SimplificadorBooleano:
-    """Simplifica expresiones booleanas paso a paso"""
-    
-    @staticmethod
-    def simplificar(expresion):
-        """Aplica leyes de simplificación y retorna pasos"""
-        expresion = expresion.replace(' ', '')
-        pasos = [('Original', expresion)]
-        
-        for _ in range(10):
-            cambio = False
-            
-            while '~~' in expresion:
-                expresion = expresion.replace('~~', '')
-                pasos.append(('Doble negación', expresion))
-                cambio = True
-            
-            for op, reemplazo in [('&1', ''), ('|0', ''), ('&0', '0'), ('|1', '1')]:
-                if op in expresion:
-                    expresion = expresion.replace(op, reemplazo)
-                    pasos.append((f'Ley: {op}', expresion))
-                    cambio = True
-            
-            if not cambio:
-                break
-        
-        return pasos
+    """Simplifica expresiones booleanas paso a paso o las minimiza a SOP/POS"""
+
+    MAX_VARIABLES = 20
+    # Pasos devueltos como texto; el resto solo se cuenta
+    MAX_PASOS = 500
+    cache = LRUCache(maxsize=int(os.environ.get('SIMPLIFICADOR_CACHE_SIZE', 128)))
+    # Notación de la página de simplificación
+    NOTACION = str.maketrans({'∧': '&', '∨': '|', '¬': '~'})
+
+    @classmethod
+    def simplificar(cls, expresion, forma='sop'):
+        """Devuelve el resultado y los pasos; lanza ValueError si la expresión no es válida"""
+        if forma not in ('sop', 'pos'):
+            raise ValueError(f"Forma no válida: {forma}")
+        clave = (expresion.strip(), forma)
+        return cls.cache.get_or_create(clave, lambda: cls._simplificar(expresion, forma))
+
+    @classmethod
+    def aplicar_leyes(cls, expresion):
+        """Aplica las leyes del álgebra de Boole sobre el árbol hasta que no cambie"""
+        clave = (expresion.strip(), 'leyes')
+        return cls.cache.get_or_create(clave, lambda: cls._aplicar_leyes(expresion))
+
+    @classmethod
+    def _aplicar_leyes(cls, expresion):
+        arbol = ExpressionTree(expresion, multichar_variables=True)
+        arbol.build_tree()
+        motor = reescritura.MotorReescritura(arbol.factory)
+        raiz, pasos, pasadas = motor.simplificar(arbol.root)
+        return {
+            'resultado': reescritura.formatear(raiz),
+            'pasos': [{'rule': regla, 'before': reescritura.formatear(antes), 'after': reescritura.formatear(despues)}
+                      for regla, antes, despues in pasos[:cls.MAX_PASOS]],
+            'pasos_totales': len(pasos),
+            'pasadas': pasadas
+        }
+
+    @classmethod
+    def _simplificar(cls, expresion, forma):
+        arbol = ExpressionTree(expresion, multichar_variables=True)
+        arbol.build_tree()
+        # Antes de construir las columnas, que ocupan 2^n bits cada una
+        if len(arbol.variables) > cls.MAX_VARIABLES:
+            raise ValueError(f"Máximo {cls.MAX_VARIABLES} variables permitidas.")
+        compacto = arbol.to_compact()
+        variables, columna = compacto.evaluate_columns()
+        num_vars = len(variables)
+
+        # La forma POS se obtiene minimizando el complemento y aplicando De Morgan
+        total = (1 << (1 << num_vars)) - 1
+        conjunto = columna if forma == 'sop' else ~columna & total
+        formatear = minimizacion.formatear_suma if forma == 'sop' else minimizacion.formatear_producto
+        original = compacto.inorder_expression().translate(cls.NOTACION)
+
+        if num_vars <= minimizacion.MAX_VARIABLES_QM:
+            metodo = 'quine-mccluskey'
+            minterminos = [i for i in range(1 << num_vars) if conjunto >> i & 1]
+            primos = minimizacion.implicantes_primos(num_vars, conjunto)
+            esenciales, cobertura = minimizacion.cobertura_minima(num_vars, conjunto, primos)
+            simbolo = 'Σm' if forma == 'sop' else 'ΠM'
+            lista = f"{simbolo}({', '.join(map(str, minterminos))})"
+            pasos = [
+                {'rule': 'Mintérminos' if forma == 'sop' else 'Maxtérminos', 'before': original, 'after': lista},
+                {'rule': 'Implicantes primos', 'before': lista, 'after': formatear(variables, primos)},
+                {'rule': 'Implicantes esenciales', 'before': formatear(variables, primos),
+                 'after': formatear(variables, esenciales)},
+                {'rule': 'Cobertura mínima', 'before': formatear(variables, esenciales),
+                 'after': formatear(variables, cobertura)}
+            ]
+        else:
+            metodo = 'heuristico'
+            expandidos, cobertura = minimizacion.minimizar_heuristico(num_vars, conjunto)
+            filas = f"{conjunto.bit_count()} {'mintérminos' if forma == 'sop' else 'maxtérminos'}"
+            pasos = [
+                {'rule': 'Mintérminos' if forma == 'sop' else 'Maxtérminos', 'before': original, 'after': filas},
+                {'rule': 'Expansión a implicantes primos', 'before': filas,
+                 'after': formatear(variables, expandidos)},
+                {'rule': 'Eliminación de redundantes', 'before': formatear(variables, expandidos),
+                 'after': formatear(variables, cobertura)}
+            ]
+
+        return {
+            'resultado': formatear(variables, cobertura),
+            'pasos': pasos,
+            'variables': variables,
+            'forma': forma,
+            'metodo': metodo
+        }
 
 # ============ PROYECTO 3: EXPRESIONES REGULARES ============
 
+# Patrones compilados compartidos por validación, búsqueda y resaltado
+patrones_compilados = LRUCache(maxsize=int(os.environ.get('REGEX_CACHE_SIZE', 256)))
+
+def compilar_regex(patron, flags=re.MULTILINE):
+    """Compila el patrón una sola vez por (patrón, flags); lanza re.error si no es válido"""
+    return patrones_compilados.get_or_create((patron, flags), lambda: re.compile(patron, flags))
+
+# Las búsquedas corren en procesos aparte con un tiempo límite por petición
+ejecutor_regex = EjecutorRegex(procesos=int(os.environ.get('REGEX_PROCESOS', 2)),
+                               tiempo_limite=float(os.environ.get('REGEX_TIMEOUT', 2.0)))
+
+# Un archivo subido dispone de REGEX_TIMEOUT segundos por cada bloque de este tamaño
+ARCHIVO_BYTES_POR_PLAZO = int(os.environ.get('REGEX_BYTES_POR_PLAZO', 16 * 1024 * 1024))
+
 class RegexRules:
     """Reglas predefinidas de expresiones regulares"""
     
@@ -157,6 +564,9 @@ class RegexRules:
         "alternativa": (r"(perro|gato)", "perro o gato"),
         "binario_3": (r"(0|1){3}", "Cadenas binarias de 3 símbolos"),
     }
+
+    # Compiladas al importar el módulo; también quedan en la caché compartida
+    compiled = {name: compilar_regex(pattern) for name, (pattern, _) in rules.items()}
     
     @classmethod
     def get_rule(cls, name):
@@ -164,6 +574,10 @@ class RegexRules:
             return cls.rules[name][0]
         return None
     
+    @classmethod
+    def get_compiled(cls, name):
+        return cls.compiled.get(name)
+
     @classmethod
     def get_all_rules(cls):
         return [{'name': k, 'pattern': v[0], 'description': v[1]} for k, v in cls.rules.items()]
@@ -171,21 +585,39 @@ class RegexRules:
 def validar_regex(regex):
     """Valida una expresión regular"""
     try:
-        re.compile(regex)
+        compilar_regex(regex)
         return True, ""
     except re.error as e:
         return False, str(e)
 
-def resaltar_coincidencias(texto, regex):
-    """Retorna coincidencias en el texto"""
-    try:
-        coincidencias = list(re.finditer(regex, texto, re.MULTILINE))
-        return [m.group() for m in coincidencias], len(coincidencias)
-    except:
-        return [], 0
+def resaltar_coincidencias(texto, spans):
+    """Marca con <mark> las posiciones dadas; los segmentos se escapan y se unen una sola vez"""
+    partes = []
+    anterior = 0
+    for inicio, fin in spans:
+        partes.append(html.escape(texto[anterior:inicio], quote=False))
+        partes.append(f"<mark>{html.escape(texto[inicio:fin], quote=False)}</mark>")
+        anterior = fin
+    partes.append(html.escape(texto[anterior:], quote=False))
+    return ''.join(partes)
 
 # ============ PROYECTO 4: RUTAS Y AUTÓMATAS ============
 
+# Fracción de aristas (sobre n·(n-1)) desde la cual matriz_distancias usa Floyd-Warshall.
+# En CPython un Dijkstra por origen es más rápido salvo en grafos casi completos.
+DENSIDAD_FLOYD_WARSHALL = 0.9
+
+# Estrategia automática de calcular_ruta según el tamaño del grafo: hasta NODOS_ARBOL se calcula
+# el árbol completo (queda en caché para otros destinos), luego Dijkstra bidireccional y desde
+# NODOS_ALT A* con hitos precalculados por versión
+ESTRATEGIAS_RUTA = ('auto', 'dijkstra', 'bidireccional', 'a_estrella', 'alt')
+NODOS_ARBOL = int(os.environ.get('GRAFOS_NODOS_ARBOL', 500))
+NODOS_ALT = int(os.environ.get('GRAFOS_NODOS_ALT', 5000))
+HITOS_ALT = 8
+# Árboles de caminos guardados por grafo (cada uno ocupa O(n)) y nodos admitidos por matriz_distancias
+ARBOLES_POR_GRAFO = int(os.environ.get('GRAFOS_ARBOLES_POR_GRAFO', 64))
+MAX_NODOS_MATRIZ = int(os.environ.get('GRAFOS_MAX_NODOS_MATRIZ', 500))
+
 class Grafo:
     """Representa un grafo ponderado dirigido o no dirigido"""
     
@@ -193,9 +625,18 @@ class Grafo:
         self.adyacencia = defaultdict(list)
         self.nodos = set()
         self.dirigido = dirigido
+        # uid distingue este grafo de otro guardado con el mismo grafo_id; version cambia con cada modificación
+        self.uid = uuid.uuid4().hex
+        self.version = 0
+        # Coordenadas opcionales {nodo: (x, y)} para A* con distancia en línea recta
+        self.coordenadas = {}
+        self._invalidar_caminos()
     
     def agregar_nodo(self, nodo):
-        self.nodos.add(nodo)
+        if nodo not in self.nodos:
+            self.nodos.add(nodo)
+            self.version += 1
+            self._invalidar_caminos()
     
     def agregar_arista(self, origen, destino, peso=1):
         self.agregar_nodo(origen)
@@ -205,94 +646,225 @@ class Grafo:
         
         if not self.dirigido:
             self.adyacencia[destino].append((origen, peso))
+        
+        self.version += 1
+        self._invalidar_caminos()
+    
+    def agregar_aristas(self, aristas, nodos=(), coordenadas=None):
+        """Agrega muchas aristas (origen, destino, peso), nodos aislados y coordenadas como una sola modificación.
+        
+        Lanza ValueError, sin modificar el grafo, si hay coordenadas de nodos que no existen.
+        """
+        if coordenadas:
+            conocidos = self.nodos.union(nodos, (origen for origen, _, _ in aristas),
+                                         (destino for _, destino, _ in aristas))
+            faltantes = sorted(nodo for nodo in coordenadas if nodo not in conocidos)
+            if faltantes:
+                raise ValueError(f"Coordenadas de nodos inexistentes: {', '.join(faltantes[:5])}")
+        
+        self.nodos.update(nodos)
+        self.coordenadas.update(coordenadas or {})
+        for origen, destino, peso in aristas:
+            self.nodos.add(origen)
+            self.nodos.add(destino)
+            self.adyacencia[origen].append((destino, peso))
+            if not self.dirigido:
+                self.adyacencia[destino].append((origen, peso))
+        
+        self.version += 1
+        self._invalidar_caminos()
+    
+    def fijar_coordenadas(self, nodo, x, y):
+        self.coordenadas[nodo] = (float(x), float(y))
+        self.version += 1
+        self._invalidar_caminos()
+    
+    def __getstate__(self):
+        # La forma compacta y las cachés de caminos no se guardan con el grafo
+        estado = self.__dict__.copy()
+        for cache in ('_compacto', '_arboles', '_matriz', '_hitos', '_coordenadas_admisibles'):
+            del estado[cache]
+        return estado
+    
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._invalidar_caminos()
+    
+    def _invalidar_caminos(self):
+        self._compacto = None
+        # Solo los orígenes consultados más recientemente, para no crecer a O(n²) por grafo
+        self._arboles = LRUCache(maxsize=ARBOLES_POR_GRAFO)
+        self._matriz = None
+        self._hitos = None
+        self._coordenadas_admisibles = None
+    
+    def compacto(self):
+        """Forma CSR del grafo con nodos enteros; se compila una vez por versión"""
+        if self._compacto is None:
+            self._compacto = GrafoCompacto.desde_adyacencia(self.adyacencia, self.nodos, self.dirigido)
+        return self._compacto
+    
+    def _arbol_indices(self, origen):
+        """Árbol de caminos más cortos desde el índice origen, en la caché de la versión actual"""
+        return self._arboles.get_or_create(origen, lambda: self.compacto().dijkstra(origen))
+    
+    def arbol_caminos(self, origen):
+        """Árbol de caminos más cortos desde origen: (distancias, previos) de los nodos alcanzables.
+        
+        Se calcula una vez por versión del grafo; las consultas siguientes con el
+        mismo origen, hacia cualquier destino, no repiten la búsqueda.
+        """
+        compacto = self.compacto()
+        distancias, previos = self._arbol_indices(compacto.indice[origen])
+        nombres = compacto.nombres
+        alcanzables = [v for v, d in enumerate(distancias) if d != float('inf')]
+        return ({nombres[v]: distancias[v] for v in alcanzables},
+                {nombres[v]: nombres[previos[v]] if previos[v] >= 0 else None for v in alcanzables})
     
     def dijkstra(self, origen, destino):
         """Algoritmo de Dijkstra para encontrar la ruta más corta"""
         if origen not in self.nodos or destino not in self.nodos:
             return None, []
         
-        distancias = {nodo: float('inf') for nodo in self.nodos}
-        distancias[origen] = 0
-        previos = {nodo: None for nodo in self.nodos}
-        cola = [(0, origen)]
-        visitados = set()
-        
-        while cola:
-            distancia_actual, nodo_actual = heapq.heappop(cola)
-            
-            if nodo_actual in visitados:
-                continue
-            
-            visitados.add(nodo_actual)
-            
-            if nodo_actual == destino:
-                break
-            
-            for vecino, peso in self.adyacencia[nodo_actual]:
-                if vecino not in visitados:
-                    nueva_distancia = distancia_actual + peso
-                    
-                    if nueva_distancia < distancias[vecino]:
-                        distancias[vecino] = nueva_distancia
-                        previos[vecino] = nodo_actual
-                        heapq.heappush(cola, (nueva_distancia, vecino))
+        compacto = self.compacto()
+        distancias, previos = self._arbol_indices(compacto.indice[origen])
         
         ruta = []
-        nodo = destino
+        nodo = compacto.indice[destino]
         
-        if distancias[destino] != float('inf'):
-            while nodo is not None:
-                ruta.append(nodo)
+        if distancias[nodo] != float('inf'):
+            while nodo >= 0:
+                ruta.append(compacto.nombres[nodo])
                 nodo = previos[nodo]
             ruta.reverse()
         
-        return distancias[destino], ruta
+        return distancias[compacto.indice[destino]], ruta
+    
+    def coordenadas_admisibles(self):
+        """Lista de coordenadas por índice si sirven para A*, si no None.
+        
+        Sirven si todos los nodos las tienen y ninguna arista pesa menos que la
+        distancia en línea recta entre sus extremos; así la heurística nunca
+        sobreestima.
+        """
+        if self._coordenadas_admisibles is None:
+            compacto = self.compacto()
+            coordenadas = [self.coordenadas.get(nombre) for nombre in compacto.nombres]
+            admisibles = bool(coordenadas) and None not in coordenadas and all(
+                peso >= math.dist(coordenadas[u], coordenadas[v])
+                for u in range(len(compacto)) for v, peso in compacto.vecinos(u))
+            self._coordenadas_admisibles = coordenadas if admisibles else False
+        return self._coordenadas_admisibles or None
+    
+    def hitos(self):
+        if self._hitos is None:
+            self._hitos = self.compacto().calcular_hitos(HITOS_ALT)
+        return self._hitos
+    
+    def elegir_estrategia(self, origen):
+        compacto = self.compacto()
+        if self._arboles.get(compacto.indice[origen]) is not None or len(compacto) <= NODOS_ARBOL:
+            return 'dijkstra'
+        if self.coordenadas_admisibles() is not None:
+            return 'a_estrella'
+        if len(compacto) >= NODOS_ALT:
+            return 'alt'
+        return 'bidireccional'
+    
+    def ruta_mas_corta(self, origen, destino, estrategia='auto'):
+        """Ruta entre dos nodos con la estrategia dada o elegida según el grafo.
+        
+        Devuelve (distancia, ruta, estrategia usada, nodos asentados); con
+        'dijkstra' los asentados son los del árbol completo desde el origen.
+        """
+        if origen not in self.nodos or destino not in self.nodos:
+            return None, [], estrategia, 0
+        if estrategia == 'auto':
+            estrategia = self.elegir_estrategia(origen)
+        
+        compacto = self.compacto()
+        s, t = compacto.indice[origen], compacto.indice[destino]
+        if estrategia == 'dijkstra':
+            distancia, ruta = self.dijkstra(origen, destino)
+            asentados = sum(d != float('inf') for d in self._arbol_indices(s)[0])
+            return distancia, ruta, estrategia, asentados
+        
+        if estrategia == 'bidireccional':
+            distancia, ruta, asentados = compacto.dijkstra_bidireccional(s, t)
+        elif estrategia == 'a_estrella':
+            coordenadas = self.coordenadas_admisibles()
+            if coordenadas is None:
+                raise ValueError('A* necesita coordenadas de todos los nodos y pesos no menores que la distancia en línea recta')
+            distancia, ruta, asentados = compacto.a_estrella(s, t, heuristica_euclidiana(coordenadas, t))
+        elif estrategia == 'alt':
+            distancia, ruta, asentados = compacto.a_estrella(s, t, heuristica_alt(self.hitos(), t))
+        else:
+            raise ValueError(f"Estrategia desconocida: {estrategia}")
+        return distancia, [compacto.nombres[u] for u in ruta], estrategia, asentados
+    
+    def matriz_distancias(self):
+        """Distancias entre todos los pares: (nodos ordenados, matriz, método).
+        
+        En grafos casi completos se usa Floyd-Warshall; en el resto, un Dijkstra
+        por origen. Los árboles ya en caché se aprovechan, pero los nuevos no se
+        guardan: desplazarían a los de las consultas de rutas.
+        """
+        if self._matriz is not None:
+            return self._matriz
+        
+        compacto = self.compacto()
+        nodos = sorted(self.nodos)
+        orden = [compacto.indice[nodo] for nodo in nodos]
+        n = len(nodos)
+        # Vecinos distintos: las aristas repetidas no cuentan para la densidad
+        aristas = sum(len({v for v, _ in compacto.vecinos(u)}) for u in range(n))
+        if n > 1 and aristas >= DENSIDAD_FLOYD_WARSHALL * n * (n - 1):
+            filas, metodo = compacto.floyd_warshall(), 'floyd_warshall'
+        else:
+            filas = {u: (self._arboles.get(u) or compacto.dijkstra(u))[0] for u in orden}
+            metodo = 'dijkstra'
+        matriz = [[filas[u][v] for v in orden] for u in orden]
+        
+        self._matriz = (nodos, matriz, metodo)
+        return self._matriz
     
     def obtener_nodos(self):
         return list(self.nodos)
     
     def obtener_aristas(self):
-        aristas = []
-        visitadas = set()
-        
-        for origen in self.adyacencia:
-            for destino, peso in self.adyacencia[origen]:
-                if self.dirigido or (origen, destino) not in visitadas and (destino, origen) not in visitadas:
-                    aristas.append((origen, destino, peso))
-                    if not self.dirigido:
-                        visitadas.add((origen, destino))
-        
-        return aristas
+        return self.compacto().aristas()
+
+# Estados, alfabeto y transiciones por grafo: (uid, versión) -> (Q, sigma, delta, w)
+automatas_grafos = LRUCache(maxsize=int(os.environ.get('GRAFOS_AUTOMATAS_CACHE_SIZE', 64)))
+# Desde este número de transiciones calcular_ruta omite el alfabeto y los pesos de la descripción
+MAX_TRANSICIONES_DESCRIPCION = int(os.environ.get('GRAFOS_MAX_TRANSICIONES_DESCRIPCION', 1000))
 
 class Automata:
     """Autómata formal para validar rutas en el grafo"""
     
     def __init__(self, grafo, estado_inicial, estados_aceptacion):
         self.grafo = grafo
-        self.Q = set(grafo.obtener_nodos())
         self.q0 = estado_inicial
         self.F = set(estados_aceptacion) if isinstance(estados_aceptacion, list) else {estados_aceptacion}
         
-        self._construir_alfabeto()
-        self._construir_transiciones()
+        # Lo que depende solo del grafo se construye una vez por versión; q0 y F cambian en cada consulta
+        self.Q, self.sigma, self.delta, self.w = automatas_grafos.get_or_create(
+            (grafo.uid, grafo.version), lambda: self._construir(grafo))
     
-    def _construir_alfabeto(self):
-        self.sigma = set()
+    @staticmethod
+    def _construir(grafo):
+        """Estados y alfabeto ordenados, transiciones y pesos (ordenados por símbolo)"""
+        delta = {}
+        w = {}
         
-        for origen in self.grafo.adyacencia:
-            for destino, peso in self.grafo.adyacencia[origen]:
+        for origen in grafo.adyacencia:
+            for destino, peso in grafo.adyacencia[origen]:
                 simbolo = f"{origen}→{destino}"
-                self.sigma.add(simbolo)
-    
-    def _construir_transiciones(self):
-        self.delta = {}
-        self.w = {}
+                delta[(origen, simbolo)] = destino
+                w[simbolo] = peso
         
-        for origen in self.grafo.adyacencia:
-            for destino, peso in self.grafo.adyacencia[origen]:
-                simbolo = f"{origen}→{destino}"
-                self.delta[(origen, simbolo)] = destino
-                self.w[simbolo] = peso
+        w = dict(sorted(w.items()))
+        return sorted(grafo.obtener_nodos()), list(w), delta, w
     
     def procesar_cadena(self, cadena_nodos):
         if len(cadena_nodos) < 2:
@@ -339,113 +911,192 @@ class Automata:
             'costo_total': costo_total
         }
     
-    def obtener_descripcion_formal(self):
+    def obtener_descripcion_formal(self, completa=True):
+        """Sin completa se omiten el alfabeto y los pesos, que crecen con las aristas"""
         return {
-            'Q': sorted(list(self.Q)),
-            'sigma': sorted(list(self.sigma)),
+            'Q': self.Q,
+            'sigma': self.sigma if completa else None,
             'q0': self.q0,
             'F': sorted(list(self.F)),
             'transiciones': len(self.delta),
-            'pesos': dict(sorted(self.w.items()))
+            'pesos': self.w if completa else None
         }
 
-# Variables globales para el grafo
-grafo_global = None
+# Un grafo por sesión (cookie) o por grafo_id explícito; con GRAFOS_SQLITE se comparten entre procesos
+if os.environ.get('GRAFOS_SQLITE'):
+    almacen_grafos = AlmacenSQLite(os.environ['GRAFOS_SQLITE'])
+else:
+    almacen_grafos = AlmacenMemoria(maxsize=int(os.environ.get('GRAFOS_MAX', 1024)),
+                                    ttl=float(os.environ.get('GRAFOS_TTL', 3600)))
+COOKIE_GRAFO = 'grafo_id'
+# Límites de /importar_grafo: aristas por carga y errores informados
+MAX_ARISTAS_IMPORTACION = int(os.environ.get('GRAFOS_MAX_ARISTAS_IMPORTACION', 500000))
+MAX_ERRORES_IMPORTACION = 20
+# Con más nodos ninguna ruta dibuja el PNG (responde imagen: None); el SVG descargable sí los admite
+MAX_NODOS_IMAGEN = 300
+PATRON_GRAFO_ID = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
 COLORES = {
     'nodo_normal': '#3498db',
     'nodo_ruta': '#e74c3c',
     'arista_normal': '#95a5a6',
     'arista_ruta': '#e74c3c',
+    'borde_inicial': '#2c3e50',
     'fondo': '#f8f9fa'
 }
 
-def generar_visualizacion_simple():
-    """Genera visualización del grafo sin ruta destacada"""
-    global grafo_global
-    
-    if grafo_global is None or len(grafo_global.obtener_nodos()) == 0:
-        return None
-    
-    G = nx.Graph() if not grafo_global.dirigido else nx.DiGraph()
-    
-    for nodo in grafo_global.obtener_nodos():
-        G.add_node(nodo)
-    
-    for origen, destino, peso in grafo_global.obtener_aristas():
-        G.add_edge(origen, destino, weight=peso)
-    
-    plt.figure(figsize=(10, 8), facecolor=COLORES['fondo'])
-    pos = nx.spring_layout(G, k=2, iterations=50, seed=42)
-    
-    nx.draw(G, pos, with_labels=True,
-            node_color=COLORES['nodo_normal'],
-            node_size=1500,
-            font_weight='bold',
-            font_color='white',
-            edge_color=COLORES['arista_normal'],
-            arrows=grafo_global.dirigido,
-            arrowsize=20)
-    
-    edge_labels = {(u, v): w for u, v, w in grafo_global.obtener_aristas()}
-    nx.draw_networkx_edge_labels(G, pos, edge_labels, font_size=10)
-    
-    plt.axis('off')
-    
+# Con más estados el diagrama deja de leerse; solo se envía el resumen
+MAX_ESTADOS_DIAGRAMA = 40
+
+# Posiciones de los nodos por grafo: uid -> (versión, posiciones)
+posiciones_grafos = LRUCache(maxsize=int(os.environ.get('GRAFOS_MAX', 1024)))
+# Imágenes ya dibujadas: (uid, versión, ruta destacada) -> PNG en base64
+imagenes_grafos = LRUCache(maxsize=int(os.environ.get('GRAFOS_IMAGENES_CACHE_SIZE', 256)))
+
+def nueva_figura():
+    """Figura propia de cada dibujo, fuera del estado global de pyplot: los hilos no se pisan entre sí"""
+    figura = Figure(figsize=(10, 8), facecolor=COLORES['fondo'])
+    return figura, figura.add_subplot()
+
+def figura_a_png(figura):
+    """Guarda la figura como PNG"""
     buffer = BytesIO()
-    plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight', facecolor=COLORES['fondo'])
-    buffer.seek(0)
-    imagen_base64 = base64.b64encode(buffer.read()).decode()
-    plt.close()
-    
-    return imagen_base64
+    figura.savefig(buffer, format='png', dpi=100, bbox_inches='tight', facecolor=COLORES['fondo'])
+    return buffer.getvalue()
 
-def generar_visualizacion(ruta_destacada):
-    """Genera visualización del grafo con ruta destacada"""
-    global grafo_global
-    
-    G = nx.Graph() if not grafo_global.dirigido else nx.DiGraph()
+def figura_a_base64(figura):
+    """Guarda la figura como PNG en base64"""
+    return base64.b64encode(figura_a_png(figura)).decode()
+
+def grafo_networkx(grafo):
+    G = nx.Graph() if not grafo.dirigido else nx.DiGraph()
     
-    for nodo in grafo_global.obtener_nodos():
+    for nodo in grafo.obtener_nodos():
         G.add_node(nodo)
     
-    for origen, destino, peso in grafo_global.obtener_aristas():
+    for origen, destino, peso in grafo.obtener_aristas():
         G.add_edge(origen, destino, weight=peso)
     
-    plt.figure(figsize=(10, 8), facecolor=COLORES['fondo'])
-    pos = nx.spring_layout(G, k=2, iterations=50, seed=42)
-    
-    nodos_normales = [n for n in G.nodes() if n not in ruta_destacada]
-    nx.draw_networkx_nodes(G, pos, nodelist=nodos_normales,
-                           node_color=COLORES['nodo_normal'], node_size=1500)
-    nx.draw_networkx_nodes(G, pos, nodelist=ruta_destacada,
-                           node_color=COLORES['nodo_ruta'], node_size=1500)
-    
-    aristas_ruta = [(ruta_destacada[i], ruta_destacada[i + 1])
-                    for i in range(len(ruta_destacada) - 1)]
-    aristas_normales = [(u, v) for u, v in G.edges() if (u, v) not in aristas_ruta and (v, u) not in aristas_ruta]
-    
-    nx.draw_networkx_edges(G, pos, edgelist=aristas_normales,
-                           width=1, edge_color=COLORES['arista_normal'],
-                           arrows=grafo_global.dirigido, arrowsize=20)
-    
-    nx.draw_networkx_edges(G, pos, edgelist=aristas_ruta,
-                           width=3, edge_color=COLORES['arista_ruta'],
-                           arrows=grafo_global.dirigido, arrowsize=25)
-    
-    nx.draw_networkx_labels(G, pos, font_size=12, font_weight='bold', font_color='white')
-    
-    edge_labels = {(u, v): w for u, v, w in grafo_global.obtener_aristas()}
-    nx.draw_networkx_edge_labels(G, pos, edge_labels, font_size=10)
+    return G
+
+def calcular_posiciones(grafo, G):
+    """Posiciones de los nodos, reutilizando las de la versión anterior del grafo.
+
+    Los nodos ya ubicados quedan fijos; solo los nuevos parten junto a sus
+    vecinos ya ubicados y se acomodan con spring_layout. Así agregar una arista
+    no redistribuye todo el dibujo.
+    """
+    version, pos = posiciones_grafos.get(grafo.uid, (None, {}))
+    if version == grafo.version:
+        return pos
+    
+    nuevos = [n for n in G if n not in pos]
+    if nuevos and not pos:
+        pos = nx.spring_layout(G, k=2, iterations=50, seed=42)
+    elif nuevos:
+        aleatorio = random.Random(grafo.version)
+        inicial = dict(pos)
+        for nodo in nuevos:
+            vecinos = [inicial[v] for v in nx.all_neighbors(G, nodo) if v in inicial]
+            if vecinos:
+                x = sum(p[0] for p in vecinos) / len(vecinos)
+                y = sum(p[1] for p in vecinos) / len(vecinos)
+            else:
+                x, y = 0.0, 0.0
+            inicial[nodo] = (x + aleatorio.uniform(-0.3, 0.3), y + aleatorio.uniform(-0.3, 0.3))
+        pos = nx.spring_layout(G, k=2, pos=inicial, fixed=list(pos), iterations=50, seed=42)
+    
+    posiciones_grafos.put(grafo.uid, (grafo.version, pos))
+    return pos
+
+def generar_visualizacion_simple(grafo):
+    """Genera visualización del grafo sin ruta destacada; None si está vacío o es demasiado grande"""
+    if grafo is None or not 0 < len(grafo.nodos) <= MAX_NODOS_IMAGEN:
+        return None
+    return imagenes_grafos.get_or_create((grafo.uid, grafo.version, ()), lambda: dibujar_grafo(grafo))
+
+def generar_visualizacion(grafo, ruta_destacada):
+    """Genera visualización del grafo con ruta destacada; None si es demasiado grande"""
+    if len(grafo.nodos) > MAX_NODOS_IMAGEN:
+        return None
+    return imagenes_grafos.get_or_create((grafo.uid, grafo.version, tuple(ruta_destacada)),
+                                         lambda: dibujar_grafo(grafo, ruta_destacada))
+
+def dibujar_grafo(grafo, ruta_destacada=(), codificar=figura_a_base64):
+    G = grafo_networkx(grafo)
+    pos = calcular_posiciones(grafo, G)
+    
+    figura, ejes = nueva_figura()
+    
+    if not ruta_destacada:
+        nx.draw(G, pos, ax=ejes, with_labels=True,
+                node_color=COLORES['nodo_normal'],
+                node_size=1500,
+                font_weight='bold',
+                font_color='white',
+                edge_color=COLORES['arista_normal'],
+                arrows=grafo.dirigido,
+                arrowsize=20)
+    else:
+        nodos_normales = [n for n in G.nodes() if n not in ruta_destacada]
+        nx.draw_networkx_nodes(G, pos, ax=ejes, nodelist=nodos_normales,
+                               node_color=COLORES['nodo_normal'], node_size=1500)
+        nx.draw_networkx_nodes(G, pos, ax=ejes, nodelist=list(ruta_destacada),
+                               node_color=COLORES['nodo_ruta'], node_size=1500)
+        
+        aristas_ruta = [(ruta_destacada[i], ruta_destacada[i + 1])
+                        for i in range(len(ruta_destacada) - 1)]
+        aristas_normales = [(u, v) for u, v in G.edges() if (u, v) not in aristas_ruta and (v, u) not in aristas_ruta]
+        
+        nx.draw_networkx_edges(G, pos, ax=ejes, edgelist=aristas_normales,
+                               width=1, edge_color=COLORES['arista_normal'],
+                               arrows=grafo.dirigido, arrowsize=20)
+        
+        nx.draw_networkx_edges(G, pos, ax=ejes, edgelist=aristas_ruta,
+                               width=3, edge_color=COLORES['arista_ruta'],
+                               arrows=grafo.dirigido, arrowsize=25)
+        
+        nx.draw_networkx_labels(G, pos, ax=ejes, font_size=12, font_weight='bold', font_color='white')
     
-    plt.axis('off')
+    edge_labels = {(u, v): w for u, v, w in grafo.obtener_aristas()}
+    nx.draw_networkx_edge_labels(G, pos, edge_labels, ax=ejes, font_size=10)
     
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight', facecolor=COLORES['fondo'])
-    buffer.seek(0)
-    imagen_base64 = base64.b64encode(buffer.read()).decode()
-    plt.close()
+    ejes.axis('off')
     
-    return imagen_base64
+    return codificar(figura)
+
+def generar_diagrama_automata(automata):
+    """Dibuja el diagrama de estados que devuelve automata_regex.describir"""
+    G = nx.DiGraph()
+    nombres = [f"q{estado}" for estado in range(automata['estados'])]
+    G.add_nodes_from(nombres)
+    for origen, destino, etiqueta in automata['transiciones']:
+        G.add_edge(nombres[origen], nombres[destino], label=etiqueta)
+    
+    # De izquierda a derecha según la distancia desde el estado inicial
+    inicial = nombres[automata['inicial']]
+    for nodo, distancia in nx.single_source_shortest_path_length(G, inicial).items():
+        G.nodes[nodo]['capa'] = distancia
+    
+    figura, ejes = nueva_figura()
+    pos = nx.multipartite_layout(G, subset_key='capa')
+    
+    # Estados de aceptación en rojo; el inicial con borde oscuro
+    aceptacion = {nombres[estado] for estado in automata['aceptacion']}
+    nx.draw_networkx_nodes(G, pos, ax=ejes, node_size=1500,
+                           node_color=[COLORES['nodo_ruta'] if n in aceptacion else COLORES['nodo_normal'] for n in G.nodes()],
+                           edgecolors=[COLORES['borde_inicial'] if n == inicial else COLORES['fondo'] for n in G.nodes()],
+                           linewidths=[4 if n == inicial else 1 for n in G.nodes()])
+    # Las aristas se curvan para que no se tapen las de ida y vuelta
+    nx.draw_networkx_edges(G, pos, ax=ejes, node_size=1500, width=1, edge_color=COLORES['arista_normal'],
+                           arrows=True, arrowsize=20, connectionstyle='arc3,rad=0.15')
+    nx.draw_networkx_labels(G, pos, ax=ejes, font_size=12, font_weight='bold', font_color='white')
+    nx.draw_networkx_edge_labels(G, pos, nx.get_edge_attributes(G, 'label'), ax=ejes, font_size=10,
+                                 connectionstyle='arc3,rad=0.15')
+    
+    ejes.axis('off')
+    
+    return figura_a_base64(figura)
 
 # ============ RUTAS PRINCIPALES ============
 
@@ -461,6 +1112,28 @@ def index():
 def simplificacion():
     return render_template('simplificacion.html')
 
+@app.route('/simplificar', methods=['POST'])
+def simplificar():
+    datos = request.get_json()
+    expresion = datos.get('expresion', '')
+    forma = datos.get('forma', 'sop')
+    metodo = datos.get('metodo', 'minimizar')
+
+    if not expresion.strip():
+        return jsonify({'exito': False, 'error': 'La expresión está vacía'}), 400
+    if metodo not in ('minimizar', 'leyes'):
+        return jsonify({'exito': False, 'error': f'Método no válido: {metodo}'}), 400
+
+    try:
+        if metodo == 'leyes':
+            resultado = SimplificadorBooleano.aplicar_leyes(expresion)
+        else:
+            resultado = SimplificadorBooleano.simplificar(expresion, forma)
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
+
+    return jsonify({'exito': True, **resultado})
+
 # ---- PROYECTO 3 ----
 @app.route('/expresiones-regulares')
 def expresiones_regulares():
@@ -472,90 +1145,335 @@ def procesar_regex():
     data = request.get_json()
     patron = data.get('regex', '')
     texto = data.get('texto', '')
+    # 'html': texto con <mark>; 'spans': posiciones [inicio, fin] para que el cliente resalte
+    formato = data.get('formato', 'html')
+    # 're': motor de Python; 'lineal': simulación del NFA; 'dfa': tablas del DFA mínimo
+    motor = data.get('motor', 're')
+    
+    if formato not in ('html', 'spans'):
+        return jsonify({'valid': False, 'error': f'Formato no válido: {formato}'})
+    if motor not in MOTORES:
+        return jsonify({'valid': False, 'error': f'Motor no válido: {motor}'})
     
     es_valida, error = validar_regex(patron)
     
     if not es_valida:
         return jsonify({'valid': False, 'error': f'Error en la expresión regular: {error}'})
+    if motor != 're':
+        try:
+            motor_regex.compilar(patron)
+        except motor_regex.PatronNoSoportado as e:
+            return jsonify({'valid': False, 'error': f'El motor {motor} no admite este patrón: {e}'})
     
     lineas = texto.split('\n')
     if len(lineas) < 5:
         return jsonify({'valid': False, 'error': 'El texto debe tener al menos 5 líneas.'})
     
-    coincidencias, total = resaltar_coincidencias(texto, patron)
-    
-    texto_resaltado = texto
-    offset = 0
     try:
-        for match in re.finditer(patron, texto, re.MULTILINE):
-            inicio, fin = match.span()
-            texto_resaltado = (
-                texto_resaltado[:inicio + offset] +
-                "<mark>" + texto_resaltado[inicio + offset:fin + offset] + "</mark>" +
-                texto_resaltado[fin + offset:]
-            )
-            offset += 13
-    except:
-        pass
+        coincidencias, spans = ejecutor_regex.buscar(texto, patron, motor)
+    except (ErrorEjecucion, motor_regex.PatronNoSoportado) as e:
+        return jsonify({'valid': False, 'error': str(e)})
     
-    return jsonify({
+    respuesta = {
         'valid': True,
-        'texto_resaltado': texto_resaltado,
         'coincidencias': coincidencias,
-        'total_coincidencias': total
-    })
+        'total_coincidencias': len(coincidencias)
+    }
+    if formato == 'spans':
+        respuesta['spans'] = spans
+    else:
+        respuesta['texto_resaltado'] = resaltar_coincidencias(texto, spans)
+    return jsonify(respuesta)
+
+@app.route('/automata_regex', methods=['POST'])
+def automata_de_regex():
+    """Compila la expresión a su DFA mínimo y devuelve el resumen y el diagrama de estados"""
+    data = request.get_json()
+    patron = data.get('regex', '')
+
+    es_valida, error = validar_regex(patron)
+    if not es_valida:
+        return jsonify({'valid': False, 'error': f'Error en la expresión regular: {error}'})
+
+    try:
+        motor_regex.compilar(patron)
+        # La construcción puede crecer mucho: se hace con el mismo tiempo límite que una búsqueda
+        automata = ejecutor_regex.ejecutar(automata_regex.describir, patron)
+    except motor_regex.PatronNoSoportado as e:
+        return jsonify({'valid': False, 'error': f'No se puede construir el autómata: {e}'})
+    except ErrorEjecucion as e:
+        return jsonify({'valid': False, 'error': str(e)})
+
+    respuesta = {'valid': True, **automata}
+    if automata['estados'] <= MAX_ESTADOS_DIAGRAMA:
+        respuesta['imagen'] = generar_diagrama_automata(automata)
+    return jsonify(respuesta)
+
+@app.route('/procesar_lote', methods=['POST'])
+def procesar_lote():
+    """Aplica varias reglas al mismo texto en una sola petición.
+
+    'reglas' es una lista de nombres de RegexRules o de patrones propios; sin
+    ella se usan todas las reglas predefinidas.
+    """
+    data = request.get_json()
+    texto = data.get('texto', '')
+    reglas = data.get('reglas') or list(RegexRules.rules)
+    formato = data.get('formato', 'spans')
+    motor = data.get('motor', 're')
+
+    if formato not in ('html', 'spans'):
+        return jsonify({'valid': False, 'error': f'Formato no válido: {formato}'})
+    if motor not in MOTORES:
+        return jsonify({'valid': False, 'error': f'Motor no válido: {motor}'})
+    if not isinstance(reglas, list) or not all(isinstance(regla, str) for regla in reglas):
+        return jsonify({'valid': False, 'error': 'Las reglas deben ser una lista de nombres o patrones.'})
+
+    patrones = []
+    for regla in reglas:
+        patron = RegexRules.get_rule(regla)
+        if patron is None:
+            patron = regla
+            es_valida, error = validar_regex(patron)
+            if not es_valida:
+                return jsonify({'valid': False, 'error': f'Error en la expresión regular {regla}: {error}'})
+        if motor != 're':
+            try:
+                motor_regex.compilar(patron)
+            except motor_regex.PatronNoSoportado as e:
+                return jsonify({'valid': False, 'error': f'El motor {motor} no admite {regla}: {e}'})
+        patrones.append(patron)
+
+    lineas = texto.split('\n')
+    if len(lineas) < 5:
+        return jsonify({'valid': False, 'error': 'El texto debe tener al menos 5 líneas.'})
+
+    try:
+        resultados_lote = ejecutor_regex.buscar_lote(texto, patrones, motor)
+    except (ErrorEjecucion, motor_regex.PatronNoSoportado) as e:
+        return jsonify({'valid': False, 'error': str(e)})
+
+    resultados = []
+    for regla, patron, (coincidencias, spans) in zip(reglas, patrones, resultados_lote):
+        resultado = {
+            'regla': regla,
+            'patron': patron,
+            'coincidencias': coincidencias,
+            'total_coincidencias': len(coincidencias)
+        }
+        if formato == 'spans':
+            resultado['spans'] = spans
+        else:
+            resultado['texto_resaltado'] = resaltar_coincidencias(texto, spans)
+        resultados.append(resultado)
+    return jsonify({'valid': True, 'resultados': resultados})
+
+@app.route('/procesar_archivo', methods=['POST'])
+def procesar_archivo():
+    """Busca en un archivo subido sin cargarlo en memoria; responde NDJSON.
+
+    El patrón se aplica como bytes sobre el archivo mapeado en memoria (\\d, \\w
+    y \\s solo cubren ASCII). La primera línea es una cabecera, luego va una
+    línea {linea, inicio, fin, texto} por coincidencia y al final un resumen.
+    """
+    archivo = request.files.get('archivo')
+    patron = request.form.get('regex', '')
+
+    if archivo is None:
+        return jsonify({'valid': False, 'error': 'No se recibió ningún archivo.'})
+
+    patron_bytes = patron.encode('utf-8')
+    es_valida, error = validar_regex(patron_bytes)
+    if not es_valida:
+        return jsonify({'valid': False, 'error': f'Error en la expresión regular: {error}'})
+
+    # El archivo se guarda en disco para que el proceso de búsqueda lo mapee en memoria
+    descriptor, ruta = tempfile.mkstemp(prefix='regex_', suffix='.txt')
+    os.close(descriptor)
+    respuesta = None
+    try:
+        archivo.save(ruta)
+        tamano = os.path.getsize(ruta)
+        plazo = ejecutor_regex.tiempo_limite * max(1, math.ceil(tamano / ARCHIVO_BYTES_POR_PLAZO))
+        bloques = ejecutor_regex.iterar(buscar_en_archivo, ruta, patron_bytes, 5, tiempo_limite=plazo)
+        # Los errores anteriores al primer bloque todavía pueden responderse como JSON
+        primero = next(bloques, '')
+
+        def flujo():
+            yield json.dumps({'archivo': archivo.filename, 'patron': patron, 'bytes': tamano}, ensure_ascii=False) + '\n'
+            yield primero
+            try:
+                yield from bloques
+            except (ValueError, ErrorEjecucion) as e:
+                yield json.dumps({'error': str(e)}, ensure_ascii=False) + '\n'
+
+        def cerrar():
+            bloques.close()
+            os.remove(ruta)
+
+        respuesta = Response(stream_with_context(flujo()), mimetype='application/x-ndjson')
+        respuesta.call_on_close(cerrar)
+        return respuesta
+    except (ValueError, ErrorEjecucion) as e:
+        return jsonify({'valid': False, 'error': str(e)})
+    finally:
+        if respuesta is None:
+            os.remove(ruta)
 
 # ---- PROYECTO 4 ----
 @app.route('/rutas-automatas')
 def rutas_automatas():
     return render_template('rutas_automatas.html')
 
+def grafo_id_de_peticion(datos=None):
+    """Id del grafo: el explícito de la petición (JSON o query) o el de la cookie de sesión"""
+    grafo_id = (datos or {}).get('grafo_id') or request.args.get('grafo_id') or request.cookies.get(COOKIE_GRAFO)
+    if grafo_id is not None and not (isinstance(grafo_id, str) and PATRON_GRAFO_ID.fullmatch(grafo_id)):
+        raise ValueError('grafo_id inválido')
+    return grafo_id
+
+def respuesta_grafo(grafo_id, datos):
+    """Respuesta JSON que además deja el grafo_id en la cookie de sesión"""
+    respuesta = jsonify({'exito': True, 'grafo_id': grafo_id, **datos})
+    respuesta.set_cookie(COOKIE_GRAFO, grafo_id, httponly=True, samesite='Lax')
+    return respuesta
+
+def validar_arista(origen, destino, peso=1):
+    """Normaliza una arista con las reglas de /agregar_arista; lanza ValueError con el motivo"""
+    origen = str(origen or '').strip().upper()
+    destino = str(destino or '').strip().upper()
+    
+    if not origen or not destino:
+        raise ValueError('Origen y destino requeridos')
+    
+    if origen == destino:
+        raise ValueError('El origen y destino no pueden ser iguales')
+    
+    try:
+        peso = float(peso)
+    except (TypeError, ValueError):
+        raise ValueError('El peso debe ser un número') from None
+    
+    if not math.isfinite(peso) or peso <= 0:
+        raise ValueError('El peso debe ser mayor a 0')
+    
+    return origen, destino, peso
+
+def opcion_booleana(valor, defecto):
+    """Opción que llega como booleano JSON o como texto de formulario"""
+    if valor is None:
+        return defecto
+    if isinstance(valor, str):
+        return valor.strip().lower() in ('1', 'true', 'si', 'sí', 'on')
+    return bool(valor)
+
+def registros_csv(lineas):
+    """Genera (ubicación, campos) por fila de un CSV origen,destino[,peso]; la cabecera es opcional"""
+    for numero, fila in enumerate(csv.reader(lineas), 1):
+        if not any(campo.strip() for campo in fila):
+            continue
+        if numero == 1 and [campo.strip().lower() for campo in fila[:2]] == ['origen', 'destino']:
+            continue
+        yield f'línea {numero}', fila
+
+def registros_json(aristas):
+    """Genera (ubicación, campos) de una lista de aristas [origen, destino, peso] o {origen, destino, peso}"""
+    if not isinstance(aristas, list):
+        raise ValueError('Se esperaba una lista de aristas')
+    for numero, arista in enumerate(aristas, 1):
+        if isinstance(arista, dict):
+            arista = [arista.get('origen'), arista.get('destino'), arista.get('peso', 1)]
+        yield f'arista {numero}', arista if isinstance(arista, list) else [arista]
+
+def contenido_json(contenido):
+    """Lee una lista de aristas o el formato de /descargar_grafo/json.
+    
+    Devuelve (registros, nodos, coordenadas, dirigido); dirigido es None si el
+    contenido no lo indica.
+    """
+    if not isinstance(contenido, dict):
+        return registros_json(contenido), [], {}, None
+    
+    nodos = contenido.get('nodos', [])
+    if not isinstance(nodos, list) or len(nodos) > MAX_ARISTAS_IMPORTACION:
+        raise ValueError(f'Se esperaba una lista de como máximo {MAX_ARISTAS_IMPORTACION} nodos')
+    nodos = [str(nodo).strip().upper() for nodo in nodos]
+    if not all(nodos):
+        raise ValueError('Hay nodos sin nombre')
+    
+    try:
+        coordenadas = {str(nodo).strip().upper(): (float(x), float(y))
+                       for nodo, (x, y) in dict(contenido.get('coordenadas') or {}).items()}
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Coordenadas inválidas: {e}') from None
+    if not all(math.isfinite(valor) for punto in coordenadas.values() for valor in punto):
+        raise ValueError('Coordenadas inválidas: deben ser números finitos')
+    
+    return registros_json(contenido.get('aristas', [])), nodos, coordenadas, contenido.get('dirigido')
+
+def validar_lote(registros):
+    """Valida todas las aristas antes de insertar ninguna; devuelve (aristas, errores)"""
+    aristas, errores = [], []
+    for ubicacion, campos in registros:
+        try:
+            if not 2 <= len(campos) <= 3:
+                raise ValueError('se esperaban origen, destino y peso opcional')
+            aristas.append(validar_arista(*campos))
+        except ValueError as e:
+            errores.append(f'{ubicacion}: {e}')
+            if len(errores) == MAX_ERRORES_IMPORTACION:
+                break
+        if len(aristas) > MAX_ARISTAS_IMPORTACION:
+            errores.append(f'Se admiten como máximo {MAX_ARISTAS_IMPORTACION} aristas por carga')
+            break
+    return aristas, errores
+
 @app.route('/iniciar_grafo', methods=['POST'])
 def iniciar_grafo():
-    global grafo_global
-    
     datos = request.json
+    try:
+        grafo_id = grafo_id_de_peticion(datos) or uuid.uuid4().hex
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
     dirigido = datos.get('dirigido', False)
-    grafo_global = Grafo(dirigido=dirigido)
+    almacen_grafos.guardar(grafo_id, Grafo(dirigido=dirigido))
     
-    return jsonify({'exito': True})
+    return respuesta_grafo(grafo_id, {})
 
 @app.route('/agregar_arista', methods=['POST'])
 def agregar_arista():
-    global grafo_global
-    
-    if grafo_global is None:
-        return jsonify({'exito': False, 'error': 'Grafo no inicializado'}), 400
-    
     datos = request.json
-    origen = datos.get('origen', '').strip().upper()
-    destino = datos.get('destino', '').strip().upper()
-    peso = float(datos.get('peso', 1))
-    
-    if not origen or not destino:
-        return jsonify({'exito': False, 'error': 'Origen y destino requeridos'}), 400
-    
-    if origen == destino:
-        return jsonify({'exito': False, 'error': 'El origen y destino no pueden ser iguales'}), 400
-    
-    if peso <= 0:
-        return jsonify({'exito': False, 'error': 'El peso debe ser mayor a 0'}), 400
+    try:
+        grafo_id = grafo_id_de_peticion(datos)
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
     
-    grafo_global.agregar_arista(origen, destino, peso)
-    img_base64 = generar_visualizacion_simple()
+    try:
+        origen, destino, peso = validar_arista(datos.get('origen'), datos.get('destino'), datos.get('peso', 1))
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
     
-    return jsonify({
-        'exito': True,
-        'nodos': grafo_global.obtener_nodos(),
-        'aristas': grafo_global.obtener_aristas(),
-        'imagen': img_base64
-    })
+    with almacen_grafos.bloquear(grafo_id or '', modificar=True) as grafo:
+        if grafo is None:
+            return jsonify({'exito': False, 'error': 'Grafo no inicializado'}), 400
+        
+        grafo.agregar_arista(origen, destino, peso)
+        img_base64 = generar_visualizacion_simple(grafo)
+        
+        return respuesta_grafo(grafo_id, {
+            'nodos': grafo.obtener_nodos(),
+            'aristas': grafo.obtener_aristas(),
+            'imagen': img_base64
+        })
 
 @app.route('/crear_grafo_ejemplo', methods=['POST'])
 def crear_grafo_ejemplo():
-    global grafo_global
+    try:
+        grafo_id = grafo_id_de_peticion(request.get_json(silent=True)) or uuid.uuid4().hex
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
     
-    grafo_global = Grafo(dirigido=False)
+    grafo = Grafo(dirigido=False)
     
     aristas = [
         ('A', 'B', 4),
@@ -567,61 +1485,293 @@ def crear_grafo_ejemplo():
     ]
     
     for origen, destino, peso in aristas:
-        grafo_global.agregar_arista(origen, destino, peso)
+        grafo.agregar_arista(origen, destino, peso)
     
-    img_base64 = generar_visualizacion_simple()
+    almacen_grafos.guardar(grafo_id, grafo)
+    img_base64 = generar_visualizacion_simple(grafo)
     
-    return jsonify({
-        'exito': True,
-        'nodos': grafo_global.obtener_nodos(),
-        'aristas': grafo_global.obtener_aristas(),
+    return respuesta_grafo(grafo_id, {
+        'nodos': grafo.obtener_nodos(),
+        'aristas': grafo.obtener_aristas(),
         'imagen': img_base64
     })
 
-@app.route('/calcular_ruta', methods=['POST'])
-def calcular_ruta():
-    global grafo_global
+@app.route('/importar_grafo', methods=['POST'])
+def importar_grafo():
+    """Carga una lista de aristas en JSON o CSV de una sola vez y dibuja el grafo como mucho una vez.
+    
+    Acepta un cuerpo JSON ({aristas: [...]} o la lista directamente), un archivo
+    'archivo' (.json o .csv) o un cuerpo text/csv, que se lee por líneas sin
+    cargarlo completo. Opciones: dirigido, reemplazar (por defecto crea un grafo
+    nuevo; si no, agrega al actual) e imagen (false para no dibujar).
+    
+    El JSON puede ser el de /descargar_grafo/json: sus nodos aislados y
+    coordenadas también se cargan, y su campo dirigido tiene prioridad sobre la
+    opción. Al agregar a un grafo existente se conserva su tipo.
+    """
+    datos = request.get_json(silent=True) if request.is_json else None
+    opciones = datos if isinstance(datos, dict) else request.values
+    try:
+        grafo_id = grafo_id_de_peticion(opciones)
+        reemplazar = opcion_booleana(opciones.get('reemplazar'), True)
+        if reemplazar:
+            grafo_id = grafo_id or uuid.uuid4().hex
+        
+        nodos, coordenadas, dirigido = [], {}, None
+        if request.is_json:
+            registros, nodos, coordenadas, dirigido = contenido_json(datos)
+        elif 'archivo' in request.files:
+            archivo = request.files['archivo']
+            texto = io.TextIOWrapper(archivo.stream, encoding='utf-8-sig', newline='')
+            if (archivo.filename or '').lower().endswith('.json') or archivo.mimetype == 'application/json':
+                registros, nodos, coordenadas, dirigido = contenido_json(json.load(texto))
+            else:
+                registros = registros_csv(texto)
+        else:
+            registros = registros_csv(io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline=''))
+        
+        aristas, errores = validar_lote(registros)
+    except (ValueError, csv.Error) as e:
+        # Incluye JSON mal formado y texto que no es UTF-8
+        return jsonify({'exito': False, 'error': f'No se pudo leer la lista de aristas: {e}'}), 400
+    
+    if errores:
+        return jsonify({'exito': False, 'error': 'Hay aristas inválidas; no se importó ninguna',
+                        'errores': errores}), 400
+    if not aristas and not nodos:
+        return jsonify({'exito': False, 'error': 'No se encontraron aristas'}), 400
+    
+    dibujar = opcion_booleana(opciones.get('imagen'), True)
+    if reemplazar:
+        # El grafo nuevo se dibuja antes de guardarlo, cuando ninguna otra petición lo ve
+        grafo = Grafo(dirigido=opcion_booleana(dirigido, opcion_booleana(opciones.get('dirigido'), False)))
+        try:
+            grafo.agregar_aristas(aristas, nodos, coordenadas)
+        except ValueError as e:
+            return jsonify({'exito': False, 'error': str(e)}), 400
+        respuesta = respuesta_importacion(grafo_id, grafo, len(aristas), dibujar)
+        almacen_grafos.guardar(grafo_id, grafo)
+        return respuesta
+    
+    with almacen_grafos.bloquear(grafo_id or '', modificar=True) as grafo:
+        if grafo is None:
+            return jsonify({'exito': False, 'error': 'Grafo no inicializado'}), 400
+        
+        try:
+            grafo.agregar_aristas(aristas, nodos, coordenadas)
+        except ValueError as e:
+            return jsonify({'exito': False, 'error': str(e)}), 400
+        return respuesta_importacion(grafo_id, grafo, len(aristas), dibujar)
+
+def respuesta_importacion(grafo_id, grafo, importadas, dibujar):
+    img_base64 = generar_visualizacion_simple(grafo) if dibujar else None
     
-    if grafo_global is None:
-        return jsonify({'exito': False, 'error': 'Grafo no inicializado'}), 400
+    return respuesta_grafo(grafo_id, {
+        'aristas_importadas': importadas,
+        'nodos': grafo.obtener_nodos(),
+        'num_aristas': len(grafo.obtener_aristas()),
+        'imagen': img_base64
+    })
+
+FORMATOS_DESCARGA = {
+    'graphml': 'application/graphml+xml',
+    'json': 'application/json',
+    'csv': 'text/csv',
+    'svg': 'image/svg+xml',
+    'png': 'image/png'
+}
+
+def posiciones_para_exportar(grafo):
+    """Posiciones para el SVG sin recalcular el layout de un grafo grande.
+    
+    Se usan, en orden: las coordenadas de los nodos, el layout en caché de la
+    versión actual, un layout incremental si el grafo es pequeño o, como
+    respaldo, los nodos en círculo.
+    """
+    nombres = grafo.compacto().nombres
+    if nombres and all(nombre in grafo.coordenadas for nombre in nombres):
+        return dict(grafo.coordenadas)
+    version, pos = posiciones_grafos.get(grafo.uid, (None, {}))
+    if version == grafo.version:
+        return pos
+    if len(nombres) <= MAX_NODOS_IMAGEN:
+        return calcular_posiciones(grafo, grafo_networkx(grafo))
+    return exportar_grafo.posiciones_en_circulo(nombres)
+
+@app.route('/descargar_grafo/<formato>', methods=['GET'])
+def descargar_grafo(formato):
+    """Descarga el grafo en GraphML, JSON, CSV, SVG o PNG; los formatos de texto se envían por bloques"""
+    if formato not in FORMATOS_DESCARGA:
+        return jsonify({'exito': False, 'error': f'Formato no soportado: {formato}'}), 404
+    try:
+        grafo_id = grafo_id_de_peticion()
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
     
+    with almacen_grafos.bloquear(grafo_id or '') as grafo:
+        if grafo is None:
+            return jsonify({'exito': False, 'error': 'Grafo no inicializado'}), 400
+        
+        # La forma compacta no se modifica (cada versión crea otra), así que el envío sigue fuera del candado
+        compacto = grafo.compacto()
+        coordenadas = dict(grafo.coordenadas)
+        if formato == 'png':
+            if len(compacto) > MAX_NODOS_IMAGEN:
+                return jsonify({'exito': False,
+                                'error': f'El PNG admite hasta {MAX_NODOS_IMAGEN} nodos; descargue el SVG'}), 400
+            partes = [dibujar_grafo(grafo, codificar=figura_a_png)]
+        elif formato == 'svg':
+            partes = exportar_grafo.exportar_svg(compacto, posiciones_para_exportar(grafo), COLORES,
+                                                 detalle=len(compacto) <= MAX_NODOS_IMAGEN)
+    
+    if formato == 'graphml':
+        partes = exportar_grafo.exportar_graphml(compacto, coordenadas)
+    elif formato == 'json':
+        partes = exportar_grafo.exportar_json(compacto, coordenadas)
+    elif formato == 'csv':
+        partes = exportar_grafo.exportar_csv(compacto)
+    
+    return Response(partes, mimetype=FORMATOS_DESCARGA[formato],
+                    headers={'Content-Disposition': f'attachment; filename=grafo.{formato}'})
+
+@app.route('/calcular_ruta', methods=['POST'])
+def calcular_ruta():
     datos = request.json
+    try:
+        grafo_id = grafo_id_de_peticion(datos)
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
+    
     origen = datos.get('origen', '').strip().upper()
     destino = datos.get('destino', '').strip().upper()
+    estrategia = datos.get('estrategia', 'auto')
     
     if not origen or not destino:
         return jsonify({'exito': False, 'error': 'Origen y destino requeridos'}), 400
     
-    distancia, ruta = grafo_global.dijkstra(origen, destino)
+    if estrategia not in ESTRATEGIAS_RUTA:
+        return jsonify({'exito': False, 'error': f"Estrategia desconocida: {estrategia}"}), 400
     
-    if not ruta:
-        return jsonify({'exito': False, 'error': f'No hay ruta entre {origen} y {destino}'}), 404
-    
-    automata = Automata(grafo_global, origen, destino)
-    validacion = automata.procesar_cadena(ruta)
-    img_base64 = generar_visualizacion(ruta)
+    with almacen_grafos.bloquear(grafo_id or '') as grafo:
+        if grafo is None:
+            return jsonify({'exito': False, 'error': 'Grafo no inicializado'}), 400
+        
+        try:
+            distancia, ruta, estrategia, asentados = grafo.ruta_mas_corta(origen, destino, estrategia)
+        except ValueError as e:
+            return jsonify({'exito': False, 'error': str(e)}), 400
+        
+        if not ruta:
+            return jsonify({'exito': False, 'error': f'No hay ruta entre {origen} y {destino}'}), 404
+        
+        automata = Automata(grafo, origen, destino)
+        validacion = automata.procesar_cadena(ruta)
+        img_base64 = generar_visualizacion(grafo, ruta)
+        
+        return jsonify({
+            'exito': True,
+            'distancia': distancia,
+            'ruta': ruta,
+            'estrategia': estrategia,
+            'nodos_asentados': asentados,
+            'validacion_formal': validacion,
+            'imagen': img_base64,
+            'descripcion_automata': automata.obtener_descripcion_formal(
+                completa=len(automata.delta) <= MAX_TRANSICIONES_DESCRIPCION)
+        })
+
+@app.route('/coordenadas', methods=['POST'])
+def fijar_coordenadas():
+    """Asigna coordenadas {nodo: [x, y]} a nodos existentes; con todas asignadas calcular_ruta puede usar A*"""
+    datos = request.json
+    try:
+        grafo_id = grafo_id_de_peticion(datos)
+        coordenadas = {str(nodo).strip().upper(): (float(x), float(y))
+                       for nodo, (x, y) in dict(datos.get('coordenadas', {})).items()}
+    except (ValueError, TypeError) as e:
+        return jsonify({'exito': False, 'error': f'Coordenadas inválidas: {e}'}), 400
+    
+    with almacen_grafos.bloquear(grafo_id or '', modificar=True) as grafo:
+        if grafo is None:
+            return jsonify({'exito': False, 'error': 'Grafo no inicializado'}), 400
+        
+        faltantes = sorted(nodo for nodo in coordenadas if nodo not in grafo.nodos)
+        if faltantes:
+            return jsonify({'exito': False, 'error': f"Nodos inexistentes: {', '.join(faltantes)}"}), 404
+        
+        for nodo, (x, y) in coordenadas.items():
+            grafo.fijar_coordenadas(nodo, x, y)
+        
+        return jsonify({'exito': True, 'a_estrella': grafo.coordenadas_admisibles() is not None})
+
+@app.route('/distancias_desde', methods=['POST'])
+def distancias_desde():
+    """Distancia desde un origen a todos los nodos (None si no es alcanzable) y el árbol de previos"""
+    datos = request.json
+    try:
+        grafo_id = grafo_id_de_peticion(datos)
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
     
-    return jsonify({
-        'exito': True,
-        'distancia': distancia,
-        'ruta': ruta,
-        'validacion_formal': validacion,
-        'imagen': img_base64,
-        'descripcion_automata': automata.obtener_descripcion_formal()
-    })
+    origen = datos.get('origen', '').strip().upper()
+    if not origen:
+        return jsonify({'exito': False, 'error': 'Origen requerido'}), 400
+    
+    with almacen_grafos.bloquear(grafo_id or '') as grafo:
+        if grafo is None:
+            return jsonify({'exito': False, 'error': 'Grafo no inicializado'}), 400
+        if origen not in grafo.nodos:
+            return jsonify({'exito': False, 'error': f'El nodo {origen} no existe'}), 404
+        
+        distancias, previos = grafo.arbol_caminos(origen)
+        
+        return jsonify({
+            'exito': True,
+            'origen': origen,
+            'distancias': {nodo: distancias.get(nodo) for nodo in sorted(grafo.nodos)},
+            'previos': previos
+        })
+
+@app.route('/matriz_distancias', methods=['GET'])
+def matriz_distancias():
+    """Distancias entre todos los pares de nodos; None donde no hay ruta"""
+    try:
+        grafo_id = grafo_id_de_peticion()
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
+    
+    with almacen_grafos.bloquear(grafo_id or '') as grafo:
+        if grafo is None:
+            return jsonify({'exito': False, 'error': 'Grafo no inicializado'}), 400
+        if len(grafo.nodos) > MAX_NODOS_MATRIZ:
+            return jsonify({'exito': False, 'error': f'La matriz admite hasta {MAX_NODOS_MATRIZ} nodos; '
+                                                     'use /distancias_desde para un origen'}), 400
+        
+        nodos, matriz, metodo = grafo.matriz_distancias()
+        
+        return jsonify({
+            'exito': True,
+            'nodos': nodos,
+            'distancias': [[None if d == float('inf') else d for d in fila] for fila in matriz],
+            'metodo': metodo
+        })
 
 @app.route('/info_automata', methods=['GET'])
 def info_automata():
-    global grafo_global
-    
-    if grafo_global is None:
-        return jsonify({'exito': False, 'error': 'Grafo no inicializado'}), 400
-    
-    nodos = grafo_global.obtener_nodos()
-    if len(nodos) < 2:
-        return jsonify({'exito': False, 'error': 'Se necesitan al menos 2 nodos'}), 400
+    try:
+        grafo_id = grafo_id_de_peticion()
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
     
-    automata = Automata(grafo_global, nodos[0], nodos[-1])
+    with almacen_grafos.bloquear(grafo_id or '') as grafo:
+        if grafo is None:
+            return jsonify({'exito': False, 'error': 'Grafo no inicializado'}), 400
+        
+        nodos = grafo.obtener_nodos()
+        if len(nodos) < 2:
+            return jsonify({'exito': False, 'error': 'Se necesitan al menos 2 nodos'}), 400
+        
+        automata = Automata(grafo, nodos[0], nodos[-1])
     
     return jsonify({
         'exito': True,
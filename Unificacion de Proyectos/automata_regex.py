@@ -0,0 +1,472 @@
+from bisect import bisect_right
+
+import motor_regex
+from cache import LRUCache
+from motor_regex import ASSERT, CHAR, MATCH, PatronNoSoportado, ProgramaRegex
+
+# Tope de estados al construir un autómata; por encima conviene el motor lineal
+MAX_ESTADOS = 2000
+MAX_CODIGO = 0x110000
+
+# Tipo del carácter a cada lado de una posición, para evaluar las aserciones
+BORDE, SALTO, PALABRA, OTRO = range(4)
+
+_automatas = LRUCache(maxsize=64)
+
+# Intervalos de los predicados de clase (\d, \w, \s), calculados una vez por proceso
+_intervalos_predicado = {}
+
+
+# Un conjunto de caracteres se representa como lista ordenada de intervalos
+# [inicio, fin) de códigos, sin solaparse
+
+def _unir(intervalos):
+    unidos = []
+    for inicio, fin in sorted(intervalos):
+        if unidos and inicio <= unidos[-1][1]:
+            unidos[-1] = (unidos[-1][0], max(unidos[-1][1], fin))
+        else:
+            unidos.append((inicio, fin))
+    return unidos
+
+
+def _complemento(intervalos):
+    resultado, anterior = [], 0
+    for inicio, fin in intervalos:
+        if inicio > anterior:
+            resultado.append((anterior, inicio))
+        anterior = fin
+    if anterior < MAX_CODIGO:
+        resultado.append((anterior, MAX_CODIGO))
+    return resultado
+
+
+def _intervalos_de(predicado):
+    intervalos = _intervalos_predicado.get(predicado)
+    if intervalos is None:
+        intervalos, inicio = [], None
+        for codigo in range(MAX_CODIGO):
+            if predicado(chr(codigo)):
+                if inicio is None:
+                    inicio = codigo
+            elif inicio is not None:
+                intervalos.append((inicio, codigo))
+                inicio = None
+        if inicio is not None:
+            intervalos.append((inicio, MAX_CODIGO))
+        _intervalos_predicado[predicado] = intervalos
+    return intervalos
+
+
+def _intervalos_clase(clase):
+    intervalos = [(ord(lo), ord(hi) + 1) for lo, hi in clase.rangos if lo <= hi]
+    for predicado, negado in clase.predicados:
+        propios = _intervalos_de(predicado)
+        intervalos.extend(_complemento(propios) if negado else propios)
+    intervalos = _unir(intervalos)
+    return _complemento(intervalos) if clase.negada else intervalos
+
+
+def _contiene(intervalos, inicios, codigo):
+    k = bisect_right(inicios, codigo) - 1
+    return k >= 0 and codigo < intervalos[k][1]
+
+
+class Alfabeto:
+    """Partición de los caracteres en símbolos para las tablas de un patrón.
+
+    Dos caracteres comparten símbolo si pertenecen a las mismas clases del
+    patrón y tienen el mismo tipo para las aserciones, así que las tablas
+    tienen una columna por símbolo en lugar de una por carácter.
+    """
+
+    def __init__(self, programa):
+        clases = list({id(clase): clase for op, clase in zip(programa.ops, programa.arg1) if op == CHAR}.values())
+        aserciones = {tipo for op, tipo in zip(programa.ops, programa.arg1) if op == ASSERT}
+        # Sin aserciones el contexto no importa y todos los símbolos son OTRO
+        self.con_contexto = bool(aserciones)
+        con_palabra = bool(aserciones & {'limite', 'no_limite'})
+
+        conjuntos = [_intervalos_clase(clase) for clase in clases]
+        conjuntos.append([(10, 11)])
+        if con_palabra:
+            conjuntos.append(_intervalos_de(motor_regex.es_palabra))
+        inicios = [[inicio for inicio, _ in conjunto] for conjunto in conjuntos]
+
+        cortes = sorted({0, MAX_CODIGO}.union(*({inicio, fin} for conjunto in conjuntos for inicio, fin in conjunto)))
+        self.cortes = cortes[:-1]
+        self.simbolo_de_intervalo = []
+        self.tipos = []
+        self.intervalos = []
+        mascaras = [0] * len(clases)
+        firmas = {}
+        for k, inicio in enumerate(self.cortes):
+            firma = tuple(_contiene(conjunto, inicios_conjunto, inicio)
+                          for conjunto, inicios_conjunto in zip(conjuntos, inicios))
+            simbolo = firmas.get(firma)
+            if simbolo is None:
+                simbolo = firmas[firma] = len(self.tipos)
+                if not self.con_contexto:
+                    tipo = OTRO
+                elif firma[len(clases)]:
+                    tipo = SALTO
+                else:
+                    tipo = PALABRA if con_palabra and firma[-1] else OTRO
+                self.tipos.append(tipo)
+                self.intervalos.append([])
+                for j in range(len(clases)):
+                    if firma[j]:
+                        mascaras[j] |= 1 << simbolo
+            self.simbolo_de_intervalo.append(simbolo)
+            self.intervalos[simbolo].append((inicio, cortes[k + 1]))
+
+        self._mascaras = {id(clase): mascara for clase, mascara in zip(clases, mascaras)}
+        self.memo = {}
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def mascara(self, clase):
+        """Bits de los símbolos contenidos en la clase"""
+        return self._mascaras[id(clase)]
+
+    def simbolo(self, c):
+        simbolo = self.memo.get(c)
+        if simbolo is None:
+            simbolo = self.simbolo_de_intervalo[bisect_right(self.cortes, ord(c)) - 1]
+            self.memo[c] = simbolo
+        return simbolo
+
+    def tipo_antes(self, texto, pos):
+        if not self.con_contexto:
+            return OTRO
+        return BORDE if pos == 0 else self.tipos[self.simbolo(texto[pos - 1])]
+
+    def tipo_despues(self, texto, pos):
+        if not self.con_contexto:
+            return OTRO
+        return BORDE if pos == len(texto) else self.tipos[self.simbolo(texto[pos])]
+
+
+def _evaluar(tipo, antes, despues):
+    """Aserción según el tipo de los caracteres que rodean la posición"""
+    if tipo == 'bol':
+        return antes in (BORDE, SALTO)
+    if tipo == 'eol':
+        return despues in (BORDE, SALTO)
+    if tipo == 'inicio':
+        return antes == BORDE
+    if tipo == 'fin':
+        return despues == BORDE
+    if antes == BORDE and despues == BORDE:
+        return False  # Texto vacío
+    return ((antes == PALABRA) != (despues == PALABRA)) == (tipo == 'limite')
+
+
+_CONTEXTOS = {
+    (antes, despues): {tipo: _evaluar(tipo, antes, despues)
+                       for tipo in ('bol', 'eol', 'inicio', 'fin', 'limite', 'no_limite')}.__getitem__
+    for antes in range(4) for despues in range(4)
+}
+
+
+class TablaDFA:
+    """DFA en forma de tabla.
+
+    transiciones[q][a] es el estado siguiente (0 es el sumidero) y el bit a de
+    aceptacion[q] indica que hay coincidencia en esa posición si el símbolo que
+    sigue es a; el bit len(alfabeto) corresponde al final del texto, porque con
+    $ o \\b la aceptación depende del carácter siguiente.
+    """
+
+    def __init__(self, transiciones, aceptacion, iniciales, estados_originales):
+        self.transiciones = transiciones
+        self.aceptacion = aceptacion
+        self.iniciales = iniciales
+        self.estados_originales = estados_originales
+
+
+def _cierre(programa, hilos, inyectar, cumple, busqueda, ignorar):
+    lista, visitados = [], set()
+    for pc in hilos:
+        programa.seguir(lista, visitados, pc, cumple, None)
+    if inyectar:
+        programa.seguir(lista, visitados, 0, cumple, None)
+    activos, coincide = [], False
+    for pc, _ in lista:
+        if programa.ops[pc] != MATCH:
+            activos.append(pc)
+        elif not ignorar:
+            coincide = True
+            if busqueda:
+                break  # Los hilos de menor prioridad se descartan
+    return activos, coincide
+
+
+def _construir(programa, alfabeto, busqueda):
+    """Construcción por subconjuntos; cada estado se memoriza por su clave.
+
+    La clave es (hilos, tipo anterior, inyectar, ignorar), con hilos los pc
+    desde los que sigue cada hilo tras el último carácter. En búsqueda los
+    hilos van en orden de prioridad, se agrega un hilo nuevo en cada posición
+    hasta la primera coincidencia y tras ella se descartan los de menor
+    prioridad, igual que la máquina de Pike; si no, forman un conjunto.
+    """
+    simbolos = len(alfabeto)
+    mascaras = {pc: alfabeto.mascara(clase) for pc, (op, clase) in enumerate(zip(programa.ops, programa.arg1))
+                if op == CHAR}
+    tipos_siguientes = alfabeto.tipos + [BORDE if alfabeto.con_contexto else OTRO]
+
+    sumidero = ((), OTRO, False, False)
+    claves = {sumidero: 0}
+    estados = [sumidero]
+    transiciones = [[0] * (simbolos + 1)]
+    aceptacion = [0]
+
+    def estado(clave):
+        numero = claves.get(clave)
+        if numero is None:
+            if len(estados) >= MAX_ESTADOS:
+                raise PatronNoSoportado("El autómata del patrón tiene demasiados estados")
+            numero = claves[clave] = len(estados)
+            estados.append(clave)
+        return numero
+
+    tipos_iniciales = (BORDE, SALTO, PALABRA, OTRO) if alfabeto.con_contexto else (OTRO,)
+    if busqueda:
+        iniciales = {(tipo, ignorar): estado(((), tipo, True, ignorar))
+                     for tipo in tipos_iniciales for ignorar in (False, True)}
+    else:
+        iniciales = {tipo: estado(((0,), tipo, False, False)) for tipo in tipos_iniciales}
+
+    actual = 1
+    while actual < len(estados):
+        hilos, antes, inyectar, ignorar = estados[actual]
+        fila = [0] * (simbolos + 1)
+        acepta = 0
+        # El cierre solo depende del tipo del carácter siguiente
+        cierres = {}
+        for simbolo, despues in enumerate(tipos_siguientes):
+            cierre = cierres.get(despues)
+            if cierre is None:
+                cierre = cierres[despues] = _cierre(programa, hilos, inyectar, _CONTEXTOS[(antes, despues)],
+                                                    busqueda, ignorar)
+            activos, coincide = cierre
+            if coincide:
+                acepta |= 1 << simbolo
+            if simbolo == simbolos:
+                continue
+            siguientes = [pc + 1 for pc in activos if mascaras[pc] >> simbolo & 1]
+            sigue_inyectando = inyectar and not coincide
+            if siguientes or sigue_inyectando:
+                if not busqueda:
+                    siguientes.sort()
+                fila[simbolo] = estado((tuple(siguientes), despues, sigue_inyectando, False))
+        transiciones.append(fila)
+        aceptacion.append(acepta)
+        actual += 1
+
+    return transiciones, aceptacion, iniciales
+
+
+def _minimizar(transiciones, aceptacion, iniciales):
+    """Algoritmo de Hopcroft: refina los bloques de estados con la misma aceptación
+    hasta que cada símbolo lleve todo un bloque a un mismo bloque."""
+    n = len(transiciones)
+    simbolos = len(transiciones[0]) - 1
+    inversas = [[[] for _ in range(n)] for _ in range(simbolos)]
+    for q, fila in enumerate(transiciones):
+        for a in range(simbolos):
+            inversas[a][fila[a]].append(q)
+
+    grupos = {}
+    for q, acepta in enumerate(aceptacion):
+        grupos.setdefault(acepta, set()).add(q)
+    bloques = list(grupos.values())
+    bloque_de = [0] * n
+    for b, miembros in enumerate(bloques):
+        for q in miembros:
+            bloque_de[q] = b
+
+    mayor = max(range(len(bloques)), key=lambda b: len(bloques[b]))
+    pendientes = {(b, a) for b in range(len(bloques)) if b != mayor for a in range(simbolos)}
+    while pendientes:
+        b, a = pendientes.pop()
+        # Estados que con el símbolo a llegan al bloque b, agrupados por su bloque
+        tocados = {}
+        for q in bloques[b]:
+            for p in inversas[a][q]:
+                tocados.setdefault(bloque_de[p], set()).add(p)
+        for y, dentro in tocados.items():
+            if len(dentro) == len(bloques[y]):
+                continue
+            fuera = bloques[y] - dentro
+            # El bloque y conserva la parte mayor; la menor pasa a la lista de trabajo
+            if len(dentro) > len(fuera):
+                dentro, fuera = fuera, dentro
+            nuevo = len(bloques)
+            bloques[y] = fuera
+            bloques.append(dentro)
+            for q in dentro:
+                bloque_de[q] = nuevo
+            for c in range(simbolos):
+                pendientes.add((nuevo, c))
+
+    # El bloque del sumidero pasa a ser el estado 0
+    orden = [bloque_de[0]] + [b for b in range(len(bloques)) if b != bloque_de[0]]
+    numero = {b: i for i, b in enumerate(orden)}
+    nuevas, aceptaciones = [], []
+    for b in orden:
+        q = next(iter(bloques[b]))
+        nuevas.append([numero[bloque_de[destino]] for destino in transiciones[q]])
+        aceptaciones.append(aceptacion[q])
+    return TablaDFA(nuevas, aceptaciones, {clave: numero[bloque_de[q]] for clave, q in iniciales.items()}, n)
+
+
+class AutomataRegex:
+    """Patrón compilado a DFA mínimos que se recorren como tablas.
+
+    La búsqueda avanza con un DFA que respeta la prioridad de los hilos y
+    encuentra dónde termina la coincidencia que elegiría re; después retrocede
+    desde ese final con el DFA del patrón invertido para saber dónde empieza.
+    Cada carácter cuesta una consulta a la tabla, sin retroceso.
+    """
+
+    def __init__(self, patron):
+        self.patron = patron
+        arbol = motor_regex.analizar(patron)
+        self.programa = ProgramaRegex(patron, arbol)
+        self.alfabeto = Alfabeto(self.programa)
+        self.busqueda = _minimizar(*_construir(self.programa, self.alfabeto, busqueda=True))
+        inverso = ProgramaRegex(patron, motor_regex.invertir(arbol))
+        self.inverso = _minimizar(*_construir(inverso, self.alfabeto, busqueda=False))
+        self._lenguaje = None
+
+    def lenguaje(self):
+        """DFA mínimo de las cadenas que coinciden desde el inicio, para mostrarlo"""
+        if self._lenguaje is None:
+            self._lenguaje = _minimizar(*_construir(self.programa, self.alfabeto, busqueda=False))
+        return self._lenguaje
+
+    def buscar(self, texto, inicio=0, avanzar=False):
+        """Primera coincidencia (inicio, fin) desde la posición dada, o None, igual que ProgramaRegex.buscar"""
+        alfabeto, tabla = self.alfabeto, self.busqueda
+        transiciones, aceptacion = tabla.transiciones, tabla.aceptacion
+        memo, simbolo = alfabeto.memo, alfabeto.simbolo
+        estado = tabla.iniciales[(alfabeto.tipo_antes(texto, inicio), avanzar)]
+        n = len(texto)
+        fin = None
+        for i in range(inicio, n):
+            a = memo.get(texto[i])
+            if a is None:
+                a = simbolo(texto[i])
+            if aceptacion[estado] >> a & 1:
+                fin = i
+            estado = transiciones[estado][a]
+            if not estado:
+                break
+        else:
+            if aceptacion[estado] >> len(alfabeto) & 1:
+                fin = n
+        if fin is None:
+            return None
+        return self.__inicio(texto, inicio, fin), fin
+
+    def __inicio(self, texto, inicio, fin):
+        # Hacia atrás, el carácter "anterior" es el que sigue a la coincidencia
+        alfabeto, tabla = self.alfabeto, self.inverso
+        transiciones, aceptacion = tabla.transiciones, tabla.aceptacion
+        estado = tabla.iniciales[alfabeto.tipo_despues(texto, fin)]
+        mejor = None
+        for i in range(fin, inicio - 1, -1):
+            a = alfabeto.simbolo(texto[i - 1]) if i > 0 else len(alfabeto)
+            if aceptacion[estado] >> a & 1:
+                mejor = i
+            if i == inicio:
+                break
+            estado = transiciones[estado][a]
+            if not estado:
+                break
+        return mejor
+
+    def finditer(self, texto):
+        """Genera (inicio, fin) de las coincidencias sin solaparse, como re.finditer"""
+        pos, avanzar = 0, False
+        while pos <= len(texto):
+            coincidencia = self.buscar(texto, pos, avanzar)
+            if coincidencia is None:
+                return
+            yield coincidencia
+            inicio, pos = coincidencia
+            avanzar = inicio == pos
+
+
+def compilar(patron):
+    """Autómata del patrón; lanza PatronNoSoportado si la sintaxis o el tamaño no lo permiten"""
+    return _automatas.get_or_create(patron, lambda: AutomataRegex(patron))
+
+
+def _mostrar(codigo):
+    c = chr(codigo)
+    if c == ' ':
+        return '␣'
+    return c if c.isprintable() else repr(c)[1:-1]
+
+
+def _etiqueta(intervalos, maximo=3):
+    partes = [_mostrar(inicio) if fin - inicio == 1 else f"{_mostrar(inicio)}-{_mostrar(fin - 1)}"
+              for inicio, fin in intervalos[:maximo]]
+    if len(intervalos) > maximo:
+        partes.append('…')
+    return ''.join(partes)
+
+
+def etiqueta_simbolo(alfabeto, simbolo):
+    """Texto corto para un símbolo: sus rangos, o los que excluye si es casi todo"""
+    intervalos = alfabeto.intervalos[simbolo]
+    if sum(fin - inicio for inicio, fin in intervalos) > MAX_CODIGO // 2:
+        return f"[^{_etiqueta(_complemento(intervalos))}]"
+    return _etiqueta(intervalos)
+
+
+def describir(patron):
+    """Estados y transiciones del DFA mínimo del patrón, anclado al inicio del texto.
+
+    Se omite el sumidero; un estado es de aceptación si la cadena puede
+    terminar ahí al final del texto.
+    """
+    automata = compilar(patron)
+    alfabeto, tabla = automata.alfabeto, automata.lenguaje()
+    fin_texto = len(alfabeto)
+
+    # Estados numerados en el orden en que se alcanzan desde el inicial
+    inicial = tabla.iniciales[BORDE if alfabeto.con_contexto else OTRO]
+    numero = {inicial: 0}
+    orden = [inicial]
+    for q in orden:
+        for destino in tabla.transiciones[q][:fin_texto]:
+            if destino and destino not in numero:
+                numero[destino] = len(orden)
+                orden.append(destino)
+
+    transiciones = []
+    for q in orden:
+        por_destino = {}
+        for simbolo, destino in enumerate(tabla.transiciones[q][:fin_texto]):
+            if destino:
+                por_destino.setdefault(destino, []).append(etiqueta_simbolo(alfabeto, simbolo))
+        for destino, etiquetas in por_destino.items():
+            transiciones.append((numero[q], numero[destino], ', '.join(etiquetas)))
+
+    return {
+        'patron': patron,
+        'estados': len(orden),
+        'inicial': 0,
+        'aceptacion': [numero[q] for q in orden if tabla.aceptacion[q] >> fin_texto & 1],
+        'transiciones': transiciones,
+        'simbolos': len(alfabeto),
+        'instrucciones_nfa': len(automata.programa.ops),
+        # Sin contar el sumidero
+        'estados_dfa': tabla.estados_originales - 1,
+        'estados_busqueda': len(automata.busqueda.transiciones) - 1
+    }
@@ -0,0 +1,179 @@
+from tree import OP_AND, OP_CONST, OP_IFF, OP_IMPLIES, OP_NOT, OP_OR, OP_VAR
+
+
+class BDD:
+    """Diagramas de decisión binarios reducidos y ordenados (ROBDD).
+
+    Todos los diagramas creados por un mismo BDD comparten la tabla única, así
+    que dos funciones equivalentes tienen exactamente el mismo nodo raíz. Los
+    nodos son enteros: 0 y 1 son las hojas F y V.
+    """
+
+    FALSE = 0
+    TRUE = 1
+
+    def __init__(self, variables):
+        self.variables = list(variables)
+        self.levels = {var: i for i, var in enumerate(self.variables)}
+        # Las hojas están en el nivel n, debajo de todas las variables
+        self.level = [len(self.variables), len(self.variables)]
+        self.low = [0, 1]
+        self.high = [0, 1]
+        self.unique = {}
+        self.ite_cache = {}
+
+    def mk(self, level, low, high):
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.level)
+            self.level.append(level)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = node
+        return node
+
+    def variable(self, name):
+        return self.mk(self.levels[name], self.FALSE, self.TRUE)
+
+    def ite(self, f, g, h):
+        """Si-entonces-sino: (f ∧ g) ∨ (¬f ∧ h), con tabla de resultados calculados."""
+        if f == self.TRUE:
+            return g
+        if f == self.FALSE:
+            return h
+        if g == h:
+            return g
+        if g == self.TRUE and h == self.FALSE:
+            return f
+
+        key = (f, g, h)
+        result = self.ite_cache.get(key)
+        if result is not None:
+            return result
+
+        # La recursión solo baja un nivel de variable por llamada
+        level = min(self.level[f], self.level[g], self.level[h])
+        f0, f1 = self.__cofactors(f, level)
+        g0, g1 = self.__cofactors(g, level)
+        h0, h1 = self.__cofactors(h, level)
+        result = self.mk(level, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self.ite_cache[key] = result
+        return result
+
+    def __cofactors(self, node, level):
+        if self.level[node] != level:
+            return node, node
+        return self.low[node], self.high[node]
+
+    def negate(self, f):
+        return self.ite(f, self.FALSE, self.TRUE)
+
+    def apply(self, opcode, f, g):
+        if opcode == OP_AND:
+            return self.ite(f, g, self.FALSE)
+        if opcode == OP_OR:
+            return self.ite(f, self.TRUE, g)
+        if opcode == OP_IMPLIES:
+            return self.ite(f, g, self.TRUE)
+        if opcode == OP_IFF:
+            return self.ite(f, g, self.negate(g))
+        raise ValueError(f"Operador no soportado: {opcode}")
+
+    def from_compact(self, compact):
+        """Construye el diagrama de un CompactExpressionTree recorriendo sus arreglos."""
+        nodes = []
+        for opcode, left, right, var_id in zip(compact.opcodes, compact.left, compact.right, compact.var_ids):
+            if opcode == OP_VAR:
+                nodes.append(self.variable(compact.variables[var_id]))
+            elif opcode == OP_CONST:
+                nodes.append(self.TRUE if var_id else self.FALSE)
+            elif opcode == OP_NOT:
+                nodes.append(self.negate(nodes[right]))
+            else:
+                nodes.append(self.apply(opcode, nodes[left], nodes[right]))
+        return nodes[compact.root] if compact.root >= 0 else self.FALSE
+
+    def count(self, f):
+        """Número de asignaciones de todas las variables que hacen verdadera a f."""
+        counts = {self.FALSE: 0, self.TRUE: 1}
+        stack = [f]
+        while stack:
+            node = stack[-1]
+            if node in counts:
+                stack.pop()
+                continue
+            low, high = self.low[node], self.high[node]
+            pending = [child for child in (low, high) if child not in counts]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            level = self.level[node]
+            counts[node] = (counts[low] << (self.level[low] - level - 1)) + \
+                           (counts[high] << (self.level[high] - level - 1))
+        return counts[f] << self.level[f]
+
+    def any_sat(self, f):
+        """Devuelve una asignación {variable: bool} que satisface f, o None."""
+        if f == self.FALSE:
+            return None
+        assignment = {var: False for var in self.variables}
+        while f != self.TRUE:
+            var = self.variables[self.level[f]]
+            if self.low[f] != self.FALSE:
+                f = self.low[f]
+            else:
+                assignment[var] = True
+                f = self.high[f]
+        return assignment
+
+    def iter_rows(self, f, offset=0, limit=None):
+        """Genera (valores, resultado) en el orden de itertools.product([False, True], repeat=n).
+
+        Las filas se producen de forma perezosa y los bloques anteriores a offset
+        se saltan sin recorrerlos.
+        """
+        num_vars = len(self.variables)
+        end = 1 << num_vars if limit is None else min(1 << num_vars, offset + limit)
+        if offset >= end:
+            return
+
+        # Cada entrada es (nivel, nodo, prefijo de valores, índice de la primera fila)
+        stack = [(0, f, (), 0)]
+        while stack:
+            level, node, prefix, first_row = stack.pop()
+            if first_row >= end:
+                continue
+            if level == num_vars:
+                yield prefix, node == self.TRUE
+                continue
+
+            half = 1 << (num_vars - level - 1)
+            if self.level[node] == level:
+                low, high = self.low[node], self.high[node]
+            else:
+                low = high = node
+            # El bloque F se procesa antes que el bloque V
+            if first_row + 2 * half > offset:
+                stack.append((level + 1, high, prefix + (True,), first_row + half))
+            if first_row + half > offset:
+                stack.append((level + 1, low, prefix + (False,), first_row))
+
+    def __len__(self):
+        return len(self.level)
+
+
+def equivalent(first, second):
+    """Compara dos CompactExpressionTree construyendo ambos en un mismo BDD.
+
+    Devuelve (equivalentes, asignación donde difieren o None).
+    """
+    manager = BDD(sorted(set(first.variables) | set(second.variables)))
+    f = manager.from_compact(first)
+    g = manager.from_compact(second)
+    if f == g:
+        return True, None
+    return False, manager.any_sat(manager.apply(OP_IFF, f, manager.negate(g)))
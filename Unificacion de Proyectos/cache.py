@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Caché LRU acotada y segura entre hilos, con expiración opcional (TTL)"""
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None, refresh=False):
+        """Valor guardado o default; con refresh, el TTL vuelve a contar desde esta lectura."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                now = time.monotonic()
+                if expires is None or expires > now:
+                    if refresh and expires is not None:
+                        self._data[key] = (value, now + self.ttl)
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_create(self, key, factory):
+        """Devuelve el valor en caché o lo calcula con factory() y lo guarda.
+
+        El cálculo se hace fuera del candado para no bloquear otras consultas.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def __len__(self):
+        return len(self._data)
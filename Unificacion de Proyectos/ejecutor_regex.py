@@ -0,0 +1,245 @@
+import contextlib
+import inspect
+import json
+import mmap
+import multiprocessing
+import os
+import queue
+import re
+import time
+
+import automata_regex
+import motor_regex
+from cache import LRUCache
+
+MOTORES = ('re', 'lineal', 'dfa')
+
+
+class ErrorEjecucion(Exception):
+    """La búsqueda no pudo completarse en un proceso trabajador"""
+
+
+class TiempoAgotado(ErrorEjecucion):
+    """La búsqueda superó el tiempo límite y su proceso se detuvo"""
+
+
+class ServidorOcupado(ErrorEjecucion):
+    """Ningún proceso quedó libre dentro del tiempo de espera"""
+
+
+# Cada proceso trabajador tiene su propia copia de esta caché: no comparte la
+# de compilar_regex del servidor, así que un patrón se compila una vez en cada
+# proceso que lo usa. Se dimensiona con la misma variable que la del servidor.
+_compilados = LRUCache(maxsize=int(os.environ.get('REGEX_CACHE_SIZE', 256)))
+
+# Los saltos de línea de un archivo se cuentan en trozos de este tamaño
+TROZO_BYTES = 1 << 20
+
+
+def compilar(motor, patron, flags=re.MULTILINE):
+    """Patrón compilado para el motor dado; lanza re.error o PatronNoSoportado"""
+    if motor == 'lineal':
+        return motor_regex.compilar(patron)
+    if motor == 'dfa':
+        return automata_regex.compilar(patron)
+    return _compilados.get_or_create((patron, flags), lambda: re.compile(patron, flags))
+
+
+def buscar_coincidencias(texto, patron, motor='re'):
+    """Recorre el texto una sola vez; retorna los textos y las posiciones (inicio, fin) de cada coincidencia"""
+    compilado = compilar(motor, patron)
+    spans = [m.span() for m in compilado.finditer(texto)] if motor == 're' else list(compilado.finditer(texto))
+    return [texto[inicio:fin] for inicio, fin in spans], spans
+
+
+def buscar_lote(texto, patrones, motor='re'):
+    """Aplica varios patrones al mismo texto en una sola llamada; retorna (coincidencias, spans) por patrón"""
+    resultados = {patron: buscar_coincidencias(texto, patron, motor) for patron in dict.fromkeys(patrones)}
+    return [resultados[patron] for patron in patrones]
+
+
+def _contar_saltos(datos, inicio, fin):
+    """Saltos de línea en datos[inicio:fin], por trozos para no copiar el archivo completo"""
+    return sum(datos[pos:min(pos + TROZO_BYTES, fin)].count(b'\n') for pos in range(inicio, fin, TROZO_BYTES))
+
+
+def buscar_en_archivo(ruta, patron, min_lineas=1, tamano_bloque=1000):
+    """Busca un patrón de bytes en un archivo mapeado en memoria; genera bloques NDJSON.
+
+    Cada coincidencia es un registro {linea, inicio, fin, texto} con posiciones
+    en bytes y al final va un resumen. Solo se copian las coincidencias y un
+    trozo del archivo a la vez.
+    """
+    compilado = compilar('re', patron)
+    with open(ruta, 'rb') as archivo:
+        if os.fstat(archivo.fileno()).st_size == 0:
+            mapa = contextlib.nullcontext(b'')  # mmap no admite archivos vacíos
+        else:
+            mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        with mapa as datos:
+            yield from _recorrer(datos, compilado, min_lineas, tamano_bloque)
+
+
+def _recorrer(datos, compilado, min_lineas, tamano_bloque):
+    pos = -1
+    for _ in range(min_lineas - 1):
+        pos = datos.find(b'\n', pos + 1)
+        if pos < 0:
+            raise ValueError(f'El texto debe tener al menos {min_lineas} líneas.')
+
+    # La línea se lleva de forma incremental: solo se cuentan los saltos desde la coincidencia anterior
+    linea, contado, total = 1, 0, 0
+    registros = []
+    for m in compilado.finditer(datos):
+        inicio, fin = m.span()
+        linea += _contar_saltos(datos, contado, inicio)
+        contado = inicio
+        registros.append(json.dumps({'linea': linea, 'inicio': inicio, 'fin': fin,
+                                     'texto': m.group().decode('utf-8', 'replace')}, ensure_ascii=False))
+        total += 1
+        if len(registros) == tamano_bloque:
+            yield '\n'.join(registros) + '\n'
+            registros = []
+    if registros:
+        yield '\n'.join(registros) + '\n'
+
+    lineas = linea + _contar_saltos(datos, contado, len(datos))
+    yield json.dumps({'resumen': {'total_coincidencias': total, 'lineas': lineas, 'bytes': len(datos)}}) + '\n'
+
+
+def _atender(conexion):
+    """Bucle de un proceso trabajador: recibe (función, argumentos) y responde (estado, valor).
+
+    Si la función es un generador, cada elemento se envía como 'parcial' y al
+    terminar se envía 'fin'.
+    """
+    while True:
+        try:
+            funcion, argumentos = conexion.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            resultado = funcion(*argumentos)
+            if inspect.isgenerator(resultado):
+                for parte in resultado:
+                    conexion.send(('parcial', parte))
+                conexion.send(('fin', None))
+            else:
+                conexion.send(('ok', resultado))
+        except Exception as e:
+            conexion.send(('error', e))
+
+
+class _Trabajador:
+    def __init__(self, contexto):
+        self.conexion, extremo = contexto.Pipe()
+        self.proceso = contexto.Process(target=_atender, args=(extremo,), daemon=True)
+        self.proceso.start()
+        extremo.close()
+        # Hay una petición enviada cuya respuesta aún no termina de llegar
+        self.ocupado = False
+
+    def enviar(self, funcion, argumentos):
+        self.ocupado = True
+        self.conexion.send((funcion, argumentos))
+
+    def recibir(self, espera, limite):
+        if not self.conexion.poll(max(espera, 0)):
+            raise TiempoAgotado(f"La búsqueda superó el límite de {limite:g} s")
+        estado, valor = self.conexion.recv()
+        if estado != 'parcial':
+            self.ocupado = False
+        if estado == 'error':
+            raise valor
+        return estado, valor
+
+    def detener(self):
+        self.proceso.kill()
+        self.proceso.join()
+        self.conexion.close()
+
+
+class EjecutorRegex:
+    """Ejecuta búsquedas en procesos aparte con un tiempo límite por petición.
+
+    Cada proceso atiende una búsqueda a la vez; si se pasa del límite se
+    detiene y se reemplaza, así un patrón con retroceso catastrófico solo
+    ocupa un proceso durante tiempo_limite segundos y el servidor sigue
+    atendiendo. Con procesos=0 la búsqueda se hace en el mismo proceso, sin
+    límite de tiempo.
+    """
+
+    def __init__(self, procesos=2, tiempo_limite=2.0, espera_maxima=None):
+        self.procesos = procesos
+        self.tiempo_limite = tiempo_limite
+        self.espera_maxima = espera_maxima if espera_maxima is not None else tiempo_limite
+        # spawn evita heredar candados de los hilos del servidor; los procesos se crean al usarse
+        self._contexto = multiprocessing.get_context('spawn')
+        self._libres = queue.LifoQueue()
+        for _ in range(procesos):
+            self._libres.put(None)
+
+    @contextlib.contextmanager
+    def __prestar(self):
+        try:
+            trabajador = self._libres.get(timeout=self.espera_maxima)
+        except queue.Empty:
+            raise ServidorOcupado("Todos los procesos de búsqueda están ocupados") from None
+
+        try:
+            if trabajador is None:
+                trabajador = _Trabajador(self._contexto)
+            yield trabajador
+        except (EOFError, OSError) as e:
+            raise ErrorEjecucion("El proceso de búsqueda terminó inesperadamente") from e
+        finally:
+            # Si quedó a medias (tiempo agotado, proceso caído o flujo abandonado) se reemplaza en el siguiente uso
+            if trabajador is not None and trabajador.ocupado:
+                trabajador.detener()
+                trabajador = None
+            self._libres.put(trabajador)
+
+    def ejecutar(self, funcion, *argumentos):
+        if not self.procesos:
+            return funcion(*argumentos)
+        with self.__prestar() as trabajador:
+            trabajador.enviar(funcion, argumentos)
+            return trabajador.recibir(self.tiempo_limite, self.tiempo_limite)[1]
+
+    def iterar(self, funcion, *argumentos, tiempo_limite=None):
+        """Como ejecutar, para funciones generadoras: produce sus elementos a medida que llegan.
+
+        tiempo_limite cubre la espera por el proceso en todo el recorrido; el
+        tiempo que el consumidor tarda entre elementos no cuenta. Si el
+        consumidor lo abandona a medias, el proceso se detiene.
+        """
+        if not self.procesos:
+            yield from funcion(*argumentos)
+            return
+        limite = tiempo_limite if tiempo_limite is not None else self.tiempo_limite
+        with self.__prestar() as trabajador:
+            trabajador.enviar(funcion, argumentos)
+            restante = limite
+            while True:
+                inicio = time.monotonic()
+                estado, valor = trabajador.recibir(restante, limite)
+                restante -= time.monotonic() - inicio
+                if estado != 'parcial':
+                    return
+                yield valor
+
+    def buscar(self, texto, patron, motor='re'):
+        return self.ejecutar(buscar_coincidencias, texto, patron, motor)
+
+    def buscar_lote(self, texto, patrones, motor='re'):
+        # El texto viaja una sola vez al proceso y el tiempo límite cubre todo el lote
+        return self.ejecutar(buscar_lote, texto, patrones, motor)
+
+    def cerrar(self):
+        while True:
+            try:
+                trabajador = self._libres.get_nowait()
+            except queue.Empty:
+                return
+            if trabajador is not None:
+                trabajador.detener()
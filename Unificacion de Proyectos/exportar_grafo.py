@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+import math
+from xml.sax.saxutils import escape, quoteattr
+
+# Líneas por bloque enviado al cliente
+LINEAS_POR_BLOQUE = 1000
+
+# Dibujo SVG: ancho del lienzo y margen en píxeles
+ANCHO_SVG = 1000
+MARGEN_SVG = 40
+
+
+def _numero(valor):
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+def _en_bloques(lineas):
+    """Agrupa líneas en bloques de texto para no escribir la respuesta línea por línea"""
+    bloque = []
+    for linea in lineas:
+        bloque.append(linea)
+        if len(bloque) == LINEAS_POR_BLOQUE:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+def exportar_csv(compacto):
+    """Lista de aristas origen,destino,peso; /importar_grafo la lee tal cual"""
+    def lineas():
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, lineterminator='\n')
+        yield 'origen,destino,peso\n'
+        for origen, destino, peso in compacto.iter_aristas():
+            escritor.writerow((origen, destino, _numero(peso)))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    return _en_bloques(lineas())
+
+
+def exportar_json(compacto, coordenadas=None):
+    """{dirigido, nodos, aristas: [[origen, destino, peso]], coordenadas}; /importar_grafo lo carga completo"""
+    def lineas():
+        yield '{"dirigido": %s,\n "nodos": %s,\n' % (json.dumps(compacto.dirigido),
+                                                      json.dumps(compacto.nombres, ensure_ascii=False))
+        if coordenadas:
+            yield ' "coordenadas": %s,\n' % json.dumps(coordenadas, ensure_ascii=False)
+        yield ' "aristas": ['
+        separador = '\n  '
+        for arista in compacto.iter_aristas():
+            yield separador + json.dumps(arista, ensure_ascii=False)
+            separador = ',\n  '
+        yield '\n ]\n}\n'
+    return _en_bloques(lineas())
+
+
+def exportar_graphml(compacto, coordenadas=None):
+    """GraphML con el peso como dato de cada arista y x, y en los nodos que tienen coordenadas"""
+    def lineas():
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        yield '  <key id="peso" for="edge" attr.name="peso" attr.type="double"/>\n'
+        if coordenadas:
+            yield '  <key id="x" for="node" attr.name="x" attr.type="double"/>\n'
+            yield '  <key id="y" for="node" attr.name="y" attr.type="double"/>\n'
+        yield '  <graph id="G" edgedefault="%s">\n' % ('directed' if compacto.dirigido else 'undirected')
+        for nombre in compacto.nombres:
+            if coordenadas and nombre in coordenadas:
+                x, y = coordenadas[nombre]
+                yield (f'    <node id={quoteattr(nombre)}><data key="x">{_numero(x)}</data>'
+                       f'<data key="y">{_numero(y)}</data></node>\n')
+            else:
+                yield f'    <node id={quoteattr(nombre)}/>\n'
+        for origen, destino, peso in compacto.iter_aristas():
+            yield (f'    <edge source={quoteattr(origen)} target={quoteattr(destino)}>'
+                   f'<data key="peso">{_numero(peso)}</data></edge>\n')
+        yield '  </graph>\n</graphml>\n'
+    return _en_bloques(lineas())
+
+
+def posiciones_en_circulo(nombres):
+    """Posiciones de respaldo cuando no hay un layout calculado: los nodos en una circunferencia"""
+    n = max(len(nombres), 1)
+    return {nombre: (math.cos(2 * math.pi * i / n), math.sin(2 * math.pi * i / n))
+            for i, nombre in enumerate(nombres)}
+
+
+def exportar_svg(compacto, posiciones, colores, detalle=True):
+    """Dibujo vectorial con las posiciones dadas ({nodo: (x, y)}), sin pasar por matplotlib.
+
+    Con detalle se escriben los nombres dentro de los nodos y los pesos de las
+    aristas; sin él los nodos son puntos con el nombre como título emergente.
+    """
+    xs = [posiciones[nombre][0] for nombre in compacto.nombres] or [0.0]
+    ys = [posiciones[nombre][1] for nombre in compacto.nombres] or [0.0]
+    minimo_x, minimo_y = min(xs), min(ys)
+    ancho_datos, alto_datos = (max(xs) - minimo_x) or 1.0, (max(ys) - minimo_y) or 1.0
+    escala = (ANCHO_SVG - 2 * MARGEN_SVG) / max(ancho_datos, alto_datos)
+    alto = round(alto_datos * escala + 2 * MARGEN_SVG)
+    radio = 18 if detalle else 3
+
+    def punto(nombre):
+        x, y = posiciones[nombre]
+        # En SVG el eje y crece hacia abajo
+        return MARGEN_SVG + (x - minimo_x) * escala, alto - MARGEN_SVG - (y - minimo_y) * escala
+
+    def lineas():
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield (f'<svg xmlns="http://www.w3.org/2000/svg" width="{ANCHO_SVG}" height="{alto}" '
+               f'viewBox="0 0 {ANCHO_SVG} {alto}" font-family="sans-serif">\n')
+        yield f'<rect width="100%" height="100%" fill="{colores["fondo"]}"/>\n'
+        if compacto.dirigido:
+            yield ('<defs><marker id="flecha" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" '
+                   f'markerHeight="8" orient="auto"><path d="M0,0 L10,5 L0,10 z" fill="{colores["arista_normal"]}"/>'
+                   '</marker></defs>\n')
+        flecha = ' marker-end="url(#flecha)"' if compacto.dirigido else ''
+
+        yield f'<g stroke="{colores["arista_normal"]}" stroke-width="1.5">\n'
+        for origen, destino, peso in compacto.iter_aristas():
+            (x1, y1), (x2, y2) = punto(origen), punto(destino)
+            # La línea termina en el borde del círculo para que la flecha quede visible
+            largo = math.hypot(x2 - x1, y2 - y1) or 1.0
+            x2, y2 = x2 - (x2 - x1) * radio / largo, y2 - (y2 - y1) * radio / largo
+            yield f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}"{flecha}/>\n'
+            if detalle:
+                yield (f'<text x="{(x1 + x2) / 2:.1f}" y="{(y1 + y2) / 2:.1f}" stroke="none" fill="#2c3e50" '
+                       f'font-size="11" text-anchor="middle">{_numero(peso)}</text>\n')
+        yield '</g>\n'
+
+        yield f'<g fill="{colores["nodo_normal"]}">\n'
+        for nombre in compacto.nombres:
+            x, y = punto(nombre)
+            if detalle:
+                yield (f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{radio}"/>'
+                       f'<text x="{x:.1f}" y="{y + 4:.1f}" fill="white" font-size="12" font-weight="bold" '
+                       f'text-anchor="middle">{escape(nombre)}</text>\n')
+            else:
+                yield f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{radio}"><title>{escape(nombre)}</title></circle>\n'
+        yield '</g>\n</svg>\n'
+    return _en_bloques(lineas())
@@ -0,0 +1,269 @@
+import heapq
+import math
+from array import array
+
+INFINITO = float('inf')
+
+
+class GrafoCompacto:
+    """Forma compilada e inmutable de un grafo, en formato CSR.
+
+    Los nodos son enteros 0..n-1 (nombres[i] es el nombre del nodo i) y las
+    aristas que salen de u ocupan las posiciones desplazamientos[u] a
+    desplazamientos[u + 1] de destinos y pesos. Son tres arreglos planos en
+    lugar de una lista de tuplas por nodo, y los algoritmos trabajan con
+    índices enteros en vez de claves de texto.
+    """
+
+    def __init__(self, nombres, desplazamientos, destinos, pesos, dirigido=False):
+        self.nombres = nombres
+        self.indice = {nombre: i for i, nombre in enumerate(nombres)}
+        self.desplazamientos = desplazamientos
+        self.destinos = destinos
+        self.pesos = pesos
+        self.dirigido = dirigido
+        self._invertido = None
+
+    @classmethod
+    def desde_adyacencia(cls, adyacencia, nodos=(), dirigido=False):
+        """Compila un diccionario {origen: [(destino, peso)]} conservando el orden de las listas"""
+        nombres = list(adyacencia)
+        vistos = set(nombres)
+        nombres.extend(nodo for nodo in nodos if nodo not in vistos)
+        indice = {nombre: i for i, nombre in enumerate(nombres)}
+
+        desplazamientos = array('q', [0])
+        destinos = array('q')
+        pesos = array('d')
+        for nombre in nombres:
+            for destino, peso in adyacencia.get(nombre, ()):
+                destinos.append(indice[destino])
+                pesos.append(peso)
+            desplazamientos.append(len(destinos))
+        return cls(nombres, desplazamientos, destinos, pesos, dirigido)
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def num_entradas(self):
+        return len(self.destinos)
+
+    def vecinos(self, u):
+        """Pares (destino, peso) de las aristas que salen del nodo u"""
+        inicio, fin = self.desplazamientos[u], self.desplazamientos[u + 1]
+        return zip(self.destinos[inicio:fin], self.pesos[inicio:fin])
+
+    def invertido(self):
+        """Mismo grafo con las aristas al revés (para buscar hacia atrás); en no dirigidos es el mismo"""
+        if not self.dirigido:
+            return self
+        if self._invertido is None:
+            n = len(self.nombres)
+            desplazamientos = array('q', [0]) * (n + 1)
+            for v in self.destinos:
+                desplazamientos[v + 1] += 1
+            for u in range(n):
+                desplazamientos[u + 1] += desplazamientos[u]
+            libre = desplazamientos[:-1]
+            destinos = array('q', [0]) * len(self.destinos)
+            pesos = array('d', [0.0]) * len(self.pesos)
+            for u in range(n):
+                for v, peso in self.vecinos(u):
+                    destinos[libre[v]] = u
+                    pesos[libre[v]] = peso
+                    libre[v] += 1
+            self._invertido = GrafoCompacto(self.nombres, desplazamientos, destinos, pesos, dirigido=True)
+            self._invertido.indice = self.indice
+            self._invertido._invertido = self
+        return self._invertido
+
+    def aristas(self):
+        """Aristas (origen, destino, peso) con nombres; en no dirigidos cada par aparece una vez"""
+        return list(self.iter_aristas())
+
+    def iter_aristas(self):
+        """Como aristas, pero generadas de a una para recorrer grafos grandes sin armar la lista"""
+        visitadas = set()
+        nombres = self.nombres
+        for u in range(len(nombres)):
+            for v, peso in self.vecinos(u):
+                if self.dirigido:
+                    yield nombres[u], nombres[v], peso
+                elif (u, v) not in visitadas and (v, u) not in visitadas:
+                    yield nombres[u], nombres[v], peso
+                    visitadas.add((u, v))
+
+    def dijkstra(self, origen):
+        """Árbol de caminos más cortos desde el índice origen: (distancias, previos) como listas.
+
+        distancias[v] es INFINITO y previos[v] es -1 para los nodos no alcanzables.
+        """
+        distancias = [INFINITO] * len(self.nombres)
+        previos = array('q', [-1]) * len(self.nombres)
+        desplazamientos, destinos, pesos = self.desplazamientos, self.destinos, self.pesos
+        distancias[origen] = 0.0
+        cola = [(0, origen)]
+
+        while cola:
+            distancia_actual, u = heapq.heappop(cola)
+            # Entrada vieja: el nodo ya salió de la cola con una distancia menor
+            if distancia_actual > distancias[u]:
+                continue
+            for k in range(desplazamientos[u], desplazamientos[u + 1]):
+                v = destinos[k]
+                nueva_distancia = distancia_actual + pesos[k]
+                if nueva_distancia < distancias[v]:
+                    distancias[v] = nueva_distancia
+                    previos[v] = u
+                    heapq.heappush(cola, (nueva_distancia, v))
+        return distancias, previos
+
+    def floyd_warshall(self):
+        """Matriz de distancias entre todos los pares, con filas en el orden de nombres"""
+        n = len(self.nombres)
+        d = [[INFINITO] * n for _ in range(n)]
+        for u in range(n):
+            fila = d[u]
+            fila[u] = 0.0
+            for v, peso in self.vecinos(u):
+                if peso < fila[v]:
+                    fila[v] = peso
+
+        for k in range(n):
+            fila_k = d[k]
+            for i in range(n):
+                fila_i = d[i]
+                d_ik = fila_i[k]
+                if d_ik == INFINITO:
+                    continue
+                # La fila se reconstruye de una vez, más rápido que asignar celda por celda
+                d[i] = [a if a <= d_ik + b else d_ik + b for a, b in zip(fila_i, fila_k)]
+        return d
+
+    def dijkstra_bidireccional(self, origen, destino):
+        """Ruta más corta entre dos índices buscando a la vez desde el origen y hacia el destino.
+
+        Cada búsqueda avanza por el lado con menor distancia en su cola y se
+        detiene cuando la suma de ambas cotas supera la mejor ruta ya unida.
+        Devuelve (distancia, ruta en índices, nodos asentados).
+        """
+        if origen == destino:
+            return 0.0, [origen], 1
+        grafos = (self, self.invertido())
+        distancias = ({origen: 0.0}, {destino: 0.0})
+        previos = ({origen: -1}, {destino: -1})
+        colas = ([(0.0, origen)], [(0.0, destino)])
+        asentados = (set(), set())
+        mejor, encuentro = INFINITO, -1
+
+        while colas[0] and colas[1] and colas[0][0][0] + colas[1][0][0] < mejor:
+            lado = 0 if colas[0][0][0] <= colas[1][0][0] else 1
+            distancia_actual, u = heapq.heappop(colas[lado])
+            if u in asentados[lado]:
+                continue
+            asentados[lado].add(u)
+            propias, otras = distancias[lado], distancias[1 - lado]
+            for v, peso in grafos[lado].vecinos(u):
+                nueva_distancia = distancia_actual + peso
+                if nueva_distancia < propias.get(v, INFINITO):
+                    propias[v] = nueva_distancia
+                    previos[lado][v] = u
+                    heapq.heappush(colas[lado], (nueva_distancia, v))
+                    if v in otras and nueva_distancia + otras[v] < mejor:
+                        mejor, encuentro = nueva_distancia + otras[v], v
+
+        total = len(asentados[0]) + len(asentados[1])
+        if encuentro < 0:
+            return INFINITO, [], total
+        # Del origen al punto de encuentro y de ahí al destino, siguiendo los previos de la búsqueda inversa
+        ruta = _ruta(previos[0], encuentro)
+        nodo = previos[1][encuentro]
+        while nodo >= 0:
+            ruta.append(nodo)
+            nodo = previos[1][nodo]
+        return mejor, ruta, total
+
+    def a_estrella(self, origen, destino, heuristica):
+        """A* entre dos índices; heuristica(v) es una cota inferior consistente de la distancia de v al destino.
+
+        Una heurística infinita descarta el nodo. Devuelve (distancia, ruta en
+        índices, nodos asentados).
+        """
+        distancias = {origen: 0.0}
+        previos = {origen: -1}
+        cola = [(heuristica(origen), 0.0, origen)]
+        asentados = set()
+
+        while cola:
+            _, distancia_actual, u = heapq.heappop(cola)
+            if u in asentados:
+                continue
+            asentados.add(u)
+            if u == destino:
+                return distancia_actual, _ruta(previos, destino), len(asentados)
+            for v, peso in self.vecinos(u):
+                nueva_distancia = distancia_actual + peso
+                if nueva_distancia < distancias.get(v, INFINITO):
+                    cota = heuristica(v)
+                    if cota == INFINITO:
+                        continue
+                    distancias[v] = nueva_distancia
+                    previos[v] = u
+                    heapq.heappush(cola, (nueva_distancia + cota, nueva_distancia, v))
+        return INFINITO, [], len(asentados)
+
+    def calcular_hitos(self, cantidad=8):
+        """Hitos para la heurística ALT: [(distancias desde el hito, distancias hacia el hito)].
+
+        El primero es el nodo 0 y cada siguiente es el más lejano a los ya
+        elegidos; los nodos de otras componentes cuentan como los más lejanos,
+        así cada componente recibe su hito.
+        """
+        n = len(self.nombres)
+        inverso = self.invertido()
+        hitos = []
+        cercania = [INFINITO] * n
+        actual = 0
+        for _ in range(min(cantidad, n)):
+            desde = self.dijkstra(actual)[0]
+            hacia = inverso.dijkstra(actual)[0] if self.dirigido else desde
+            hitos.append((desde, hacia))
+            cercania = [min(a, b) for a, b in zip(cercania, desde)]
+            actual = max(range(n), key=cercania.__getitem__)
+            if cercania[actual] == 0:
+                break
+        return hitos
+
+
+def _ruta(previos, destino):
+    ruta = []
+    nodo = destino
+    while nodo >= 0:
+        ruta.append(nodo)
+        nodo = previos[nodo]
+    ruta.reverse()
+    return ruta
+
+
+def heuristica_alt(hitos, destino):
+    """Cota por desigualdad triangular con los hitos: d(v, t) >= d(L, t) - d(L, v) y d(v, t) >= d(v, L) - d(t, L)"""
+    terminos = [(desde, hacia, desde[destino], hacia[destino]) for desde, hacia in hitos]
+
+    def cota(v):
+        mejor = 0.0
+        for desde, hacia, desde_t, hacia_t in terminos:
+            if desde_t != INFINITO and desde[v] != INFINITO:
+                mejor = max(mejor, desde_t - desde[v])
+            if hacia_t != INFINITO:
+                # Si v no llega al hito pero el destino sí, v tampoco llega al destino
+                if hacia[v] == INFINITO:
+                    return INFINITO
+                mejor = max(mejor, hacia[v] - hacia_t)
+        return mejor
+    return cota
+
+
+def heuristica_euclidiana(coordenadas, destino):
+    """Distancia en línea recta al destino; coordenadas es una lista (x, y) por índice"""
+    objetivo = coordenadas[destino]
+    return lambda v: math.dist(coordenadas[v], objetivo)
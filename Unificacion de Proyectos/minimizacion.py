@@ -0,0 +1,197 @@
+from itertools import combinations
+
+from cache import LRUCache
+from tree import variable_columns
+
+# Hasta este número de variables se usa Quine–McCluskey; por encima, el heurístico
+MAX_VARIABLES_QM = 12
+
+# Búsqueda exacta de la cobertura solo si quedan pocos primos candidatos
+MAX_PRIMOS_EXACTO = 12
+
+# Los implicantes primos dependen solo de (número de variables, mintérminos)
+_cache_primos = LRUCache(maxsize=128)
+
+
+# Un implicante (o cubo) es un par (valor, máscara): los bits en 1 de la máscara
+# son variables eliminadas. El bit n-1-j corresponde a la variable j, igual que
+# en el índice de fila de la tabla de verdad.
+
+def contar_literales(num_vars, implicante):
+    return num_vars - implicante[1].bit_count()
+
+
+def implicantes_primos(num_vars, conjunto):
+    """Implicantes primos por combinación sucesiva de Quine–McCluskey.
+
+    conjunto es la columna de bits con las filas verdaderas de la función.
+    """
+    clave = (num_vars, conjunto)
+    primos = _cache_primos.get(clave)
+    if primos is not None:
+        return primos
+
+    # Agrupados por máscara: solo se combinan implicantes con la misma máscara
+    actuales = {0: {i for i in range(1 << num_vars) if conjunto >> i & 1}}
+    primos = []
+    while actuales:
+        siguientes = {}
+        for mascara, valores in actuales.items():
+            usados = set()
+            for valor in valores:
+                for bit in range(num_vars):
+                    bit = 1 << bit
+                    if mascara & bit or valor & bit:
+                        continue
+                    if valor | bit in valores:
+                        siguientes.setdefault(mascara | bit, set()).add(valor)
+                        usados.add(valor)
+                        usados.add(valor | bit)
+            primos.extend((valor, mascara) for valor in valores - usados)
+        actuales = siguientes
+
+    _cache_primos.put(clave, primos)
+    return primos
+
+
+def cobertura_minima(num_vars, conjunto, primos):
+    """Elige primos que cubran todas las filas de conjunto.
+
+    Devuelve (esenciales, cobertura). Tras los esenciales, el resto se resuelve
+    de forma exacta si quedan pocos candidatos y, si no, de forma voraz. Cada
+    primo se representa por la columna de bits de las filas que cubre.
+    """
+    columnas = variable_columns(num_vars)
+    total = (1 << (1 << num_vars)) - 1
+    bits = {primo: bits_cubo(primo, columnas, total) for primo in primos}
+
+    # Filas cubiertas por un único primo
+    una, varias = 0, 0
+    for b in bits.values():
+        varias |= una & b
+        una |= b
+    unicas = una & ~varias
+
+    esenciales = [primo for primo in primos if bits[primo] & unicas]
+    pendientes = conjunto
+    for primo in esenciales:
+        pendientes &= ~bits[primo]
+    if not pendientes:
+        return esenciales, esenciales
+    candidatos = [primo for primo in primos if bits[primo] & pendientes and primo not in esenciales]
+
+    if len(candidatos) <= MAX_PRIMOS_EXACTO:
+        for tamano in range(1, len(candidatos) + 1):
+            mejor = None
+            for combo in combinations(candidatos, tamano):
+                union = 0
+                for primo in combo:
+                    union |= bits[primo]
+                if pendientes & ~union:
+                    continue
+                costo = sum(contar_literales(num_vars, primo) for primo in combo)
+                if mejor is None or costo < mejor[0]:
+                    mejor = (costo, combo)
+            if mejor is not None:
+                return esenciales, esenciales + list(mejor[1])
+
+    seleccion = []
+    while pendientes:
+        mejor = max(candidatos, key=lambda p: ((bits[p] & pendientes).bit_count(),
+                                               -contar_literales(num_vars, p)))
+        seleccion.append(mejor)
+        pendientes &= ~bits[mejor]
+    return esenciales, esenciales + seleccion
+
+
+def bits_cubo(cubo, columnas, total):
+    """Columna de bits con las filas que pertenecen al cubo."""
+    valor, mascara = cubo
+    num_vars = len(columnas)
+    bits = total
+    for j, columna in enumerate(columnas):
+        bit = 1 << (num_vars - 1 - j)
+        if not mascara & bit:
+            bits &= columna if valor & bit else ~columna
+    return bits
+
+
+def minimizar_heuristico(num_vars, conjunto):
+    """Minimización al estilo Espresso sobre columnas de bits.
+
+    Toma la primera fila aún sin cubrir, la expande eliminando literales
+    mientras el cubo no toque filas fuera del conjunto (el resultado es un
+    implicante primo) y repite hasta cubrirlo todo; después descarta los
+    cubos redundantes. Devuelve (expandidos, cobertura).
+    """
+    total = (1 << (1 << num_vars)) - 1
+    fuera = ~conjunto & total
+
+    expandidos, bits = [], []
+    pendientes = conjunto
+    while pendientes:
+        valor = (pendientes & -pendientes).bit_length() - 1
+        mascara, cubo = 0, 1 << valor
+        for j in range(num_vars):
+            bit = 1 << j
+            # Quitar el literal añade las filas con ese bit invertido: un desplazamiento
+            ampliado = cubo | (cubo >> bit if valor & bit else cubo << bit)
+            if not ampliado & fuera:
+                valor, mascara, cubo = valor & ~bit, mascara | bit, ampliado
+        expandidos.append((valor, mascara))
+        bits.append(cubo)
+        pendientes &= ~cubo
+
+    # Irredundante: los cubos más pequeños se eliminan primero si los demás los cubren
+    orden = sorted(range(len(expandidos)), key=lambda i: expandidos[i][1].bit_count(), reverse=True)
+    # previos[k] es la unión de los cubos anteriores a k, que aún no se han revisado
+    previos = [0]
+    for i in orden:
+        previos.append(previos[-1] | bits[i])
+    conservados, posteriores = [], 0
+    for k in range(len(orden) - 1, -1, -1):
+        i = orden[k]
+        if bits[i] & ~(previos[k] | posteriores):
+            conservados.append(expandidos[i])
+            posteriores |= bits[i]
+    return expandidos, conservados[::-1]
+
+
+def formatear_termino(variables, cubo):
+    valor, mascara = cubo
+    num_vars = len(variables)
+    literales = []
+    for j, variable in enumerate(variables):
+        bit = 1 << (num_vars - 1 - j)
+        if not mascara & bit:
+            literales.append(variable if valor & bit else f"~{variable}")
+    return ' & '.join(literales) if literales else '1'
+
+
+def formatear_suma(variables, cubos):
+    """Suma de productos: A & ~B | C"""
+    if not cubos:
+        return '0'
+    terminos = [formatear_termino(variables, cubo) for cubo in cubos]
+    if '1' in terminos:
+        return '1'
+    return ' | '.join(terminos)
+
+
+def formatear_producto(variables, cubos):
+    """Producto de sumas a partir de cubos del complemento: (~A | B) & C"""
+    if not cubos:
+        return '1'
+    num_vars = len(variables)
+    clausulas = []
+    for valor, mascara in cubos:
+        literales = []
+        for j, variable in enumerate(variables):
+            bit = 1 << (num_vars - 1 - j)
+            if not mascara & bit:
+                # Por De Morgan, cada literal del cubo del complemento se niega
+                literales.append(f"~{variable}" if valor & bit else variable)
+        if not literales:
+            return '0'
+        clausulas.append(literales[0] if len(literales) == 1 else f"({' | '.join(literales)})")
+    return ' & '.join(clausulas)
@@ -0,0 +1,499 @@
+from functools import partial
+
+from cache import LRUCache
+
+
+class PatronNoSoportado(ValueError):
+    """El patrón usa sintaxis fuera del subconjunto del motor lineal"""
+
+
+# Instrucciones del programa (máquina de Pike sobre un NFA de Thompson).
+# Las repeticiones cuyo cuerpo puede ser vacío marcan su inicio con INICIO y
+# terminan en CICLO (sin límite) o FIN (copias acotadas): como en re, tras una
+# iteración opcional vacía ya no se repite y se sigue por la salida
+CHAR, SPLIT, JMP, ASSERT, MATCH, INICIO, CICLO, CICLO_PEREZOSO, FIN = range(9)
+
+# Límite de instrucciones: las repeticiones {n,m} copian su cuerpo
+MAX_INSTRUCCIONES = 20000
+MAX_ANIDAMIENTO = 200
+
+_programas = LRUCache(maxsize=128)
+
+
+def es_palabra(c):
+    return c.isalnum() or c == '_'
+
+
+class ClaseCaracteres:
+    """Conjunto de caracteres dado por rangos y predicados (\\d, \\w, \\s), opcionalmente negado.
+
+    Cada predicado es un par (función, negado): [\\D] guarda (str.isdecimal, True).
+    """
+
+    __slots__ = ('rangos', 'predicados', 'negada', '_memo')
+
+    def __init__(self, rangos=(), predicados=(), negada=False):
+        self.rangos = tuple(rangos)
+        self.predicados = tuple(predicados)
+        self.negada = negada
+        self._memo = {}
+
+    def __contains__(self, c):
+        resultado = self._memo.get(c)
+        if resultado is None:
+            resultado = (any(lo <= c <= hi for lo, hi in self.rangos) or
+                         any(predicado(c) != negado for predicado, negado in self.predicados)) != self.negada
+            self._memo[c] = resultado
+        return resultado
+
+
+_CLASES = {
+    'd': ((), ((str.isdecimal, False),), False),
+    'D': ((), ((str.isdecimal, False),), True),
+    'w': ((), ((es_palabra, False),), False),
+    'W': ((), ((es_palabra, False),), True),
+    's': ((), ((str.isspace, False),), False),
+    'S': ((), ((str.isspace, False),), True),
+}
+_ASERCIONES = {'b': 'limite', 'B': 'no_limite', 'A': 'inicio', 'Z': 'fin'}
+_CONTROL = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v', 'a': '\a'}
+_OCTALES = '01234567'
+
+
+class _Analizador:
+    """Analizador descendente del subconjunto soportado; produce un árbol de tuplas"""
+
+    def __init__(self, patron):
+        self.patron = patron
+        self.pos = 0
+        self.profundidad = 0
+
+    def analizar(self):
+        nodo = self.alternativa()
+        if self.pos < len(self.patron):
+            raise PatronNoSoportado(f"Carácter inesperado en la posición {self.pos}: '{self.patron[self.pos]}'")
+        return nodo
+
+    def siguiente(self, desplazamiento=0):
+        pos = self.pos + desplazamiento
+        return self.patron[pos] if pos < len(self.patron) else None
+
+    def alternativa(self):
+        ramas = [self.secuencia()]
+        while self.siguiente() == '|':
+            self.pos += 1
+            ramas.append(self.secuencia())
+        return ramas[0] if len(ramas) == 1 else ('alt', ramas)
+
+    def secuencia(self):
+        elementos = []
+        while self.siguiente() not in (None, '|', ')'):
+            elementos.append(self.cuantificador(self.atomo()))
+        if not elementos:
+            return ('vacio',)
+        return elementos[0] if len(elementos) == 1 else ('cat', elementos)
+
+    def atomo(self):
+        c = self.siguiente()
+        self.pos += 1
+        if c == '(':
+            return self.grupo()
+        if c == '[':
+            return ('char', self.clase())
+        if c == '.':
+            return ('char', ClaseCaracteres(rangos=[('\n', '\n')], negada=True))
+        if c == '^':
+            return ('assert', 'bol')
+        if c == '$':
+            return ('assert', 'eol')
+        if c == '\\':
+            return self.escape(en_clase=False)
+        if c in '*+?':
+            raise PatronNoSoportado(f"Nada que repetir en la posición {self.pos - 1}")
+        return ('char', ClaseCaracteres(rangos=[(c, c)]))
+
+    def grupo(self):
+        if self.siguiente() == '?':
+            if self.siguiente(1) == ':':
+                self.pos += 2
+            elif self.siguiente(1) == 'P' and self.siguiente(2) == '<':
+                fin = self.patron.find('>', self.pos)
+                if fin < 0:
+                    raise PatronNoSoportado("Nombre de grupo sin cerrar")
+                self.pos = fin + 1
+            else:
+                raise PatronNoSoportado("Las aserciones, referencias y opciones (?...) no están soportadas")
+
+        self.profundidad += 1
+        if self.profundidad > MAX_ANIDAMIENTO:
+            raise PatronNoSoportado("Demasiados grupos anidados")
+        nodo = self.alternativa()
+        self.profundidad -= 1
+        if self.siguiente() != ')':
+            raise PatronNoSoportado("Paréntesis sin cerrar")
+        self.pos += 1
+        return nodo
+
+    def cuantificador(self, nodo):
+        c = self.siguiente()
+        if c is None or c not in '*+?{':
+            return nodo
+
+        if c == '{':
+            limites = self.llaves()
+            if limites is None:
+                return nodo  # Se interpreta como un '{' literal en el siguiente átomo
+            minimo, maximo = limites
+        else:
+            self.pos += 1
+            minimo, maximo = {'*': (0, None), '+': (1, None), '?': (0, 1)}[c]
+
+        codicioso = True
+        if self.siguiente() == '?':
+            self.pos += 1
+            codicioso = False
+        elif self.siguiente() == '+':
+            raise PatronNoSoportado("Los cuantificadores posesivos no están soportados")
+        if nodo[0] == 'assert':
+            raise PatronNoSoportado("No se puede repetir una aserción")
+        return ('rep', nodo, minimo, maximo, codicioso)
+
+    def llaves(self):
+        """Lee {n}, {n,}, {,m} o {n,m} como en el módulo re; None si no es un cuantificador"""
+        inicio = self.pos
+        self.pos += 1
+        if self.siguiente() == '}':
+            self.pos = inicio
+            return None
+        bajo = alto = ''
+        while self.siguiente() is not None and self.siguiente().isdigit():
+            bajo += self.siguiente()
+            self.pos += 1
+        if self.siguiente() == ',':
+            self.pos += 1
+            while self.siguiente() is not None and self.siguiente().isdigit():
+                alto += self.siguiente()
+                self.pos += 1
+        else:
+            alto = bajo
+        if self.siguiente() != '}':
+            self.pos = inicio
+            return None
+        self.pos += 1
+        minimo = int(bajo) if bajo else 0
+        maximo = int(alto) if alto else None
+        return minimo, maximo
+
+    def escape(self, en_clase):
+        c = self.siguiente()
+        if c is None:
+            raise PatronNoSoportado("Escape incompleto al final del patrón")
+        self.pos += 1
+
+        if c in _CLASES:
+            rangos, predicados, negada = _CLASES[c]
+            clase = ClaseCaracteres(rangos, predicados, negada)
+            return clase if en_clase else ('char', clase)
+        if c == 'b' and en_clase:
+            return '\b'
+        if c in _ASERCIONES:
+            if en_clase:
+                raise PatronNoSoportado(f"Escape \\{c} no válido dentro de una clase")
+            return ('assert', _ASERCIONES[c])
+
+        if c in _CONTROL:
+            literal = _CONTROL[c]
+        elif c in 'xuU':
+            digitos = {'x': 2, 'u': 4, 'U': 8}[c]
+            codigo = self.patron[self.pos:self.pos + digitos]
+            self.pos += digitos
+            literal = chr(int(codigo, 16))
+        elif c == '0' or (c in _OCTALES and self.__octal(0) and self.__octal(1)):
+            codigo = c
+            while len(codigo) < 3 and self.siguiente() is not None and self.siguiente() in _OCTALES:
+                codigo += self.siguiente()
+                self.pos += 1
+            literal = chr(int(codigo, 8))
+        elif c.isdigit():
+            raise PatronNoSoportado("Las referencias hacia atrás no están soportadas")
+        elif c.isascii() and c.isalpha():
+            raise PatronNoSoportado(f"Escape \\{c} no soportado")
+        else:
+            literal = c
+        return literal if en_clase else ('char', ClaseCaracteres(rangos=[(literal, literal)]))
+
+    def __octal(self, desplazamiento):
+        c = self.siguiente(desplazamiento)
+        return c is not None and c in _OCTALES
+
+    def clase(self):
+        negada = self.siguiente() == '^'
+        if negada:
+            self.pos += 1
+        rangos, predicados = [], []
+        primero = True
+        while True:
+            c = self.siguiente()
+            if c is None:
+                raise PatronNoSoportado("Clase de caracteres sin cerrar")
+            if c == ']' and not primero:
+                self.pos += 1
+                break
+            primero = False
+
+            self.pos += 1
+            elemento = self.escape(en_clase=True) if c == '\\' else c
+            if isinstance(elemento, ClaseCaracteres):
+                predicados.extend((predicado, negado != elemento.negada) for predicado, negado in elemento.predicados)
+                continue
+
+            if self.siguiente() == '-' and self.siguiente(1) not in (None, ']'):
+                self.pos += 1
+                c2 = self.siguiente()
+                self.pos += 1
+                fin = self.escape(en_clase=True) if c2 == '\\' else c2
+                if isinstance(fin, ClaseCaracteres):
+                    raise PatronNoSoportado("Rango de caracteres no válido")
+                rangos.append((elemento, fin))
+            else:
+                rangos.append((elemento, elemento))
+        return ClaseCaracteres(rangos, predicados, negada)
+
+
+def analizar(patron):
+    """Árbol del patrón; lanza PatronNoSoportado si usa sintaxis fuera del subconjunto"""
+    return _Analizador(patron).analizar()
+
+
+_INVERSAS = {'bol': 'eol', 'eol': 'bol', 'inicio': 'fin', 'fin': 'inicio'}
+
+
+def invertir(nodo):
+    """Árbol que reconoce las cadenas al revés; las anclas cambian de lado"""
+    tipo = nodo[0]
+    if tipo == 'assert':
+        return ('assert', _INVERSAS.get(nodo[1], nodo[1]))
+    if tipo == 'cat':
+        return ('cat', [invertir(hijo) for hijo in reversed(nodo[1])])
+    if tipo == 'alt':
+        return ('alt', [invertir(hijo) for hijo in nodo[1]])
+    if tipo == 'rep':
+        return ('rep', invertir(nodo[1])) + nodo[2:]
+    return nodo
+
+
+def _cumple(texto, pos, tipo):
+    """Evalúa una aserción en la posición pos del texto"""
+    n = len(texto)
+    if tipo == 'bol':
+        return pos == 0 or texto[pos - 1] == '\n'
+    if tipo == 'eol':
+        return pos == n or texto[pos] == '\n'
+    if tipo == 'inicio':
+        return pos == 0
+    if tipo == 'fin':
+        return pos == n
+    if n == 0:
+        return False  # En re, \b y \B nunca coinciden con un texto vacío
+    antes = pos > 0 and es_palabra(texto[pos - 1])
+    despues = pos < n and es_palabra(texto[pos])
+    return (antes != despues) == (tipo == 'limite')
+
+
+def _anulable(nodo):
+    """Indica si el subárbol puede coincidir con la cadena vacía"""
+    tipo = nodo[0]
+    if tipo == 'char':
+        return False
+    if tipo in ('assert', 'vacio'):
+        return True
+    if tipo == 'cat':
+        return all(_anulable(hijo) for hijo in nodo[1])
+    if tipo == 'alt':
+        return any(_anulable(hijo) for hijo in nodo[1])
+    return nodo[2] == 0 or _anulable(nodo[1])
+
+
+class ProgramaRegex:
+    """Patrón compilado a instrucciones de una máquina de Pike.
+
+    La simulación mantiene a la vez todos los hilos del NFA ordenados por
+    prioridad, así que cada búsqueda cuesta O(longitud del texto × instrucciones)
+    sin retroceso y da las mismas coincidencias que re.finditer con MULTILINE.
+    """
+
+    def __init__(self, patron, arbol=None):
+        self.patron = patron
+        self.ops, self.arg1, self.arg2 = [], [], []
+        self.ciclos = 0
+        self.__emitir(arbol if arbol is not None else analizar(patron))
+        self.__agregar(MATCH)
+
+    def __agregar(self, op, arg1=None, arg2=None):
+        if len(self.ops) >= MAX_INSTRUCCIONES:
+            raise PatronNoSoportado("El patrón es demasiado grande para el motor lineal")
+        self.ops.append(op)
+        self.arg1.append(arg1)
+        self.arg2.append(arg2)
+        return len(self.ops) - 1
+
+    def __emitir(self, nodo):
+        # La profundidad de recursión está acotada por MAX_ANIDAMIENTO
+        tipo = nodo[0]
+        if tipo == 'char':
+            self.__agregar(CHAR, nodo[1])
+        elif tipo == 'assert':
+            self.__agregar(ASSERT, nodo[1])
+        elif tipo == 'cat':
+            for hijo in nodo[1]:
+                self.__emitir(hijo)
+        elif tipo == 'alt':
+            saltos = []
+            for rama in nodo[1][:-1]:
+                split = self.__agregar(SPLIT, len(self.ops) + 1)
+                self.__emitir(rama)
+                saltos.append(self.__agregar(JMP))
+                self.arg2[split] = len(self.ops)
+            self.__emitir(nodo[1][-1])
+            for salto in saltos:
+                self.arg1[salto] = len(self.ops)
+        elif tipo == 'rep':
+            _, hijo, minimo, maximo, codicioso = nodo
+            for _ in range(minimo):
+                self.__emitir(hijo)
+            anulable = _anulable(hijo)
+            if maximo is None and not anulable:
+                # Ciclo clásico de Thompson: cada iteración consume al menos un carácter
+                split = self.__agregar(SPLIT)
+                self.__emitir(hijo)
+                self.__agregar(JMP, split)
+                self.__ramas(split, split + 1, len(self.ops), codicioso)
+            elif maximo is None:
+                entrada = self.__agregar(SPLIT)
+                cuerpo = self.__agregar(INICIO, self.__nuevo_ciclo())
+                self.__emitir(hijo)
+                ciclo = self.__agregar(CICLO if codicioso else CICLO_PEREZOSO, cuerpo)
+                self.arg2[ciclo] = len(self.ops)
+                self.__ramas(entrada, cuerpo, len(self.ops), codicioso)
+            else:
+                splits, fines = [], []
+                for _ in range(maximo - minimo):
+                    splits.append(self.__agregar(SPLIT))
+                    if anulable:
+                        ciclo = self.__nuevo_ciclo()
+                        self.__agregar(INICIO, ciclo)
+                        self.__emitir(hijo)
+                        fines.append(self.__agregar(FIN, ciclo))
+                    else:
+                        self.__emitir(hijo)
+                for split in splits:
+                    self.__ramas(split, split + 1, len(self.ops), codicioso)
+                for fin in fines:
+                    self.arg2[fin] = len(self.ops)
+
+    def __nuevo_ciclo(self):
+        self.ciclos += 1
+        return self.ciclos - 1
+
+    def __ramas(self, split, cuerpo, salida, codicioso):
+        # arg1 es la rama preferida
+        self.arg1[split], self.arg2[split] = (cuerpo, salida) if codicioso else (salida, cuerpo)
+
+    def seguir(self, lista, visitados, pc, cumple, dato):
+        """Agrega a lista los hilos (pc, dato) alcanzables desde pc sin consumir, en orden de prioridad.
+
+        cumple(tipo) evalúa las aserciones en la posición actual. Cada entrada de la pila lleva la máscara de repeticiones cuyo cuerpo se
+        empezó en esta posición por ese camino; dos caminos al mismo pc solo son
+        equivalentes si además tienen la misma máscara.
+        """
+        ops, arg1, arg2 = self.ops, self.arg1, self.arg2
+        pila = [(pc, 0)]
+        while pila:
+            pc, mascara = pila.pop()
+            op = ops[pc]
+            # Tras consumir un carácter la máscara ya no importa
+            clave = (pc, mascara) if mascara and op != CHAR and op != MATCH else pc
+            if clave in visitados:
+                continue
+            visitados.add(clave)
+
+            if op == JMP:
+                pila.append((arg1[pc], mascara))
+            elif op == SPLIT:
+                pila.append((arg2[pc], mascara))
+                pila.append((arg1[pc], mascara))
+            elif op == ASSERT:
+                if cumple(arg1[pc]):
+                    pila.append((pc + 1, mascara))
+            elif op == INICIO:
+                pila.append((pc + 1, mascara | 1 << arg1[pc]))
+            elif op == CICLO or op == CICLO_PEREZOSO:
+                cuerpo, salida = arg1[pc], arg2[pc]
+                bit = 1 << arg1[cuerpo]
+                if mascara & bit:
+                    pila.append((salida, mascara & ~bit))
+                elif op == CICLO:
+                    pila.append((salida, mascara))
+                    pila.append((cuerpo, mascara))
+                else:
+                    pila.append((cuerpo, mascara))
+                    pila.append((salida, mascara))
+            elif op == FIN:
+                bit = 1 << arg1[pc]
+                pila.append((arg2[pc] if mascara & bit else pc + 1, mascara & ~bit))
+            else:
+                lista.append((pc, dato))
+
+    def buscar(self, texto, inicio=0, avanzar=False):
+        """Primera coincidencia (inicio, fin) desde la posición dada, o None.
+
+        Con avanzar=True no se acepta una coincidencia vacía en la posición
+        inicial, igual que re.finditer tras una coincidencia vacía.
+        """
+        ops, arg1 = self.ops, self.arg1
+        n = len(texto)
+        visitados = set()
+        actual = []
+        coincidencia = None
+        i = inicio
+        while True:
+            # Un hilo nuevo por posición, con la prioridad más baja, hasta encontrar una coincidencia
+            if coincidencia is None:
+                self.seguir(actual, visitados, 0, partial(_cumple, texto, i), i)
+            if not actual and (coincidencia is not None or i >= n):
+                break
+
+            c = texto[i] if i < n else None
+            siguiente, visitados = [], set()
+            cumple = partial(_cumple, texto, i + 1)
+            for pc, hilo in actual:
+                op = ops[pc]
+                if op == MATCH:
+                    if avanzar and hilo == inicio and i == inicio:
+                        continue
+                    # Los hilos de menor prioridad se descartan
+                    coincidencia = (hilo, i)
+                    break
+                if c is not None and c in arg1[pc]:
+                    self.seguir(siguiente, visitados, pc + 1, cumple, hilo)
+            actual = siguiente
+            if i >= n:
+                break
+            i += 1
+        return coincidencia
+
+    def finditer(self, texto):
+        """Genera (inicio, fin) de las coincidencias sin solaparse, como re.finditer"""
+        pos, avanzar = 0, False
+        while pos <= len(texto):
+            coincidencia = self.buscar(texto, pos, avanzar)
+            if coincidencia is None:
+                return
+            yield coincidencia
+            inicio, pos = coincidencia
+            avanzar = inicio == pos
+
+
+def compilar(patron):
+    """Compila el patrón para el motor lineal; lanza PatronNoSoportado si no es posible"""
+    return _programas.get_or_create(patron, lambda: ProgramaRegex(patron))
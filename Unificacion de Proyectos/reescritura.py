@@ -0,0 +1,199 @@
+from tree import NodeFactory
+
+# Prioridades para decidir los paréntesis al escribir una expresión
+_PRIORIDAD = {'↔': 1, '→': 2, '∨': 3, '∧': 4, '¬': 5}
+_NOTACION = {'∧': '&', '∨': '|', '¬': '~'}
+
+# Reglas indexadas por el operador de la raíz: {operador: [(nombre, función)]}
+_REGLAS = {}
+
+
+def regla(operador, nombre):
+    """Registra una regla; la función recibe (nodo, fábrica) y devuelve el nodo nuevo o None."""
+    def registrar(funcion):
+        _REGLAS.setdefault(operador, []).append((nombre, funcion))
+        return funcion
+    return registrar
+
+
+def _es_constante(nodo, valor):
+    return nodo.left is None and nodo.right is None and nodo.value == valor
+
+
+def _es_negacion_de(nodo, otro):
+    return nodo.value == '¬' and nodo.right is otro
+
+
+# ---- Negación ----
+
+@regla('¬', 'Doble negación')
+def _doble_negacion(nodo, fabrica):
+    if nodo.right.value == '¬':
+        return nodo.right.right
+
+
+@regla('¬', 'Complemento constante')
+def _complemento_constante(nodo, fabrica):
+    if _es_constante(nodo.right, '0'):
+        return fabrica.make('1')
+    if _es_constante(nodo.right, '1'):
+        return fabrica.make('0')
+
+
+@regla('¬', 'De Morgan')
+def _de_morgan(nodo, fabrica):
+    hijo = nodo.right
+    if hijo.value in ('∧', '∨'):
+        dual = '∨' if hijo.value == '∧' else '∧'
+        return fabrica.make(dual, fabrica.make('¬', None, hijo.left), fabrica.make('¬', None, hijo.right))
+
+
+# ---- Conjunción y disyunción ----
+# Cada ley se registra para ∧ y para ∨ con los neutros y absorbentes intercambiados
+
+def _registrar_leyes(operador, dual, neutro, absorbente, sufijo):
+    @regla(operador, f'Identidad {sufijo}')
+    def identidad(nodo, fabrica):
+        if _es_constante(nodo.left, neutro):
+            return nodo.right
+        if _es_constante(nodo.right, neutro):
+            return nodo.left
+
+    @regla(operador, f'Anulación {sufijo}')
+    def anulacion(nodo, fabrica):
+        if _es_constante(nodo.left, absorbente) or _es_constante(nodo.right, absorbente):
+            return fabrica.make(absorbente)
+
+    @regla(operador, f'Idempotencia {sufijo}')
+    def idempotencia(nodo, fabrica):
+        if nodo.left is nodo.right:
+            return nodo.left
+
+    @regla(operador, f'Complemento {sufijo}')
+    def complemento(nodo, fabrica):
+        if _es_negacion_de(nodo.left, nodo.right) or _es_negacion_de(nodo.right, nodo.left):
+            return fabrica.make(absorbente)
+
+    @regla(operador, f'Absorción {sufijo}')
+    def absorcion(nodo, fabrica):
+        # x op (x dual y) = x, en cualquier orden
+        for x, otro in ((nodo.left, nodo.right), (nodo.right, nodo.left)):
+            if otro.value == dual and (otro.left is x or otro.right is x):
+                return x
+
+    @regla(operador, f'Distribución {sufijo}')
+    def distribucion(nodo, fabrica):
+        # Factor común: (x dual y) op (x dual z) = x dual (y op z)
+        izq, der = nodo.left, nodo.right
+        if izq.value != dual or der.value != dual:
+            return None
+        for x, y in ((izq.left, izq.right), (izq.right, izq.left)):
+            for x2, z in ((der.left, der.right), (der.right, der.left)):
+                if x is x2:
+                    return fabrica.make(dual, x, fabrica.make(operador, y, z))
+
+
+_registrar_leyes('∧', '∨', '1', '0', 'AND')
+_registrar_leyes('∨', '∧', '0', '1', 'OR')
+
+
+# ---- Implicación y equivalencia ----
+
+@regla('→', 'Definición de implicación')
+def _implicacion(nodo, fabrica):
+    return fabrica.make('∨', fabrica.make('¬', None, nodo.left), nodo.right)
+
+
+@regla('↔', 'Definición de equivalencia')
+def _equivalencia(nodo, fabrica):
+    a, b = nodo.left, nodo.right
+    return fabrica.make('∧', fabrica.make('∨', fabrica.make('¬', None, a), b),
+                        fabrica.make('∨', a, fabrica.make('¬', None, b)))
+
+
+class MotorReescritura:
+    """Simplifica árboles de Node aplicando leyes del álgebra de Boole hasta un punto fijo.
+
+    En cada pasada el DAG se recorre una sola vez de abajo arriba y en cada nodo
+    solo se prueban las reglas de su operador; se aplica como mucho una. Los
+    nodos deben venir de la misma NodeFactory que usa el motor, así la igualdad
+    estructural es una comparación de identidad y un subárbol compartido se
+    reescribe una sola vez.
+    """
+
+    def __init__(self, fabrica=None, max_pasadas=1000):
+        self.fabrica = fabrica if fabrica is not None else NodeFactory()
+        self.max_pasadas = max_pasadas
+
+    def simplificar(self, raiz):
+        """Devuelve (raíz simplificada, pasos, pasadas); cada paso es (regla, antes, después)."""
+        pasos = []
+        pasadas = 0
+        while raiz is not None and pasadas < self.max_pasadas:
+            pasadas += 1
+            nueva = self.__pasada(raiz, pasos)
+            # Con nodos compartidos, sin cambios se reconstruye exactamente el mismo nodo
+            if nueva is raiz:
+                break
+            raiz = nueva
+        return raiz, pasos, pasadas
+
+    def __pasada(self, raiz, pasos):
+        nuevos = {}
+        pila = [raiz]
+        while pila:
+            nodo = pila[-1]
+            if id(nodo) in nuevos:
+                pila.pop()
+                continue
+            pendientes = [hijo for hijo in (nodo.left, nodo.right) if hijo is not None and id(hijo) not in nuevos]
+            if pendientes:
+                pila.extend(pendientes)
+                continue
+            pila.pop()
+
+            actual = nodo
+            if nodo.left is not None or nodo.right is not None:
+                izq = nuevos[id(nodo.left)] if nodo.left is not None else None
+                der = nuevos[id(nodo.right)] if nodo.right is not None else None
+                actual = self.fabrica.make(nodo.value, izq, der)
+            nuevos[id(nodo)] = self.__aplicar(actual, pasos)
+        return nuevos[id(raiz)]
+
+    def __aplicar(self, nodo, pasos):
+        for nombre, funcion in _REGLAS.get(nodo.value, ()):
+            resultado = funcion(nodo, self.fabrica)
+            if resultado is not None:
+                pasos.append((nombre, nodo, resultado))
+                return resultado
+        return nodo
+
+
+def formatear(nodo):
+    """Escribe el subárbol con la notación &, |, ~ y solo los paréntesis necesarios."""
+    partes = []
+    pila = [(nodo, 0)]
+    while pila:
+        item, prioridad_padre = pila.pop()
+        if isinstance(item, str):
+            partes.append(item)
+            continue
+        if item.left is None and item.right is None:
+            partes.append(str(item.value))
+            continue
+
+        prioridad = _PRIORIDAD[item.value]
+        # → y ↔ no son asociativos: sus operandos del mismo nivel llevan paréntesis
+        abre = prioridad < prioridad_padre or (prioridad == prioridad_padre and item.value in ('→', '↔'))
+        if abre:
+            pila.append((')', 0))
+        if item.value == '¬':
+            pila.append((item.right, prioridad))
+            pila.append(('~', 0))
+        else:
+            pila.append((item.right, prioridad))
+            pila.append((f" {_NOTACION.get(item.value, item.value)} ", 0))
+            pila.append((item.left, prioridad))
+        if abre:
+            pila.append(('(', 0))
+    return ''.join(partes)
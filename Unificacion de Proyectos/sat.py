@@ -0,0 +1,201 @@
+from tree import OP_AND, OP_CONST, OP_IFF, OP_IMPLIES, OP_NOT, OP_OR, OP_VAR
+
+
+def tseitin(compact):
+    """Convierte un CompactExpressionTree a CNF con la transformación de Tseitin.
+
+    Las variables de la expresión son 1..n (en el orden de compact.variables) y
+    cada operador binario recibe una variable auxiliar. Devuelve
+    (número de variables, cláusulas, literal de la raíz); los literales son
+    enteros con signo al estilo DIMACS.
+    """
+    num_vars = len(compact.variables)
+    clauses = []
+    literals = []
+    true_literal = None
+
+    for opcode, left, right, var_id in zip(compact.opcodes, compact.left, compact.right, compact.var_ids):
+        if opcode == OP_VAR:
+            literals.append(var_id + 1)
+            continue
+        if opcode == OP_CONST:
+            # Las constantes usan una variable auxiliar forzada a verdadero
+            if true_literal is None:
+                num_vars += 1
+                true_literal = num_vars
+                clauses.append([true_literal])
+            literals.append(true_literal if var_id else -true_literal)
+            continue
+        b = literals[right]
+        if opcode == OP_NOT:
+            # La negación no necesita variable auxiliar
+            literals.append(-b)
+            continue
+
+        a = literals[left]
+        num_vars += 1
+        g = num_vars
+        if opcode == OP_AND:
+            clauses += [[-g, a], [-g, b], [g, -a, -b]]
+        elif opcode == OP_OR:
+            clauses += [[g, -a], [g, -b], [-g, a, b]]
+        elif opcode == OP_IMPLIES:
+            clauses += [[g, a], [g, -b], [-g, -a, b]]
+        elif opcode == OP_IFF:
+            clauses += [[-g, -a, b], [-g, a, -b], [g, a, b], [g, -a, -b]]
+        literals.append(g)
+
+    root = literals[compact.root] if compact.root >= 0 else None
+    return num_vars, clauses, root
+
+
+class DPLLSolver:
+    """Resolvedor DPLL iterativo con propagación unitaria por dos literales vigilados"""
+
+    def __init__(self, num_vars, clauses):
+        self.num_vars = num_vars
+        self.assignment = [None] * (num_vars + 1)
+        self.trail = []
+        self.watches = {}
+        self.clauses = []
+        self.units = []
+        self.empty_clause = False
+
+        occurrences = [0] * (num_vars + 1)
+        for clause in clauses:
+            clause = list(dict.fromkeys(clause))
+            if any(-lit in clause for lit in clause):
+                continue  # Cláusula tautológica
+            for lit in clause:
+                occurrences[abs(lit)] += 1
+            if not clause:
+                self.empty_clause = True
+            elif len(clause) == 1:
+                self.units.append(clause[0])
+            else:
+                index = len(self.clauses)
+                self.clauses.append(clause)
+                self.watches.setdefault(clause[0], []).append(index)
+                self.watches.setdefault(clause[1], []).append(index)
+
+        # Heurística estática: primero las variables que aparecen en más cláusulas
+        self.order = sorted(range(1, num_vars + 1), key=lambda var: -occurrences[var])
+
+    def value(self, lit):
+        value = self.assignment[abs(lit)]
+        if value is None:
+            return None
+        return value if lit > 0 else not value
+
+    def __assign(self, lit):
+        self.assignment[abs(lit)] = lit > 0
+        self.trail.append(lit)
+
+    def __undo(self, size):
+        while len(self.trail) > size:
+            self.assignment[abs(self.trail.pop())] = None
+
+    def __propagate(self, start):
+        """Propaga desde trail[start]; devuelve False si encuentra un conflicto."""
+        head = start
+        while head < len(self.trail):
+            false_lit = -self.trail[head]
+            head += 1
+            watching = self.watches.get(false_lit, [])
+            kept = []
+            for position, index in enumerate(watching):
+                clause = self.clauses[index]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                if self.value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+
+                # Buscar otro literal no falso para vigilar
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(clause[0]) is False:
+                        kept.extend(watching[position + 1:])
+                        self.watches[false_lit] = kept
+                        return False
+                    self.__assign(clause[0])
+            self.watches[false_lit] = kept
+        return True
+
+    def solve(self, assumptions=()):
+        """Devuelve un modelo {variable: bool} o None si las cláusulas son insatisfacibles."""
+        if self.empty_clause:
+            return None
+
+        self.__undo(0)
+        for lit in [*self.units, *assumptions]:
+            if self.value(lit) is False:
+                return None
+            if self.value(lit) is None:
+                self.__assign(lit)
+
+        # Cada decisión guarda (tamaño del rastro antes de decidir, literal, ya invertida)
+        decisions = []
+        propagate_from = 0
+        while True:
+            if not self.__propagate(propagate_from):
+                while decisions and decisions[-1][2]:
+                    decisions.pop()
+                if not decisions:
+                    return None
+                size, lit, _ = decisions.pop()
+                self.__undo(size)
+                decisions.append((size, -lit, True))
+                self.__assign(-lit)
+                propagate_from = size
+                continue
+
+            var = next((var for var in self.order if self.assignment[var] is None), None)
+            if var is None:
+                return {var: self.assignment[var] for var in range(1, self.num_vars + 1)}
+
+            propagate_from = len(self.trail)
+            decisions.append((propagate_from, -var, False))
+            self.__assign(-var)
+
+
+def analyze(compact):
+    """Clasifica la expresión sin enumerar su tabla de verdad.
+
+    Busca un modelo de la expresión y otro de su negación; cada búsqueda se
+    detiene en la primera asignación encontrada. Devuelve la clasificación,
+    un testigo (fila verdadera) y un contraejemplo (fila falsa) cuando existen.
+    """
+    num_vars, clauses, root = tseitin(compact)
+
+    def to_row(model):
+        if model is None:
+            return None
+        return {var: 'V' if model[i + 1] else 'F' for i, var in enumerate(compact.variables)}
+
+    if root is None:
+        witness, counterexample = None, {}
+    else:
+        solver = DPLLSolver(num_vars, clauses)
+        witness = to_row(solver.solve([root]))
+        counterexample = to_row(solver.solve([-root])) if witness is not None else {}
+
+    if witness is None:
+        classification = "contradiction"
+    elif counterexample is None:
+        classification = "tautology"
+    else:
+        classification = "contingency"
+
+    return {
+        "classification": classification,
+        "satisfiable": witness is not None,
+        "witness": witness,
+        "counterexample": counterexample or None
+    }
@@ -26,6 +26,7 @@ const stepsEl = document.getElementById('steps');
 const btnSimplify = document.getElementById('btnSimplify');
 const btnExport = document.getElementById('btnExport');
 const btnClear = document.getElementById('btnClear');
+const metodoSel = document.getElementById('metodo');
 
 // ============ EVENTOS DE BOTONES OPERADORES ============
 
@@ -58,7 +59,8 @@ function tokenize(input) {
     if (c === '(') { tokens.push({ type: 'LP', v: '(' }); i++; continue; }
     if (c === ')') { tokens.push({ type: 'RP', v: ')' }); i++; continue; }
     if (c === '&' || c === '*' || c === '·') { tokens.push({ type: 'AND', v: '&' }); i++; continue; }
-    if (c === '|' || c === '+' || c.toLowerCase() === 'v') { tokens.push({ type: 'OR', v: '|' }); i++; continue; }
+    // Una v suelta es OR; seguida de letras o dígitos es el comienzo de una variable (igual que en el servidor)
+    if (c === '|' || c === '+' || (c.toLowerCase() === 'v' && !isIdent(input[i + 1] || ''))) { tokens.push({ type: 'OR', v: '|' }); i++; continue; }
     if (c === '~' || c === '!') { tokens.push({ type: 'NOT', v: '~' }); i++; continue; }
     if (c === '0' || c === '1') { tokens.push({ type: 'CONST', v: c === '1' }); i++; continue; }
     if (isLetter(c)) {
@@ -369,22 +371,48 @@ function renderSteps(steps) {
 
 let lastResult = null;
 
-btnSimplify.addEventListener('click', () => {
+// La simplificación se hace en el servidor; el motor local solo se usa si no hay conexión
+async function simplificarEnServidor(expresion, opcion) {
+  const [metodo, forma] = opcion.split(':');
+  const resp = await fetch('/simplificar', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ expresion, metodo, forma })
+  });
+  const data = await resp.json();
+  if (!data.exito) throw new Error(data.error);
+  return data;
+}
+
+function simplificarLocal(expresion) {
+  const out = simplificar(parse(expresion));
+  return { resultado: toString(out.node), pasos: out.steps, pasos_totales: out.steps.length };
+}
+
+btnSimplify.addEventListener('click', async () => {
   const raw = exprDisplay.textContent.trim();
   if (!raw) {
     status('No hay expresión para simplificar.');
     alert('La expresión está vacía.');
     return;
   }
+  const normalized = raw.replace(/·/g, '&').replace(/\s+/g, ' ').trim();
+  status('Simplificando...');
   try {
-    const normalized = raw.replace(/·/g, '&').replace(/\s+/g, ' ').trim();
-    const ast = parse(normalized);
-    const out = simplificar(ast);
-    const text = toString(out.node);
-    resultEl.textContent = text;
-    renderSteps(out.steps);
-    status('Simplificación completa. ' + out.steps.length + ' paso(s).');
-    lastResult = { original: raw, normalized, simplified: text, steps: out.steps };
+    let out;
+    try {
+      out = await simplificarEnServidor(normalized, metodoSel.value);
+    } catch (err) {
+      // TypeError: fallo de red; los errores de sintaxis llegan del servidor como Error
+      if (!(err instanceof TypeError)) throw err;
+      out = simplificarLocal(normalized);
+    }
+    resultEl.textContent = out.resultado;
+    renderSteps(out.pasos);
+    const omitidos = out.pasos_totales > out.pasos.length
+      ? ' (se muestran ' + out.pasos.length + ' de ' + out.pasos_totales + ')' : '';
+    status('Simplificación completa. ' + out.pasos.length + ' paso(s)' + omitidos + '.');
+    lastResult = { original: raw, normalized, simplified: out.resultado, steps: out.pasos };
   } catch (err) {
     console.error(err);
     resultEl.textContent = '';
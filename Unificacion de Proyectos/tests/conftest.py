@@ -0,0 +1,92 @@
+import itertools
+import os
+import random
+import sys
+
+import pytest
+
+# Los módulos del proyecto se importan por nombre, como lo hace app.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tree import ExpressionTree  # noqa: E402
+
+OPERADORES_BINARIOS = ('∧', '∨', '→', '↔')
+
+# Piezas de los patrones aleatorios; ninguna combinación a esta profundidad provoca
+# retroceso catastrófico en re con textos cortos
+ATOMOS_REGEX = ['a', 'b', 'c', '.', '[ab]', '[^a]', r'\d', r'\w', r'\s', r'\b', r'\B', '^', '$', '\\n',
+                '[a-c0-9]', 'x', r'\.', '[]a]', '[a-]', r'[\d_]', r'[^\s]', '(?:)', r'\A', r'\Z']
+CUANTIFICADORES = ['*', '+', '?', '{2}', '{1,3}', '{,2}', '{2,}', '*?', '+?', '??', '{0,2}?']
+
+
+def generar_expresion(rng, variables, profundidad):
+    """Expresión aleatoria con las variables dadas, constantes y todos los operadores"""
+    if profundidad == 0 or rng.random() < 0.2:
+        return rng.choice(variables) if rng.random() < 0.9 else rng.choice('01')
+    if rng.random() < 0.2:
+        return '¬' + generar_expresion(rng, variables, profundidad - 1)
+    izquierda = generar_expresion(rng, variables, profundidad - 1)
+    derecha = generar_expresion(rng, variables, profundidad - 1)
+    return f'({izquierda} {rng.choice(OPERADORES_BINARIOS)} {derecha})'
+
+
+def generar_patron(rng, profundidad):
+    """Patrón aleatorio con clases, anclas, alternativas y cuantificadores codiciosos y perezosos"""
+    r = rng.random()
+    if profundidad == 0 or r < 0.3:
+        return rng.choice(ATOMOS_REGEX)
+    if r < 0.5:
+        return generar_patron(rng, profundidad - 1) + generar_patron(rng, profundidad - 1)
+    if r < 0.65:
+        return f'({generar_patron(rng, profundidad - 1)}|{generar_patron(rng, profundidad - 1)})'
+    if r < 0.75:
+        return f'(?:{generar_patron(rng, profundidad - 1)})'
+    cuerpo = generar_patron(rng, profundidad - 1)
+    if len(cuerpo) > 1 and cuerpo[0] not in '([\\':
+        cuerpo = f'(?:{cuerpo})'
+    return cuerpo + rng.choice(CUANTIFICADORES)
+
+
+def tabla_por_fuerza_bruta(arbol):
+    """Resultados fila por fila evaluando el árbol, en el orden de itertools.product"""
+    variables = sorted(arbol.variables)
+    return variables, [arbol.evaluate(dict(zip(variables, valores)))
+                       for valores in itertools.product([False, True], repeat=len(variables))]
+
+
+@pytest.fixture
+def expresiones():
+    """Genera n árboles aleatorios (con su texto) de forma reproducible"""
+    def generar(n, variables='ABCDE', profundidad=4, semilla=0):
+        rng = random.Random(semilla)
+        for _ in range(n):
+            texto = generar_expresion(rng, list(variables[:rng.randint(1, len(variables))]), profundidad)
+            arbol = ExpressionTree(texto)
+            arbol.build_tree()
+            yield texto, arbol
+    return generar
+
+
+@pytest.fixture
+def patrones():
+    """Genera n pares (patrón, textos) aleatorios de forma reproducible"""
+    def generar(n, profundidad=4, semilla=0):
+        rng = random.Random(semilla)
+        for _ in range(n):
+            textos = [''.join(rng.choice('aabbc x1_\n.') for _ in range(rng.randint(0, 25))) for _ in range(5)]
+            yield generar_patron(rng, rng.randint(1, profundidad)), textos
+    return generar
+
+
+@pytest.fixture
+def fuerza_bruta():
+    return tabla_por_fuerza_bruta
+
+
+@pytest.fixture
+def cliente():
+    """Cliente de pruebas de Flask sobre la aplicación completa"""
+    import app
+    app.app.config['TESTING'] = True
+    with app.app.test_client() as cliente:
+        yield cliente
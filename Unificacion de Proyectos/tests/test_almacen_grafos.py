@@ -0,0 +1,84 @@
+import sqlite3
+import time
+
+import pytest
+
+from almacen_grafos import AlmacenMemoria, AlmacenSQLite
+from app import Grafo
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    return str(tmp_path / 'grafos.db')
+
+
+def grafo_de_ejemplo():
+    grafo = Grafo()
+    grafo.agregar_aristas([('A', 'B', 1), ('B', 'C', 2)])
+    return grafo
+
+
+def test_reutiliza_el_grafo_y_sus_caches_mientras_no_cambie(ruta):
+    almacen = AlmacenSQLite(ruta)
+    almacen.guardar('g', grafo_de_ejemplo())
+    with almacen.bloquear('g') as grafo:
+        compacto = grafo.compacto()
+        grafo.arbol_caminos('A')
+    with almacen.bloquear('g') as otra_vez:
+        assert otra_vez is grafo
+        assert otra_vez.compacto() is compacto
+
+
+def test_recarga_lo_que_modifico_otro_proceso(ruta):
+    # Dos almacenes sobre el mismo archivo hacen de dos procesos del servidor
+    primero, segundo = AlmacenSQLite(ruta), AlmacenSQLite(ruta)
+    primero.guardar('g', grafo_de_ejemplo())
+    with primero.bloquear('g') as grafo:
+        assert grafo.ruta_mas_corta('A', 'C')[0] == 3
+
+    with segundo.bloquear('g', modificar=True) as grafo:
+        grafo.agregar_arista('A', 'C', 1)
+    with primero.bloquear('g') as grafo:
+        assert grafo.ruta_mas_corta('A', 'C')[0] == 1
+
+    # Un grafo nuevo con el mismo id y la misma versión se distingue por el uid
+    segundo.guardar('g', grafo_de_ejemplo())
+    with primero.bloquear('g') as grafo:
+        assert grafo.ruta_mas_corta('A', 'C')[0] == 3
+
+    segundo.borrar('g')
+    with primero.bloquear('g') as grafo:
+        assert grafo is None
+
+
+def test_una_modificacion_fallida_no_queda_en_la_cache(ruta):
+    almacen = AlmacenSQLite(ruta)
+    almacen.guardar('g', grafo_de_ejemplo())
+    with pytest.raises(RuntimeError):
+        with almacen.bloquear('g', modificar=True) as grafo:
+            grafo.adyacencia['A'].append(('Z', 1))
+            raise RuntimeError
+    with almacen.bloquear('g') as grafo:
+        assert 'Z' not in {destino for destino, _ in grafo.adyacencia['A']}
+
+
+def test_archivos_sin_columnas_de_version(ruta):
+    with sqlite3.connect(ruta) as conexion:
+        conexion.execute('CREATE TABLE grafos (id TEXT PRIMARY KEY, datos BLOB NOT NULL)')
+    almacen = AlmacenSQLite(ruta)
+    almacen.guardar('g', grafo_de_ejemplo())
+    with AlmacenSQLite(ruta).bloquear('g') as grafo:
+        assert sorted(grafo.obtener_nodos()) == ['A', 'B', 'C']
+
+
+def test_las_lecturas_renuevan_el_vencimiento_en_memoria():
+    almacen = AlmacenMemoria(ttl=0.3)
+    almacen.guardar('g', grafo_de_ejemplo())
+    # Solo consultas, durante más del doble del TTL
+    for _ in range(8):
+        time.sleep(0.1)
+        with almacen.bloquear('g') as grafo:
+            assert grafo is not None
+    time.sleep(0.4)
+    with almacen.bloquear('g') as grafo:
+        assert grafo is None
@@ -0,0 +1,41 @@
+import re
+
+import pytest
+
+import automata_regex
+import motor_regex
+from motor_regex import PatronNoSoportado
+
+
+def test_finditer_coincide_con_re_y_con_el_motor_lineal(patrones):
+    comparados = 0
+    for patron, textos in patrones(1500, semilla=1):
+        try:
+            referencia = re.compile(patron, re.MULTILINE)
+        except re.error:
+            continue
+        try:
+            automata = automata_regex.compilar(patron)
+        except PatronNoSoportado:
+            continue
+        programa = motor_regex.compilar(patron)
+        for texto in textos:
+            esperado = [m.span() for m in referencia.finditer(texto)]
+            assert list(automata.finditer(texto)) == esperado, (patron, texto)
+            assert list(programa.finditer(texto)) == esperado, (patron, texto)
+        comparados += 1
+    assert comparados > 500
+
+
+def test_describir_da_el_dfa_minimo():
+    descripcion = automata_regex.describir('a(b|c)*')
+    # Un estado antes de la a y otro de aceptación que vuelve a sí mismo con b o c
+    assert descripcion['estados'] == 2
+    assert descripcion['aceptacion'] == [1]
+    assert sorted((origen, destino) for origen, destino, _ in descripcion['transiciones']) == [(0, 1), (1, 1)]
+
+
+def test_automata_demasiado_grande():
+    # El DFA de "una a a n posiciones del final" tiene 2^n estados
+    with pytest.raises(PatronNoSoportado):
+        automata_regex.compilar('[ab]*a[ab]{20}')
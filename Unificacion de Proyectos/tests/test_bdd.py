@@ -0,0 +1,59 @@
+import itertools
+
+from bdd import BDD, equivalent
+from tree import ExpressionTree
+
+
+def construir(texto):
+    arbol = ExpressionTree(texto)
+    arbol.build_tree()
+    return arbol
+
+
+def test_count_e_iter_rows_coinciden_con_la_tabla(expresiones, fuerza_bruta):
+    for texto, arbol in expresiones(300):
+        variables, resultados = fuerza_bruta(arbol)
+        manager = BDD(variables)
+        f = manager.from_compact(arbol.to_compact())
+
+        assert manager.count(f) == sum(resultados), texto
+        filas = list(itertools.product([False, True], repeat=len(variables)))
+        assert list(manager.iter_rows(f)) == list(zip(filas, resultados)), texto
+
+        asignacion = manager.any_sat(f)
+        if asignacion is None:
+            assert not any(resultados), texto
+        else:
+            assert arbol.evaluate(asignacion) is True, texto
+
+
+def test_iter_rows_por_paginas(expresiones, fuerza_bruta):
+    for texto, arbol in expresiones(40, semilla=2):
+        variables, resultados = fuerza_bruta(arbol)
+        manager = BDD(variables)
+        f = manager.from_compact(arbol.to_compact())
+        todas = list(manager.iter_rows(f))
+        for offset in range(0, len(todas) + 1, 3):
+            assert list(manager.iter_rows(f, offset, 5)) == todas[offset:offset + 5], texto
+
+
+def test_equivalent_coincide_con_la_fuerza_bruta(expresiones):
+    pares = list(expresiones(200, variables='ABC', profundidad=3, semilla=3))
+    for (texto_a, a), (texto_b, b) in zip(pares[::2], pares[1::2]):
+        variables = sorted(a.variables | b.variables)
+        diferencias = []
+        for valores in itertools.product([False, True], repeat=len(variables)):
+            fila = dict(zip(variables, valores))
+            if a.evaluate({v: fila[v] for v in a.variables}) != b.evaluate({v: fila[v] for v in b.variables}):
+                diferencias.append(fila)
+
+        iguales, asignacion = equivalent(a.to_compact(), b.to_compact())
+        assert iguales == (not diferencias), (texto_a, texto_b)
+        if not iguales:
+            assert {v: asignacion.get(v, False) for v in variables} in diferencias, (texto_a, texto_b)
+
+
+def test_equivalencias_conocidas():
+    assert equivalent(construir('A → B').to_compact(), construir('¬A ∨ B').to_compact())[0]
+    assert equivalent(construir('¬(A ∧ B)').to_compact(), construir('¬A ∨ ¬B').to_compact())[0]
+    assert not equivalent(construir('A → B').to_compact(), construir('B → A').to_compact())[0]
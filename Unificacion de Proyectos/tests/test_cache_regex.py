@@ -0,0 +1,46 @@
+import re
+
+import app
+import ejecutor_regex
+
+TEXTO = 'uno\ndos\ntres\ncuatro\ncinco'
+
+
+def test_el_mismo_patron_y_flags_se_compila_una_vez():
+    patron = r'caché-repetida-\d+'
+    antes = app.patrones_compilados.stats()
+    compilado = app.compilar_regex(patron)
+    for _ in range(3):
+        assert app.compilar_regex(patron) is compilado
+    despues = app.patrones_compilados.stats()
+    assert despues['misses'] == antes['misses'] + 1
+    assert despues['hits'] == antes['hits'] + 3
+
+
+def test_flags_distintas_no_comparten_entrada():
+    patron = '^b$'
+    multilinea = app.compilar_regex(patron)
+    simple = app.compilar_regex(patron, 0)
+    assert multilinea is not simple
+    assert (multilinea.flags & re.MULTILINE, simple.flags & re.MULTILINE) == (re.MULTILINE, 0)
+    assert multilinea.findall('a\nb') == ['b']
+    assert simple.findall('a\nb') == []
+    assert app.compilar_regex(patron) is multilinea
+    assert app.compilar_regex(patron, 0) is simple
+
+
+def test_la_cache_de_los_trabajadores_separa_flags():
+    patron = '^dos$'
+    assert ejecutor_regex.compilar('re', patron) is ejecutor_regex.compilar('re', patron)
+    assert ejecutor_regex.compilar('re', patron, 0) is not ejecutor_regex.compilar('re', patron)
+    assert ejecutor_regex.buscar_coincidencias(TEXTO, patron) == (['dos'], [(4, 7)])
+
+
+def test_peticiones_repetidas_usan_la_cache(cliente):
+    peticion = {'regex': r'c\w+-peticion', 'texto': TEXTO}
+    primera = cliente.post('/procesar', json=peticion).get_json()
+    antes = app.patrones_compilados.stats()
+    assert cliente.post('/procesar', json=peticion).get_json() == primera
+    despues = app.patrones_compilados.stats()
+    assert despues['misses'] == antes['misses']
+    assert despues['hits'] > antes['hits']
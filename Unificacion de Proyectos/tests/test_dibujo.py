@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+from test_rutas import calcular_ruta, crear_grafo
+
+
+def test_rutas_repetidas_no_vuelven_a_dibujar(cliente, monkeypatch):
+    dibujos = []
+    dibujar_grafo = app.dibujar_grafo
+
+    def contar(grafo, *args, **kwargs):
+        dibujos.append(grafo.version)
+        return dibujar_grafo(grafo, *args, **kwargs)
+
+    monkeypatch.setattr(app, 'dibujar_grafo', contar)
+    grafo_id = crear_grafo(cliente, [('A', 'B', 1), ('B', 'C', 2), ('A', 'C', 5)])
+    dibujos.clear()
+    posiciones = app.posiciones_grafos.stats()['hits']
+    imagenes = app.imagenes_grafos.stats()['hits']
+
+    primera = calcular_ruta(cliente, grafo_id, 'A', 'C')
+    for _ in range(3):
+        assert calcular_ruta(cliente, grafo_id, 'A', 'C')['imagen'] == primera['imagen']
+    assert len(dibujos) == 1
+    assert app.imagenes_grafos.stats()['hits'] == imagenes + 3
+
+    # Otra ruta sobre el mismo grafo se dibuja, pero reutiliza las posiciones
+    calcular_ruta(cliente, grafo_id, 'C', 'A')
+    assert len(dibujos) == 2
+    assert app.posiciones_grafos.stats()['hits'] > posiciones
+
+    # Una arista nueva es otra versión: se dibuja de nuevo
+    cliente.post('/agregar_arista', json={'grafo_id': grafo_id, 'origen': 'C', 'destino': 'D', 'peso': 1})
+    dibujos.clear()
+    calcular_ruta(cliente, grafo_id, 'A', 'C')
+    assert dibujos == [8]
+
+
+def test_dibujos_en_paralelo_no_se_mezclan():
+    grafos = []
+    for i in range(4):
+        grafo = app.Grafo()
+        for j in range(i + 3):
+            grafo.agregar_arista(f'N{j}', f'N{j + 1}', j + 1)
+        grafos.append(grafo)
+    rutas = [[f'N{j}' for j in range(i + 2)] for i in range(len(grafos))]
+
+    secuencial = [app.dibujar_grafo(grafo, ruta, codificar=app.figura_a_png) for grafo, ruta in zip(grafos, rutas)]
+    with ThreadPoolExecutor(max_workers=len(grafos)) as ejecutor:
+        for _ in range(3):
+            paralelo = list(ejecutor.map(lambda args: app.dibujar_grafo(*args, codificar=app.figura_a_png),
+                                         zip(grafos, rutas)))
+            assert paralelo == secuencial
@@ -0,0 +1,78 @@
+import itertools
+import pickle
+
+import app
+from app import Grafo
+
+
+def importar(cliente, aristas, dirigido=False, nodos=()):
+    respuesta = cliente.post('/importar_grafo', json={'aristas': aristas, 'dirigido': dirigido,
+                                                      'nodos': list(nodos), 'imagen': False})
+    assert respuesta.status_code == 200, respuesta.get_json()
+    return respuesta.get_json()['grafo_id']
+
+
+def test_distancias_desde(cliente):
+    grafo_id = importar(cliente, [['A', 'B', 1], ['B', 'C', 2], ['A', 'C', 5]], dirigido=True, nodos=['D'])
+
+    datos = cliente.post('/distancias_desde', json={'grafo_id': grafo_id, 'origen': 'a'}).get_json()
+    assert datos['distancias'] == {'A': 0, 'B': 1, 'C': 3, 'D': None}
+    assert datos['previos'] == {'A': None, 'B': 'A', 'C': 'B'}
+
+    # En el grafo dirigido C no llega a nadie
+    datos = cliente.post('/distancias_desde', json={'grafo_id': grafo_id, 'origen': 'C'}).get_json()
+    assert datos['distancias'] == {'A': None, 'B': None, 'C': 0, 'D': None}
+
+    respuesta = cliente.post('/distancias_desde', json={'grafo_id': grafo_id, 'origen': 'Z'})
+    assert respuesta.status_code == 404
+    assert cliente.post('/distancias_desde', json={'grafo_id': grafo_id}).status_code == 400
+
+
+def matriz(cliente, grafo_id):
+    respuesta = cliente.get('/matriz_distancias', query_string={'grafo_id': grafo_id})
+    return respuesta.status_code, respuesta.get_json()
+
+
+def test_matriz_distancias_con_dijkstra(cliente):
+    grafo_id = importar(cliente, [['A', 'B', 1], ['B', 'C', 2], ['A', 'C', 5]], dirigido=True, nodos=['D'])
+    estado, datos = matriz(cliente, grafo_id)
+    assert estado == 200
+    assert datos['metodo'] == 'dijkstra'
+    assert datos['nodos'] == ['A', 'B', 'C', 'D']
+    assert datos['distancias'] == [[0, 1, 3, None],
+                                   [None, 0, 2, None],
+                                   [None, None, 0, None],
+                                   [None, None, None, 0]]
+
+
+def test_matriz_distancias_con_floyd_warshall_coincide_con_las_filas(cliente):
+    nodos = 'ABCDE'
+    aristas = [[u, v, 1 + (ord(u) * 7 + ord(v)) % 5] for u, v in itertools.combinations(nodos, 2)]
+    grafo_id = importar(cliente, aristas)
+    estado, datos = matriz(cliente, grafo_id)
+    assert estado == 200 and datos['metodo'] == 'floyd_warshall'
+    for i, origen in enumerate(datos['nodos']):
+        fila = cliente.post('/distancias_desde', json={'grafo_id': grafo_id, 'origen': origen}).get_json()
+        assert datos['distancias'][i] == [fila['distancias'][nodo] for nodo in datos['nodos']]
+
+
+def test_matriz_distancias_rechaza_grafos_grandes(cliente, monkeypatch):
+    monkeypatch.setattr(app, 'MAX_NODOS_MATRIZ', 3)
+    grafo_id = importar(cliente, [['A', 'B', 1], ['C', 'D', 1]])
+    estado, datos = matriz(cliente, grafo_id)
+    assert estado == 400
+    assert '3 nodos' in datos['error']
+
+
+def test_los_arboles_guardados_por_grafo_estan_acotados(monkeypatch):
+    monkeypatch.setattr(app, 'ARBOLES_POR_GRAFO', 2)
+    grafo = Grafo()
+    grafo.agregar_aristas([(f'N{i}', f'N{i + 1}', 1) for i in range(10)])
+    for i in range(10):
+        assert grafo.arbol_caminos(f'N{i}')[0]['N10'] == 10 - i
+    assert len(grafo._arboles) == 2
+
+    # Las cachés no viajan con el grafo serializado
+    copia = pickle.loads(pickle.dumps(grafo))
+    assert len(copia._arboles) == 0
+    assert copia.arbol_caminos('N0')[0]['N10'] == 10
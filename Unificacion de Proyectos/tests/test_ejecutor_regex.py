@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+from ejecutor_regex import EjecutorRegex, TiempoAgotado
+
+
+@pytest.fixture
+def ejecutor():
+    ejecutor = EjecutorRegex(procesos=1, tiempo_limite=5.0)
+    # Arranca el proceso para que su creación no cuente dentro de los límites
+    assert ejecutor.buscar('ab', 'a') == (['a'], [(0, 1)])
+    yield ejecutor
+    ejecutor.cerrar()
+
+
+def _pausado(pausa):
+    yield 1
+    time.sleep(pausa)
+    yield 2
+
+
+def test_el_tiempo_del_consumidor_no_cuenta(ejecutor):
+    # El consumidor tarda 0,45 s y luego espera 0,15 s al proceso: solo esto cuenta
+    elementos = []
+    for elemento in ejecutor.iterar(_pausado, 0.6, tiempo_limite=0.5):
+        elementos.append(elemento)
+        time.sleep(0.45)
+    assert elementos == [1, 2]
+
+
+def test_la_espera_por_el_proceso_si_cuenta(ejecutor):
+    with pytest.raises(TiempoAgotado):
+        list(ejecutor.iterar(_pausado, 2, tiempo_limite=0.3))
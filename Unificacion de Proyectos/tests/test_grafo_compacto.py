@@ -0,0 +1,111 @@
+import heapq
+import math
+import random
+
+import pytest
+
+from grafo_compacto import INFINITO, GrafoCompacto, heuristica_alt, heuristica_euclidiana
+
+
+def grafo_aleatorio(rng, dirigido, coordenadas=None):
+    """Adyacencia {origen: [(destino, peso)]} con aristas repetidas y nodos aislados"""
+    n = rng.randint(1, 25)
+    nombres = [f'n{i}' for i in range(n)]
+    adyacencia = {}
+    for _ in range(rng.randint(0, 3 * n)):
+        u, v = rng.choice(nombres), rng.choice(nombres)
+        peso = rng.choice([0, 1, 2.5, rng.randint(1, 20)])
+        if coordenadas is not None:
+            # La distancia en línea recta tiene que ser una cota inferior del peso
+            peso += math.dist(coordenadas[u], coordenadas[v])
+        adyacencia.setdefault(u, []).append((v, peso))
+        if not dirigido:
+            adyacencia.setdefault(v, []).append((u, peso))
+    return adyacencia, nombres
+
+
+def dijkstra_simple(adyacencia, origen):
+    distancias = {origen: 0}
+    cola = [(0, origen)]
+    while cola:
+        d, u = heapq.heappop(cola)
+        if d > distancias[u]:
+            continue
+        for v, peso in adyacencia.get(u, ()):
+            if d + peso < distancias.get(v, INFINITO):
+                distancias[v] = d + peso
+                heapq.heappush(cola, (d + peso, v))
+    return distancias
+
+
+def largo_de_ruta(adyacencia, ruta):
+    return sum(min(peso for destino, peso in adyacencia[u] if destino == v) for u, v in zip(ruta, ruta[1:]))
+
+
+def casos(cantidad, semilla, coordenadas=False):
+    rng = random.Random(semilla)
+    for i in range(cantidad):
+        dirigido = i % 2 == 0
+        posiciones = {f'n{j}': (rng.uniform(0, 10), rng.uniform(0, 10)) for j in range(25)} if coordenadas else None
+        adyacencia, nombres = grafo_aleatorio(rng, dirigido, posiciones)
+        yield GrafoCompacto.desde_adyacencia(adyacencia, nombres, dirigido), adyacencia, posiciones
+
+
+@pytest.mark.parametrize('semilla', range(3))
+def test_dijkstra_y_floyd_warshall_coinciden_con_dijkstra_simple(semilla):
+    for compacto, adyacencia, _ in casos(40, semilla):
+        matriz = compacto.floyd_warshall()
+        for origen, nombre in enumerate(compacto.nombres):
+            esperadas = dijkstra_simple(adyacencia, nombre)
+            distancias, previos = compacto.dijkstra(origen)
+            for v, destino in enumerate(compacto.nombres):
+                esperada = esperadas.get(destino, INFINITO)
+                assert distancias[v] == pytest.approx(esperada)
+                assert matriz[origen][v] == pytest.approx(esperada)
+                if esperada == INFINITO:
+                    assert previos[v] == -1
+
+
+def test_busquedas_entre_dos_nodos():
+    for compacto, adyacencia, _ in casos(60, 7):
+        hitos = compacto.calcular_hitos(4)
+        for origen, nombre in enumerate(compacto.nombres):
+            esperadas = dijkstra_simple(adyacencia, nombre)
+            for destino, nombre_destino in enumerate(compacto.nombres):
+                esperada = esperadas.get(nombre_destino, INFINITO)
+                for distancia, ruta, _ in (compacto.dijkstra_bidireccional(origen, destino),
+                                           compacto.a_estrella(origen, destino, heuristica_alt(hitos, destino))):
+                    assert distancia == pytest.approx(esperada)
+                    if esperada == INFINITO:
+                        assert ruta == []
+                    else:
+                        assert ruta[0] == origen and ruta[-1] == destino
+                        nombres = [compacto.nombres[i] for i in ruta]
+                        assert largo_de_ruta(adyacencia, nombres) == pytest.approx(esperada)
+
+
+def test_a_estrella_con_coordenadas():
+    for compacto, adyacencia, posiciones in casos(40, 11, coordenadas=True):
+        coordenadas = [posiciones[nombre] for nombre in compacto.nombres]
+        for origen, nombre in enumerate(compacto.nombres):
+            esperadas = dijkstra_simple(adyacencia, nombre)
+            for destino, nombre_destino in enumerate(compacto.nombres):
+                distancia, _, _ = compacto.a_estrella(origen, destino, heuristica_euclidiana(coordenadas, destino))
+                assert distancia == pytest.approx(esperadas.get(nombre_destino, INFINITO))
+
+
+def test_aristas_e_invertido():
+    for compacto, adyacencia, _ in casos(40, 5):
+        entradas = sorted((u, v, p) for u, vecinos in adyacencia.items() for v, p in vecinos)
+        aristas = compacto.aristas()
+        if compacto.dirigido:
+            assert sorted(aristas) == entradas
+            invertido = compacto.invertido()
+            al_reves = sorted((compacto.nombres[v], compacto.nombres[u], p)
+                              for u in range(len(compacto)) for v, p in invertido.vecinos(u))
+            assert al_reves == entradas
+        else:
+            # Cada arista no dirigida aparece una vez en lugar de sus dos entradas
+            pares = sorted(tuple(sorted((u, v))) for u, v, _ in aristas)
+            assert len(aristas) <= len(entradas)
+            assert set(pares) == {tuple(sorted((u, v))) for u, v, _ in entradas}
@@ -0,0 +1,73 @@
+import io
+import json
+
+import pytest
+
+
+def exportar(cliente, grafo_id, formato='json'):
+    respuesta = cliente.get(f'/descargar_grafo/{formato}', query_string={'grafo_id': grafo_id})
+    assert respuesta.status_code == 200
+    return respuesta.get_data(as_text=True)
+
+
+def normalizado(texto):
+    contenido = json.loads(texto)
+    return {
+        'dirigido': contenido['dirigido'],
+        'nodos': sorted(contenido['nodos']),
+        'coordenadas': contenido.get('coordenadas'),
+        'aristas': sorted(map(tuple, contenido['aristas']))
+    }
+
+
+@pytest.fixture
+def grafo_original(cliente):
+    """Grafo dirigido con un nodo aislado y coordenadas en todos sus nodos"""
+    aristas = [['A', 'B', 2], ['B', 'C', 1.5], ['C', 'A', 3]]
+    grafo_id = cliente.post('/importar_grafo', json={'aristas': aristas, 'dirigido': True,
+                                                     'nodos': ['D'], 'imagen': False}).get_json()['grafo_id']
+    respuesta = cliente.post('/coordenadas', json={'grafo_id': grafo_id, 'coordenadas': {
+        'A': [0, 0], 'B': [1, 0], 'C': [1, 1], 'D': [5, 5]}})
+    assert respuesta.status_code == 200, respuesta.get_json()
+    return grafo_id
+
+
+def test_ida_y_vuelta_por_archivo(cliente, grafo_original):
+    original = exportar(cliente, grafo_original)
+    # La página envía siempre su selector de tipo; el campo dirigido del archivo tiene prioridad
+    importacion = cliente.post('/importar_grafo', content_type='multipart/form-data', data={
+        'archivo': (io.BytesIO(original.encode()), 'grafo.json'), 'dirigido': 'false', 'imagen': 'false'})
+    assert importacion.status_code == 200, importacion.get_json()
+
+    copia = exportar(cliente, importacion.get_json()['grafo_id'])
+    assert normalizado(copia) == normalizado(original)
+    assert normalizado(copia)['dirigido'] is True
+    assert normalizado(copia)['nodos'] == ['A', 'B', 'C', 'D']
+
+
+def test_ida_y_vuelta_por_cuerpo_json(cliente, grafo_original):
+    original = exportar(cliente, grafo_original)
+    importacion = cliente.post('/importar_grafo', json=json.loads(original))
+    assert importacion.status_code == 200, importacion.get_json()
+    assert normalizado(exportar(cliente, importacion.get_json()['grafo_id'])) == normalizado(original)
+
+
+def test_ida_y_vuelta_en_csv_conserva_las_aristas(cliente, grafo_original):
+    csv = exportar(cliente, grafo_original, 'csv')
+    importacion = cliente.post('/importar_grafo', data=csv, content_type='text/csv',
+                               query_string={'dirigido': 'true'})
+    assert importacion.status_code == 200, importacion.get_json()
+    assert exportar(cliente, importacion.get_json()['grafo_id'], 'csv') == csv
+
+
+@pytest.mark.parametrize('contenido, error', [
+    ({'aristas': [['A', 'B', 1]], 'coordenadas': {'Z': [0, 0]}}, 'inexistentes'),
+    ({'aristas': [['A', 'B', 1]], 'coordenadas': {'A': [0]}}, 'Coordenadas inválidas'),
+    ({'aristas': [['A', 'B', 1]], 'coordenadas': {'A': ['x', 0]}}, 'Coordenadas inválidas'),
+    ({'aristas': [['A', 'B', 1]], 'nodos': 'A'}, 'lista'),
+    ({'aristas': [], 'nodos': []}, 'No se encontraron aristas'),
+])
+def test_contenido_invalido(cliente, contenido, error):
+    respuesta = cliente.post('/importar_grafo', json=contenido)
+    assert respuesta.status_code == 400
+    assert error in respuesta.get_json()['error']
@@ -0,0 +1,85 @@
+import itertools
+import random
+
+import minimizacion
+from tree import ExpressionTree, variable_columns
+
+
+def cubos(num_vars):
+    """Todos los cubos (valor, mascara) de num_vars variables"""
+    for mascara in range(1 << num_vars):
+        for valor in range(1 << num_vars):
+            if not valor & mascara:
+                yield valor, mascara
+
+
+def filas_del_cubo(num_vars, cubo):
+    return minimizacion.bits_cubo(cubo, variable_columns(num_vars), (1 << (1 << num_vars)) - 1)
+
+
+def primos_por_fuerza_bruta(num_vars, conjunto):
+    implicantes = [c for c in cubos(num_vars) if not filas_del_cubo(num_vars, c) & ~conjunto]
+    filas = {c: filas_del_cubo(num_vars, c) for c in implicantes}
+    # Un implicante es primo si ningún otro implicante lo contiene estrictamente
+    return {c for c in implicantes
+            if not any(filas[c] != filas[d] and filas[c] & ~filas[d] == 0 for d in implicantes)}
+
+
+def union(num_vars, cubos_elegidos):
+    resultado = 0
+    for cubo in cubos_elegidos:
+        resultado |= filas_del_cubo(num_vars, cubo)
+    return resultado
+
+
+def funciones_aleatorias(cantidad, max_vars, semilla=0):
+    rng = random.Random(semilla)
+    for _ in range(cantidad):
+        num_vars = rng.randint(1, max_vars)
+        yield num_vars, rng.getrandbits(1 << num_vars)
+
+
+def test_implicantes_primos_coinciden_con_la_fuerza_bruta():
+    for num_vars, conjunto in funciones_aleatorias(200, 4):
+        assert set(minimizacion.implicantes_primos(num_vars, conjunto)) == \
+            primos_por_fuerza_bruta(num_vars, conjunto), (num_vars, bin(conjunto))
+
+
+def test_cobertura_minima_cubre_la_funcion_con_el_minimo_de_terminos():
+    for num_vars, conjunto in funciones_aleatorias(200, 3, semilla=1):
+        primos = minimizacion.implicantes_primos(num_vars, conjunto)
+        esenciales, cobertura = minimizacion.cobertura_minima(num_vars, conjunto, primos)
+        assert union(num_vars, cobertura) == conjunto
+        assert set(esenciales) <= set(cobertura) <= set(primos)
+
+        minimo = next(tamano for tamano in range(len(primos) + 1)
+                      for combo in itertools.combinations(primos, tamano)
+                      if union(num_vars, combo) == conjunto)
+        assert len(cobertura) == minimo, (num_vars, bin(conjunto))
+
+
+def test_minimizar_heuristico_cubre_la_funcion_con_primos():
+    for num_vars, conjunto in funciones_aleatorias(200, 6, semilla=2):
+        expandidos, cobertura = minimizacion.minimizar_heuristico(num_vars, conjunto)
+        primos = set(minimizacion.implicantes_primos(num_vars, conjunto))
+        assert set(expandidos) <= primos
+        assert set(cobertura) <= set(expandidos)
+        assert union(num_vars, cobertura) == conjunto, (num_vars, bin(conjunto))
+
+
+def test_las_formas_sop_y_pos_son_equivalentes_a_la_expresion(expresiones):
+    for texto, arbol in expresiones(150, semilla=4):
+        variables, columna = arbol.to_compact().evaluate_columns()
+        num_vars = len(variables)
+        total = (1 << (1 << num_vars)) - 1
+        for conjunto, formatear in ((columna, minimizacion.formatear_suma),
+                                    (~columna & total, minimizacion.formatear_producto)):
+            primos = minimizacion.implicantes_primos(num_vars, conjunto)
+            _, cobertura = minimizacion.cobertura_minima(num_vars, conjunto, primos)
+            minimizada = ExpressionTree(formatear(variables, cobertura), multichar_variables=True)
+            minimizada.build_tree()
+            # La forma minimizada puede perder variables; se evalúa fila por fila sobre todas
+            for fila, valores in enumerate(itertools.product([False, True], repeat=num_vars)):
+                asignacion = dict(zip(variables, valores))
+                esperado = bool(columna >> fila & 1)
+                assert minimizada.evaluate({v: asignacion[v] for v in minimizada.variables}) == esperado, texto
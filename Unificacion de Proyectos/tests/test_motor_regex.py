@@ -0,0 +1,36 @@
+import re
+
+import pytest
+
+import motor_regex
+from motor_regex import PatronNoSoportado
+
+
+def test_finditer_coincide_con_re(patrones):
+    comparados = 0
+    for patron, textos in patrones(1500):
+        try:
+            referencia = re.compile(patron, re.MULTILINE)
+        except re.error:
+            continue
+        try:
+            programa = motor_regex.compilar(patron)
+        except PatronNoSoportado:
+            continue
+        for texto in textos:
+            assert list(programa.finditer(texto)) == [m.span() for m in referencia.finditer(texto)], \
+                (patron, texto)
+        comparados += 1
+    # La mayoría de los patrones generados entra en el subconjunto del motor
+    assert comparados > 500
+
+
+def test_sin_retroceso_catastrofico():
+    # Con re este patrón tarda un tiempo exponencial en el largo del texto
+    assert list(motor_regex.compilar('(a+)+$').finditer('a' * 5000 + 'b')) == []
+
+
+@pytest.mark.parametrize('patron', [r'(a)\1', '(?=a)', '(?<=a)b'])
+def test_sintaxis_fuera_del_subconjunto(patron):
+    with pytest.raises(PatronNoSoportado):
+        motor_regex.compilar(patron)
@@ -0,0 +1,79 @@
+import pytest
+
+import app
+from ejecutor_regex import EjecutorRegex
+
+TEXTO = 'Ana tiene 3 perros\nel gato 0101\nTel 555-1234-5678\nsin nada\n42'
+
+
+def procesar_lote(cliente, **datos):
+    respuesta = cliente.post('/procesar_lote', json={'texto': TEXTO, **datos})
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype == 'application/json'
+    return respuesta.get_json()
+
+
+def test_sin_reglas_aplica_todas_las_predefinidas(cliente):
+    datos = procesar_lote(cliente)
+    assert datos['valid'] is True
+    assert [r['regla'] for r in datos['resultados']] == list(app.RegexRules.rules)
+    por_regla = {r['regla']: r for r in datos['resultados']}
+    assert por_regla['telefono_con_guiones']['coincidencias'] == ['555-1234-5678']
+    assert por_regla['numero_entero']['coincidencias'] == ['42']
+    assert por_regla['alternativa']['spans'] == [[12, 17], [22, 26]]
+
+
+def test_un_resultado_por_patron_en_el_orden_pedido(cliente):
+    reglas = [r'\d+', 'digito', r'\d+', 'gato|perro', '^']
+    datos = procesar_lote(cliente, reglas=reglas)
+    resultados = datos['resultados']
+    assert [r['regla'] for r in resultados] == reglas
+    assert [r['patron'] for r in resultados] == [r'\d+', '[0-9]', r'\d+', 'gato|perro', '^']
+    # Un patrón repetido da el mismo resultado; uno de ancho cero marca cada línea
+    assert resultados[0] == resultados[2]
+    assert resultados[0]['coincidencias'] == ['3', '0101', '555', '1234', '5678', '42']
+    assert resultados[4]['total_coincidencias'] == 5
+    for resultado in resultados:
+        assert resultado['total_coincidencias'] == len(resultado['coincidencias']) == len(resultado['spans'])
+        assert [TEXTO[i:f] for i, f in resultado['spans']] == resultado['coincidencias']
+
+
+def test_formato_html(cliente):
+    resultados = procesar_lote(cliente, reglas=['gato'], formato='html')['resultados']
+    assert 'spans' not in resultados[0]
+    assert '<mark>gato</mark>' in resultados[0]['texto_resaltado']
+
+
+@pytest.mark.parametrize('datos, error', [
+    ({'reglas': ['digito', '(sin cerrar']}, 'Error en la expresión regular (sin cerrar'),
+    ({'reglas': 'digito'}, 'Las reglas deben ser una lista'),
+    ({'reglas': ['digito', 3]}, 'Las reglas deben ser una lista'),
+    ({'formato': 'xml'}, 'Formato no válido'),
+    ({'motor': 'otro'}, 'Motor no válido'),
+    ({'reglas': [r'(a)\1'], 'motor': 'lineal'}, 'El motor lineal no admite'),
+    ({'texto': 'pocas\nlineas'}, 'al menos 5 líneas'),
+])
+def test_peticiones_invalidas_no_buscan(cliente, monkeypatch, datos, error):
+    monkeypatch.setattr(app.ejecutor_regex, 'buscar_lote', pytest.fail)
+    respuesta = procesar_lote(cliente, **datos)
+    assert respuesta['valid'] is False
+    assert error in respuesta['error']
+    assert 'resultados' not in respuesta
+
+
+def test_un_patron_lento_agota_el_tiempo_de_todo_el_lote(cliente, monkeypatch):
+    ejecutor = EjecutorRegex(procesos=1, tiempo_limite=0.5)
+    # Arranca el proceso para que su creación no cuente dentro del límite
+    assert ejecutor.buscar('ab', 'a') == (['a'], [(0, 1)])
+    monkeypatch.setattr(app, 'ejecutor_regex', ejecutor)
+    try:
+        texto = 'a' * 40 + 'b\n\n\n\n'
+        respuesta = procesar_lote(cliente, texto=texto, reglas=['digito', '(a+)+$'])
+        assert respuesta == {'valid': False, 'error': 'La búsqueda superó el límite de 0.5 s'}
+
+        # El proceso detenido se reemplaza y el mismo lote termina con el motor lineal
+        respuesta = procesar_lote(cliente, texto=texto, reglas=['digito', '(a+)+$'], motor='lineal')
+        assert respuesta['valid'] is True
+        assert [r['total_coincidencias'] for r in respuesta['resultados']] == [0, 0]
+    finally:
+        ejecutor.cerrar()
@@ -0,0 +1,98 @@
+import itertools
+
+import pytest
+
+import reescritura
+from tree import ExpressionTree
+
+
+def simplificar(texto):
+    arbol = ExpressionTree(texto, multichar_variables=True)
+    arbol.build_tree()
+    return arbol, reescritura.MotorReescritura(arbol.factory).simplificar(arbol.root)
+
+
+def columna(nodo, variables):
+    """Resultados del subárbol en todas las asignaciones de las variables dadas"""
+    evaluador = ExpressionTree('')
+    evaluador.root = nodo
+    variables = sorted(variables)
+    return [evaluador.evaluate(dict(zip(variables, valores)))
+            for valores in itertools.product([False, True], repeat=len(variables))]
+
+
+@pytest.mark.parametrize('texto, esperado, regla', [
+    ('~~A', 'A', 'Doble negación'),
+    ('~1', '0', 'Complemento constante'),
+    ('~(A & B)', '~A | ~B', 'De Morgan'),
+    ('A & 1', 'A', 'Identidad AND'),
+    ('0 | A', 'A', 'Identidad OR'),
+    ('A | 1', '1', 'Anulación OR'),
+    ('0 & A', '0', 'Anulación AND'),
+    ('A & A', 'A', 'Idempotencia AND'),
+    ('A & ~A', '0', 'Complemento AND'),
+    ('~A | A', '1', 'Complemento OR'),
+    ('A | (A & B)', 'A', 'Absorción OR'),
+    ('(A | B) & A', 'A', 'Absorción AND'),
+    ('(A | B) & (A | C)', 'A | B & C', 'Distribución AND'),
+    ('(B & A) | (A & C)', 'A & (B | C)', 'Distribución OR'),
+    ('A → B', '~A | B', 'Definición de implicación'),
+    ('A ↔ B', '(~A | B) & (A | ~B)', 'Definición de equivalencia'),
+])
+def test_cada_regla(texto, esperado, regla):
+    _, (raiz, pasos, _) = simplificar(texto)
+    assert reescritura.formatear(raiz) == esperado
+    assert pasos[0][0] == regla
+
+
+def test_las_reglas_se_encadenan_hasta_el_punto_fijo():
+    _, (raiz, pasos, pasadas) = simplificar('((A ∨ 0) ∧ (B ∨ ¬B)) → A')
+    assert reescritura.formatear(raiz) == '1'
+    assert [regla for regla, _, _ in pasos] == ['Complemento OR', 'Identidad OR', 'Identidad AND',
+                                                'Definición de implicación', 'Complemento OR']
+    assert pasadas == 3
+
+
+def test_cada_paso_conserva_la_tabla_de_verdad(expresiones):
+    for texto, original in expresiones(300, profundidad=5):
+        _, (raiz, pasos, pasadas) = simplificar(texto)
+        variables = original.variables
+        esperada = columna(original.root, variables)
+        assert columna(raiz, variables) == esperada, texto
+        for regla, antes, despues in pasos:
+            assert columna(antes, variables) == columna(despues, variables), (texto, regla)
+        assert pasadas < 1000
+
+        # El texto escrito se vuelve a leer como la misma función
+        releida = ExpressionTree(reescritura.formatear(raiz), multichar_variables=True)
+        releida.build_tree()
+        assert releida.variables <= variables
+        assert columna(releida.root, variables) == esperada, texto
+
+
+def test_el_resultado_es_un_punto_fijo(expresiones):
+    for texto, _ in expresiones(100, profundidad=5, semilla=1):
+        arbol, (raiz, _, _) = simplificar(texto)
+        motor = reescritura.MotorReescritura(arbol.factory)
+        assert motor.simplificar(raiz) == (raiz, [], 1)
+
+
+@pytest.mark.parametrize('texto, esperado, pasos_esperados', [
+    ('¬' * 5000 + 'A', 'A', 2500),
+    ('¬' * 5001 + 'A', '~A', 2500),
+    ('(A ∧ ' * 2000 + 'A' + ')' * 2000, 'A', 2000),
+    ('¬(' * 300 + 'A ∧ B' + ')' * 300, 'A & B', 600),
+])
+def test_termina_con_anidamiento_profundo(texto, esperado, pasos_esperados):
+    _, (raiz, pasos, pasadas) = simplificar(texto)
+    assert reescritura.formatear(raiz) == esperado
+    assert len(pasos) == pasos_esperados
+    assert pasadas <= 3
+
+
+def test_max_pasadas_corta_la_reescritura():
+    arbol = ExpressionTree('¬(¬(¬(A ∧ B)))', multichar_variables=True)
+    arbol.build_tree()
+    raiz, _, pasadas = reescritura.MotorReescritura(arbol.factory, max_pasadas=1).simplificar(arbol.root)
+    assert pasadas == 1
+    assert columna(raiz, 'AB') == columna(arbol.root, 'AB')
@@ -0,0 +1,68 @@
+import html
+import re
+
+import pytest
+
+import app
+
+MARCA = re.compile(r'<mark>(.*?)</mark>', re.DOTALL)
+
+
+def spans_marcados(resaltado):
+    """Reconstruye el texto original y las posiciones de cada <mark> del HTML resaltado"""
+    texto, spans, anterior = '', [], 0
+    for marca in MARCA.finditer(resaltado):
+        texto += html.unescape(resaltado[anterior:marca.start()])
+        contenido = html.unescape(marca.group(1))
+        spans.append((len(texto), len(texto) + len(contenido)))
+        texto += contenido
+        anterior = marca.end()
+    return texto + html.unescape(resaltado[anterior:]), spans
+
+
+def resaltar(patron, texto):
+    return app.resaltar_coincidencias(texto, [m.span() for m in re.finditer(patron, texto, re.MULTILINE)])
+
+
+@pytest.mark.parametrize('patron, texto', [
+    ('', 'abc'),
+    (r'\b', 'hola mundo'),
+    ('a*', 'baaac'),
+    ('^', 'uno\ndos\n'),
+    ('$', 'uno\ndos\n'),
+    (r'\w+', 'café ñandú über'),
+    ('ñ|ü', 'pingüino ñu'),
+    ('.', '日本語 😀 x'),
+    (r'😀+|\s', 'a😀😀 b'),
+    ('<[^>]*>', '<b>&amp;</b> "x" & \'y\''),
+])
+def test_las_marcas_coinciden_con_finditer(patron, texto):
+    resaltado = resaltar(patron, texto)
+    assert spans_marcados(resaltado) == (texto, [m.span() for m in re.finditer(patron, texto, re.MULTILINE)])
+
+
+def test_patrones_aleatorios(patrones):
+    for patron, textos in patrones(300):
+        try:
+            referencia = re.compile(patron, re.MULTILINE)
+        except re.error:
+            continue
+        for texto in textos:
+            esperado = [m.span() for m in referencia.finditer(texto)]
+            assert spans_marcados(resaltar(patron, texto)) == (texto, esperado), (patron, texto)
+
+
+def test_el_texto_se_escapa():
+    assert app.resaltar_coincidencias('<a> & <b>', [(1, 2)]) == '&lt;<mark>a</mark>&gt; &amp; &lt;b&gt;'
+
+
+@pytest.mark.parametrize('patron', [r'\w+', r'\b', 'ñ*', '😀'])
+def test_procesar_devuelve_html_y_spans_consistentes(cliente, patron):
+    texto = 'café\nñandú 😀\n<i>\nüber & más\nfin'
+    html_resaltado = cliente.post('/procesar', json={'regex': patron, 'texto': texto}).get_json()
+    con_spans = cliente.post('/procesar', json={'regex': patron, 'texto': texto, 'formato': 'spans'}).get_json()
+
+    esperado = [m.span() for m in re.finditer(patron, texto, re.MULTILINE)]
+    assert [tuple(span) for span in con_spans['spans']] == esperado
+    assert spans_marcados(html_resaltado['texto_resaltado']) == (texto, esperado)
+    assert html_resaltado['coincidencias'] == con_spans['coincidencias'] == [texto[i:f] for i, f in esperado]
@@ -0,0 +1,71 @@
+import app
+
+
+def crear_grafo(cliente, aristas, dirigido=False):
+    grafo_id = cliente.post('/iniciar_grafo', json={'dirigido': dirigido}).get_json()['grafo_id']
+    for origen, destino, peso in aristas:
+        respuesta = cliente.post('/agregar_arista', json={'grafo_id': grafo_id, 'origen': origen,
+                                                          'destino': destino, 'peso': peso})
+        assert respuesta.status_code == 200
+    return grafo_id
+
+
+def calcular_ruta(cliente, grafo_id, origen, destino):
+    respuesta = cliente.post('/calcular_ruta', json={'grafo_id': grafo_id, 'origen': origen, 'destino': destino})
+    assert respuesta.status_code == 200, respuesta.get_json()
+    return respuesta.get_json()
+
+
+def test_la_descripcion_del_automata_se_construye_una_vez_por_version(cliente):
+    grafo_id = crear_grafo(cliente, [('A', 'B', 1), ('B', 'C', 2)])
+    antes = app.automatas_grafos.stats()['misses']
+
+    primera = calcular_ruta(cliente, grafo_id, 'A', 'C')
+    segunda = calcular_ruta(cliente, grafo_id, 'C', 'A')
+    assert app.automatas_grafos.stats()['misses'] == antes + 1
+    assert primera['descripcion_automata']['sigma'] == ['A→B', 'B→A', 'B→C', 'C→B']
+    assert segunda['descripcion_automata']['q0'] == 'C'
+    assert segunda['validacion_formal'] == {'aceptada': True, 'estado_actual': 'A',
+                                            'paso_fallo': None, 'costo_total': 3}
+
+    # Una arista nueva es otra versión del grafo
+    cliente.post('/agregar_arista', json={'grafo_id': grafo_id, 'origen': 'A', 'destino': 'C', 'peso': 1})
+    tercera = calcular_ruta(cliente, grafo_id, 'A', 'C')
+    assert tercera['ruta'] == ['A', 'C']
+    assert tercera['descripcion_automata']['transiciones'] == 6
+
+
+def test_grafos_grandes_omiten_alfabeto_y_pesos(cliente, monkeypatch):
+    monkeypatch.setattr(app, 'MAX_TRANSICIONES_DESCRIPCION', 3)
+    grafo_id = crear_grafo(cliente, [('A', 'B', 1), ('B', 'C', 2)])
+
+    descripcion = calcular_ruta(cliente, grafo_id, 'A', 'C')['descripcion_automata']
+    assert descripcion['Q'] == ['A', 'B', 'C']
+    assert descripcion['transiciones'] == 4
+    assert descripcion['sigma'] is None and descripcion['pesos'] is None
+
+    # La consulta explícita del autómata sigue siendo completa
+    completa = cliente.get('/info_automata', query_string={'grafo_id': grafo_id}).get_json()['descripcion']
+    assert completa['pesos'] == {'A→B': 1, 'B→A': 1, 'B→C': 2, 'C→B': 2}
+
+
+def test_grafos_importados_grandes_no_se_dibujan(cliente, monkeypatch):
+    # Si se intentara dibujar alguno, la prueba falla en lugar de tardar minutos
+    def no_dibujar(*argumentos, **opciones):
+        raise AssertionError('no debería dibujarse un grafo de este tamaño')
+    monkeypatch.setattr(app, 'dibujar_grafo', no_dibujar)
+
+    aristas = [[f'N{i}', f'N{i + 1}', 1] for i in range(3000)]
+    importacion = cliente.post('/importar_grafo', json={'aristas': aristas}).get_json()
+    assert importacion['exito'] and importacion['imagen'] is None
+    grafo_id = importacion['grafo_id']
+
+    ruta = calcular_ruta(cliente, grafo_id, 'N0', 'N3000')
+    assert ruta['distancia'] == 3000
+    assert len(ruta['ruta']) == 3001
+    assert ruta['imagen'] is None
+
+    respuesta = cliente.post('/agregar_arista', json={'grafo_id': grafo_id, 'origen': 'N0',
+                                                      'destino': 'N3000', 'peso': 1}).get_json()
+    assert respuesta['exito'] and respuesta['imagen'] is None
+    assert calcular_ruta(cliente, grafo_id, 'N0', 'N3000')['ruta'] == ['N0', 'N3000']
@@ -0,0 +1,56 @@
+import pytest
+
+from sat import DPLLSolver, analyze, tseitin
+from tree import ExpressionTree
+
+
+def a_bool(fila):
+    return {var: valor == 'V' for var, valor in fila.items()}
+
+
+def test_analyze_coincide_con_la_tabla_de_verdad(expresiones, fuerza_bruta):
+    for texto, arbol in expresiones(300):
+        _, resultados = fuerza_bruta(arbol)
+        resultado = analyze(arbol.to_compact())
+
+        if not any(resultados):
+            esperada = 'contradiction'
+        elif all(resultados):
+            esperada = 'tautology'
+        else:
+            esperada = 'contingency'
+        assert resultado['classification'] == esperada, texto
+        assert resultado['satisfiable'] == any(resultados), texto
+
+        # El testigo y el contraejemplo tienen que ser filas reales de la tabla
+        if resultado['witness'] is not None:
+            assert arbol.evaluate(a_bool(resultado['witness'])) is True, texto
+        if resultado['counterexample'] is not None:
+            assert arbol.evaluate(a_bool(resultado['counterexample'])) is False, texto
+
+
+def test_tseitin_conserva_los_modelos(expresiones, fuerza_bruta):
+    # Fijando las variables originales, la raíz es verdadera exactamente en las filas verdaderas
+    for texto, arbol in expresiones(60, variables='ABCD', semilla=1):
+        variables, resultados = fuerza_bruta(arbol)
+        num_vars, clausulas, raiz = tseitin(arbol.to_compact())
+        if raiz is None:
+            continue
+        solver = DPLLSolver(num_vars, clausulas)
+        for fila, esperado in enumerate(resultados):
+            supuestos = [(i + 1) if fila >> (len(variables) - 1 - i) & 1 else -(i + 1)
+                         for i in range(len(variables))]
+            assert (solver.solve([*supuestos, raiz]) is not None) == esperado, texto
+
+
+@pytest.mark.parametrize('texto, esperada', [
+    ('A ∨ ¬A', 'tautology'),
+    ('A ∧ ¬A', 'contradiction'),
+    ('A → B', 'contingency'),
+    ('1', 'tautology'),
+    ('0', 'contradiction'),
+])
+def test_casos_conocidos(texto, esperada):
+    arbol = ExpressionTree(texto)
+    arbol.build_tree()
+    assert analyze(arbol.to_compact())['classification'] == esperada
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from tree import ExpressionTree
+
+
+def simplificar(cliente, expresion, metodo='minimizar'):
+    return cliente.post('/simplificar', json={'expresion': expresion, 'forma': 'sop', 'metodo': metodo})
+
+
+@pytest.mark.parametrize('metodo', ['minimizar', 'leyes'])
+def test_la_cache_no_confunde_expresiones_que_solo_difieren_en_espacios(cliente, metodo):
+    # AB es una variable; A B son dos operandos seguidos y debe seguir siendo un error
+    assert simplificar(cliente, 'AB', metodo).status_code == 200
+    respuesta = simplificar(cliente, 'A B', metodo)
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['exito'] is False
+
+    assert simplificar(cliente, 'x1 & y', metodo).status_code == 200
+    assert simplificar(cliente, 'x 1 & y', metodo).status_code == 400
+
+
+def test_los_espacios_de_los_extremos_comparten_la_entrada(cliente):
+    primera = simplificar(cliente, 'A & B').get_json()
+    assert simplificar(cliente, '  A & B  ').get_json() == primera
+
+
+@pytest.mark.parametrize('texto, equivalente', [
+    ('A v B', 'A | B'),
+    ('A V B', 'A | B'),
+    ('(A & B)v C', '(A & B) | C'),
+    ('var1 v v2', 'var1 | v2'),
+])
+def test_v_suelta_es_or_como_en_el_cliente(texto, equivalente):
+    columnas = []
+    for expresion in (texto, equivalente):
+        arbol = ExpressionTree(expresion, multichar_variables=True)
+        arbol.build_tree()
+        columnas.append(arbol.to_compact().evaluate_columns())
+    assert columnas[0] == columnas[1]
+
+
+def test_v_seguida_de_letras_es_una_variable():
+    arbol = ExpressionTree('vx & v_2', multichar_variables=True)
+    arbol.build_tree()
+    assert arbol.variables == {'vx', 'v_2'}
+
+
+def test_demasiadas_variables_se_rechazan_antes_de_evaluar(cliente):
+    expresion = ' | '.join(f'x{i}' for i in range(30))
+    inicio = time.perf_counter()
+    respuesta = simplificar(cliente, expresion)
+    assert respuesta.status_code == 400
+    assert 'Máximo' in respuesta.get_json()['error']
+    # Construir las columnas de 2^30 filas tardaría minutos y varios GB
+    assert time.perf_counter() - inicio < 1
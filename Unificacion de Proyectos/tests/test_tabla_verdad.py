@@ -0,0 +1,50 @@
+import itertools
+
+import pytest
+
+from app import TruthTableGenerator
+from tree import ExpressionTree
+
+
+@pytest.fixture
+def generador():
+    return TruthTableGenerator()
+
+
+@pytest.mark.parametrize('metodo', ['evaluate', 'evaluate_bdd', 'analyze'])
+def test_las_posiciones_de_los_errores_son_las_del_texto_original(generador, metodo):
+    evaluar = getattr(generador, metodo)
+    # La versión sin espacios tiene la misma clave de caché y se evalúa primero
+    assert 'posición 3' in evaluar('p∧∧q')['error']
+    assert 'posición 9' in evaluar('p   ∧   ∧ q')['error']
+    assert 'posición 7' in evaluar('  p ∧ ∧ q')['error']
+
+
+def test_las_escrituras_con_otros_espacios_comparten_la_entrada(generador):
+    primera = generador.evaluate('p ∧ q')
+    assert generador.evaluate('  p∧q ') is primera
+
+
+
+@pytest.mark.parametrize('variables', [1, 3, 13, 14])
+def test_las_paginas_coinciden_con_la_tabla_completa(generador, variables):
+    nombres = list('abcdefghijklmn'[:variables])
+    expresion = ' ∨ '.join(f'({a} ∧ ¬{b})' for a, b in zip(nombres, nombres[1:])) or nombres[0]
+    evaluacion = generador.evaluate(expresion)
+    assert "result_column" in evaluacion
+
+    arbol = ExpressionTree(expresion)
+    arbol.build_tree()
+    completa = []
+    for valores in itertools.product([False, True], repeat=variables):
+        resultado = arbol.evaluate(dict(zip(nombres, valores)))
+        completa.append((tuple('V' if v else 'F' for v in valores), 'V' if resultado else 'F'))
+
+    filas = len(completa)
+    for offset in sorted({0, 1, filas // 3, filas - 5, filas - 1, filas, 4095, 4096, 4097}):
+        if offset < 0:
+            continue
+        for limit in (1, 7, 5000, None):
+            pagina = list(generador.iter_rows(evaluacion, offset, limit, chunk_size=1000))
+            fin = filas if limit is None else offset + limit
+            assert pagina == completa[offset:fin], (offset, limit)
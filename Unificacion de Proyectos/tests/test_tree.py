@@ -0,0 +1,161 @@
+import itertools
+import random
+
+import pytest
+
+from tree import CompactExpressionTree, ExpressionTree, NodeFactory
+
+# Semántica de referencia, independiente de tree.py
+OPERACIONES = {
+    '∧': lambda a, b: a and b,
+    '∨': lambda a, b: a or b,
+    '→': lambda a, b: (not a) or b,
+    '↔': lambda a, b: a == b,
+}
+# Escrituras alternativas de cada símbolo, como las acepta el tokenizador
+ALIAS = {'∧': ['∧', '&', '*', '·'], '∨': ['∨', '|', '+'], '¬': ['¬', '~', '!'], '→': ['→'], '↔': ['↔']}
+
+
+def expresion_con_referencia(rng, variables, profundidad):
+    """(texto totalmente entre paréntesis, función de referencia sobre {variable: bool})"""
+    r = rng.random()
+    if profundidad == 0 or r < 0.2:
+        if rng.random() < 0.1:
+            constante = rng.choice('01')
+            return constante, lambda fila: constante == '1'
+        variable = rng.choice(variables)
+        return variable, lambda fila: fila[variable]
+    if r < 0.35:
+        texto, f = expresion_con_referencia(rng, variables, profundidad - 1)
+        return rng.choice(ALIAS['¬']) + texto, lambda fila: not f(fila)
+    op = rng.choice(list(OPERACIONES))
+    (texto_a, a), (texto_b, b) = (expresion_con_referencia(rng, variables, profundidad - 1) for _ in range(2))
+    operacion = OPERACIONES[op]
+    return f'({texto_a} {rng.choice(ALIAS[op])} {texto_b})', lambda fila: operacion(a(fila), b(fila))
+
+
+def construir(texto, **opciones):
+    arbol = ExpressionTree(texto, **opciones)
+    arbol.build_tree()
+    return arbol
+
+
+def columna(texto):
+    return construir(texto).evaluate_columns()
+
+
+def test_todas_las_evaluaciones_coinciden_con_la_referencia():
+    rng = random.Random(0)
+    for _ in range(300):
+        texto, referencia = expresion_con_referencia(rng, list('pqrs'[:rng.randint(1, 4)]), 5)
+        arbol = construir(texto)
+        variables = sorted(arbol.variables)
+        compilada = arbol.compile()
+        compacto = arbol.to_compact()
+        assert isinstance(compacto, CompactExpressionTree)
+        _, resultados = arbol.evaluate_columns()
+
+        for fila_numero, valores in enumerate(itertools.product([False, True], repeat=len(variables))):
+            fila = dict(zip(variables, valores))
+            esperado = referencia(fila)
+            assert arbol.evaluate(fila) == esperado, texto
+            assert compacto.evaluate(fila) == esperado, texto
+            assert compilada(*valores) == esperado, texto
+            assert bool(resultados >> fila_numero & 1) == esperado, texto
+
+
+@pytest.mark.parametrize('texto, equivalente', [
+    # Prioridad: ¬ > ∧ > ∨ > → > ↔
+    ('¬p ∧ q', '(¬p) ∧ q'),
+    ('p ∨ q ∧ r', 'p ∨ (q ∧ r)'),
+    ('p ∧ q ∨ r', '(p ∧ q) ∨ r'),
+    ('p → q ∨ r', 'p → (q ∨ r)'),
+    ('p ↔ q → r', 'p ↔ (q → r)'),
+    ('¬p ↔ q ∧ r → s', '(¬p) ↔ ((q ∧ r) → s)'),
+    # Los binarios de igual prioridad asocian a la izquierda
+    ('p → q → r', '(p → q) → r'),
+    ('p ↔ q ↔ r', '(p ↔ q) ↔ r'),
+    ('p ∧ q ∧ r', '(p ∧ q) ∧ r'),
+    # Alias ASCII y constantes
+    ('~p & q | r', '¬p ∧ q ∨ r'),
+    ('!p * q + r', '¬p ∧ q ∨ r'),
+    ('p · 1', 'p'),
+    ('p ∨ 0', 'p'),
+    # ¬¬p conserva las dos negaciones
+    ('¬¬p', 'p'),
+    ('¬¬¬p', '¬p'),
+])
+def test_prioridad_asociatividad_y_alias(texto, equivalente):
+    assert columna(texto) == columna(equivalente)
+
+
+def test_la_asociatividad_a_la_izquierda_cambia_el_resultado():
+    # Con p = q = r = F, (p → q) → r es F y p → (q → r) es V
+    assert columna('p → q → r') != columna('p → (q → r)')
+
+
+@pytest.mark.parametrize('texto, mensaje', [
+    ('p ∧', 'falta un operando al final (posición 3)'),
+    ('∧ p', "se esperaba una variable en la posición 1, se encontró '∧'"),
+    ('p q', "se esperaba un operador en la posición 3, se encontró 'q'"),
+    ('p ∧ ¬ ∨ q', "se esperaba una variable en la posición 7, se encontró '∨'"),
+    ('(p ∧ q', "'(' sin cerrar en la posición 1"),
+    ('p ∧ q)', "')' sin abrir en la posición 6"),
+    ('p # q', "Carácter no válido '#' en la posición 3"),
+    ('p ∧ ()', "se esperaba una variable en la posición 6, se encontró ')'"),
+])
+def test_errores_con_posicion(texto, mensaje):
+    with pytest.raises(ValueError, match=mensaje.replace('(', r'\(').replace(')', r'\)')):
+        construir(texto)
+
+
+def test_variables_de_varias_letras():
+    arbol = construir('carro ∧ x1 ∨ ¬carro', multichar_variables=True)
+    assert arbol.variables == {'carro', 'x1'}
+    # Sin la opción cada letra es una variable y dos seguidas son un error
+    with pytest.raises(ValueError, match="se esperaba un operador en la posición 2, se encontró 'b'"):
+        construir('ab ∧ c')
+
+
+def test_negaciones_anidadas_sin_recursion():
+    arbol = construir('¬' * 5000 + 'p')
+    assert arbol.evaluate({'p': True}) is True
+    assert arbol.compile()(False) is False
+    assert arbol.evaluate_columns() == (['p'], 0b10)
+    assert arbol.inorder_expression() == '¬' * 5000 + 'p'
+
+    arbol = construir('(' * 5000 + 'p' + ')' * 5000 + ' ∧ ¬p')
+    assert arbol.evaluate_columns() == (['p'], 0)
+
+
+def test_cadena_de_veinte_mil_operandos():
+    operandos = ['p', 'q'] * 10000
+    arbol = construir(' → '.join(operandos))
+
+    # Referencia: plegado a la izquierda, (((p → q) → p) → q) ...
+    esperada = 0
+    for fila, valores in enumerate(itertools.product([False, True], repeat=2)):
+        fila_valores = dict(zip('pq', valores))
+        valor = fila_valores[operandos[0]]
+        for operando in operandos[1:]:
+            valor = (not valor) or fila_valores[operando]
+        esperada |= valor << fila
+        assert arbol.evaluate(fila_valores) == valor
+        assert arbol.compile()(*valores) == valor
+    assert arbol.evaluate_columns() == (['p', 'q'], esperada)
+
+
+def test_los_subarboles_iguales_se_comparten():
+    factory = NodeFactory()
+    arbol = construir('(p ∧ q) ∨ (p ∧ q)')
+    izquierda, derecha = arbol.root.left, arbol.root.right
+    assert izquierda is derecha
+    # p, q, p ∧ q y la disyunción: cuatro nodos distintos
+    assert len(arbol.to_compact()) == 4
+
+    # Dos árboles con la misma fábrica comparten sus nodos
+    primero = ExpressionTree('p ∧ q', factory=factory)
+    segundo = ExpressionTree('¬(p ∧ q)', factory=factory)
+    primero.build_tree()
+    segundo.build_tree()
+    assert segundo.root.right is primero.root
@@ -1,38 +1,107 @@
+from array import array
+
+# Prioridad de los operadores; un número menor indica menor prioridad
+_OPERATOR_PRIORITY = {
+    '↔': 1,  # Bicondicional (menor prioridad)
+    '→': 2,  # Implicación
+    '∨': 3,  # Disyunción (OR)
+    '∧': 4,  # Conjunción (AND)
+    '¬': 5  # Negación (mayor prioridad)
+}
+
+# Notación ASCII aceptada como alternativa a los símbolos lógicos
+_ALIASES = {'~': '¬', '!': '¬', '&': '∧', '*': '∧', '·': '∧', '|': '∨', '+': '∨'}
+
+# Constantes lógicas: 0 (falso) y 1 (verdadero)
+_CONSTANTS = ('0', '1')
+
+# Códigos de operación de la representación en arreglos
+OP_VAR, OP_NOT, OP_AND, OP_OR, OP_IMPLIES, OP_IFF, OP_CONST = range(7)
+_OPCODES = {'¬': OP_NOT, '∧': OP_AND, '∨': OP_OR, '→': OP_IMPLIES, '↔': OP_IFF}
+_SYMBOLS = {opcode: symbol for symbol, opcode in _OPCODES.items()}
+
+# Plantillas de código para cada operador al compilar el árbol
+_BOOL_OPERATIONS = {
+    '∧': '{0} and {1}',
+    '∨': '{0} or {1}',
+    '→': 'not {0} or {1}',
+    '↔': '{0} == {1}',
+    '¬': 'not {0}',
+    '0': 'False',
+    '1': 'True',
+}
+
+# Plantillas equivalentes sobre columnas de bits (enteros); _m es la máscara de filas
+_BITSET_OPERATIONS = {
+    '∧': '{0} & {1}',
+    '∨': '{0} | {1}',
+    '→': '(~{0} | {1}) & _m',
+    '↔': '~({0} ^ {1}) & _m',
+    '¬': '~{0} & _m',
+    '0': '0',
+    '1': '_m',
+}
+
+
+def variable_columns(num_vars):
+    """Columnas de bits de las variables: el bit i de la columna j es el valor de
+    la variable j en la fila i de itertools.product([False, True], repeat=num_vars).
+    """
+    num_rows = 1 << num_vars
+    columns = []
+    for i in range(num_vars):
+        # La variable i alterna bloques de 2^(n-1-i) filas en F y en V;
+        # el patrón se replica duplicando su ancho hasta cubrir todas las filas
+        half = 1 << (num_vars - 1 - i)
+        column = ((1 << half) - 1) << half
+        width = 2 * half
+        while width < num_rows:
+            column |= column << width
+            width *= 2
+        columns.append(column)
+    return columns
+
+
 class Node:
-    def __init__(self, value):
+    __slots__ = ('value', 'left', 'right')
+
+    def __init__(self, value, left=None, right=None):
         self.value = value
-        self.left: Node | None = None
-        self.right: Node | None = None
+        self.left: Node | None = left
+        self.right: Node | None = right
+
+
+class NodeFactory:
+    """Crea nodos compartiendo los subárboles estructuralmente iguales (hash-consing).
+
+    Los nodos creados por la fábrica forman un DAG y no deben modificarse.
+    """
+
+    def __init__(self):
+        self.__table = {}
+
+    def make(self, value, left=None, right=None):
+        # Los hijos ya están internados, así que su id identifica su estructura
+        key = (value, id(left), id(right))
+        node = self.__table.get(key)
+        if node is None:
+            node = Node(value, left, right)
+            self.__table[key] = node
+        return node
+
+    def __len__(self):
+        return len(self.__table)
 
 
 class ExpressionTree:
-    def __init__(self, expression: str):
+    def __init__(self, expression: str, factory: NodeFactory | None = None, multichar_variables=False):
         self.root = None
         self.expression = expression
+        # Si es True, las variables son identificadores (A, x1, carro); si no, una sola letra
+        self.multichar_variables = multichar_variables
+        self.factory = factory if factory is not None else NodeFactory()
         self.variables = set()
-
-    def __parentesis_balance(self, expression=None):
-        if expression is None:
-            expression = self.expression
-        balance = 0
-        for char in expression:
-            if char == '(':
-                balance += 1
-            elif char == ')':
-                balance -= 1
-                if balance < 0:
-                    return False
-        return balance == 0
-
-    def __operator_priority(self, operator):
-        priority_map = {
-            '↔': 1,  # Bicondicional (menor prioridad)
-            '→': 2,  # Implicación
-            '∨': 3,  # Disyunción (OR)
-            '∧': 4,  # Conjunción (AND)
-            '¬': 5  # Negación (mayor prioridad)
-        }
-        return priority_map.get(operator, 0)
+        self.__compact = None
 
     def evaluate(self, variables):
         if variables is None:
@@ -46,24 +115,45 @@ class ExpressionTree:
         return self.__evaluate_node(self.root, variables)
 
     def __evaluate_node(self, node, variables):
-        if node is None:
-            return False
-
-        # Si es una variable, devolver su valor
-        if node.value in variables:
-            return variables[node.value]
-
+        # Recorrido postorden con pila explícita; cada nodo (incluso si está
+        # compartido) se evalúa una sola vez y su valor queda en values
+        values = {id(None): False}
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if id(current) in values:
+                stack.pop()
+                continue
+
+            if current.value in _CONSTANTS and current.left is None and current.right is None:
+                values[id(current)] = current.value == '1'
+                stack.pop()
+                continue
+
+            # Si es una variable, devolver su valor
+            if current.value in variables:
+                values[id(current)] = variables[current.value]
+                stack.pop()
+                continue
+
+            pending = [child for child in (current.right, current.left) if id(child) not in values]
+            if pending:
+                stack.extend(pending)
+                continue
+
+            stack.pop()
+            values[id(current)] = self.__apply_operator(current, values)
+        return values[id(node)]
+
+    def __apply_operator(self, node, values):
         # Si es un operador, evaluar según el tipo
         if node.value == '¬':
             # Negación: puede ser unaria izquierda o derecha
-            if node.left:
-                return not self.__evaluate_node(node.left, variables)
-            else:
-                return not self.__evaluate_node(node.right, variables)
+            return not values[id(node.left if node.left else node.right)]
 
         # Operadores binarios
-        left_value = self.__evaluate_node(node.left, variables)
-        right_value = self.__evaluate_node(node.right, variables)
+        left_value = values[id(node.left)]
+        right_value = values[id(node.right)]
 
         if node.value == '∧':
             return left_value and right_value
@@ -77,122 +167,307 @@ class ExpressionTree:
         return False
 
     def build_tree(self):
-        if not self.__parentesis_balance():
-            raise ValueError("Expresión con paréntesis no balanceados")
-
         self.variables.clear()  # Limpiar variables previas
-        self.root = self.__build_tree(self.expression.replace(" ", ""))
-
-    def __build_tree(self, expression):
-        # Eliminar paréntesis exteriores redundantes
-        while (len(expression) > 0 and
-               expression[0] == '(' and
-               expression[-1] == ')' and
-               self.__parentesis_balance(expression[1:-1])):
-            expression = expression[1:-1]
+        self.__compact = None
+        self.root = self.__build_tree(self.__tokenize(self.expression))
+
+    def compile(self):
+        """Compila el árbol una sola vez a una función de Python sin recursión.
+
+        La función recibe los valores de las variables como argumentos
+        posicionales, en el orden de sorted(self.variables).
+        """
+        return self.to_compact().compile()
+
+    def evaluate_columns(self):
+        """Evalúa las 2^n asignaciones a la vez usando enteros como columnas de bits.
+
+        El bit i de cada columna corresponde a la fila i en el orden de
+        itertools.product([False, True], repeat=n). Devuelve (variables, columna resultado).
+        """
+        return self.to_compact().evaluate_columns()
+
+    def to_compact(self):
+        """Devuelve la representación en arreglos del árbol (se calcula una sola vez)."""
+        if self.__compact is None:
+            self.__compact = CompactExpressionTree.from_tree(self)
+        return self.__compact
+
+    def __tokenize(self, expression):
+        # Recorre la expresión una sola vez; cada token es (tipo, valor, posición)
+        tokens = []
+        index = 0
+        while index < len(expression):
+            position = index + 1
+            char = _ALIASES.get(expression[index], expression[index])
+            index += 1
+            if char.isspace():
+                continue
+            if char in _OPERATOR_PRIORITY:
+                tokens.append(('op', char, position))
+            elif char in '()':
+                tokens.append((char, char, position))
+            elif char in _CONSTANTS:
+                tokens.append(('const', char, position))
+            elif char in 'vV' and self.multichar_variables and not (
+                    index < len(expression) and (expression[index].isalnum() or expression[index] == '_')):
+                # Con variables de varias letras, una v suelta es el OR, como en la página de simplificación
+                tokens.append(('op', '∨', position))
+            elif char.isalpha():
+                if self.multichar_variables:
+                    while index < len(expression) and (expression[index].isalnum() or expression[index] == '_'):
+                        index += 1
+                tokens.append(('var', expression[position - 1:index], position))
+            else:
+                raise ValueError(f"Carácter no válido '{char}' en la posición {position}")
+        return tokens
 
-        if not expression:
+    def __build_tree(self, tokens):
+        # Algoritmo shunting-yard: construye el árbol en O(n) con dos pilas.
+        # Los binarios de igual prioridad asocian a la izquierda y ¬ es prefijo.
+        if not tokens:
             return None
 
-        # Buscar el operador de menor prioridad fuera de paréntesis
-        min_priority = float('inf')
-        index = -1
-        level = 0
-
-        # Recorrer de derecha a izquierda para operadores de igual prioridad
-        for i in range(len(expression) - 1, -1, -1):
-            char = expression[i]
-
-            if char == ')':
-                level += 1
-            elif char == '(':
-                level -= 1
-            elif level == 0 and char in ['↔', '→', '∨', '∧', '¬']:
-                priority = self.__operator_priority(char)
-                if priority < min_priority:
-                    min_priority = priority
-                    index = i
-
-        # Si no se encontró operador, debe ser una variable
-        if index == -1:
-            if len(expression) == 1 and expression.isalpha():
-                self.variables.add(expression)
-                return Node(expression)
-            else:
-                raise ValueError(f"Expresión no válida: '{expression}'")
-
-        op = expression[index]
-
-        # Manejar operador unario ¬
-        if op == '¬':
-            # Verificar si es un NOT al inicio
-            if index == 0:
-                right = self.__build_tree(expression[index + 1:])
-                node = Node(op)
-                node.right = right
-                return node
+        operands = []
+        operators = []
+        expect_operand = True
+
+        def reduce():
+            op, _ = operators.pop()
+            right = operands.pop()
+            left = operands.pop() if op != '¬' else None
+            operands.append(self.factory.make(op, left, right))
+
+        for kind, value, position in tokens:
+            if expect_operand:
+                if kind == 'var':
+                    self.variables.add(value)
+                    operands.append(self.factory.make(value))
+                    expect_operand = False
+                elif kind == 'const':
+                    operands.append(self.factory.make(value))
+                    expect_operand = False
+                elif kind == '(' or value == '¬':
+                    operators.append((value, position))
+                else:
+                    raise ValueError(f"Expresión no válida: se esperaba una variable en la posición {position}, "
+                                     f"se encontró '{value}'")
+            elif kind == 'op' and value != '¬':
+                priority = _OPERATOR_PRIORITY[value]
+                while (operators and operators[-1][0] != '(' and
+                       _OPERATOR_PRIORITY[operators[-1][0]] >= priority):
+                    reduce()
+                operators.append((value, position))
+                expect_operand = True
+            elif kind == ')':
+                while operators and operators[-1][0] != '(':
+                    reduce()
+                if not operators:
+                    raise ValueError(f"Expresión con paréntesis no balanceados: ')' sin abrir en la posición {position}")
+                operators.pop()
             else:
-                # Si no está al inicio, podría ser parte de una expresión más compleja
-                # Continuar buscando otros operadores
-                for i in range(len(expression) - 1, -1, -1):
-                    if i == index:
-                        continue
-                    char = expression[i]
-                    if char in ['↔', '→', '∨', '∧'] and self.__check_operator_level(expression, i) == 0:
-                        priority = self.__operator_priority(char)
-                        if priority < min_priority:
-                            min_priority = priority
-                            index = i
-                            op = char
-                            break
-
-                if op == '¬':  # Si sigue siendo NOT
-                    right = self.__build_tree(expression[index + 1:])
-                    node = Node(op)
-                    node.right = right
-                    return node
+                raise ValueError(f"Expresión no válida: se esperaba un operador en la posición {position}, "
+                                 f"se encontró '{value}'")
 
-        # Operadores binarios
-        left = self.__build_tree(expression[:index])
-        right = self.__build_tree(expression[index + 1:])
-        node = Node(op)
-        node.left = left
-        node.right = right
-        return node
+        if expect_operand:
+            raise ValueError(f"Expresión no válida: falta un operando al final (posición {tokens[-1][2]})")
+
+        while operators:
+            if operators[-1][0] == '(':
+                raise ValueError(f"Expresión con paréntesis no balanceados: '(' sin cerrar en la posición "
+                                 f"{operators[-1][1]}")
+            reduce()
 
-    def __check_operator_level(self, expression, index):
-        level = 0
-        for i in range(index):
-            if expression[i] == '(':
-                level += 1
-            elif expression[i] == ')':
-                level -= 1
-        return level
+        return operands[0]
 
     def inorder_expression(self, node=None):
         if node is None:
             node = self.root
-        if node is None:
-            return ""
 
-        # Si es una hoja (variable)
-        if node.left is None and node.right is None:
-            return str(node.value)
+        # La pila contiene nodos por expandir o fragmentos de texto ya listos;
+        # el resultado se une una sola vez al final
+        parts = []
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if item is None:
+                continue
+            if isinstance(item, str):
+                parts.append(item)
+            # Si es una hoja (variable)
+            elif item.left is None and item.right is None:
+                parts.append(str(item.value))
+            # Si es negación
+            elif item.value == '¬':
+                stack.append(item.right if item.right else item.left)
+                parts.append('¬')
+            # Operadores binarios
+            else:
+                stack.extend((')', item.right, f" {item.value} ", item.left))
+                parts.append('(')
+        return ''.join(parts)
+
+    def get_variables(self):
+        return self.variables.copy()
 
-        # Si es negación
-        if node.value == '¬':
-            if node.right:
-                return f"¬{self.inorder_expression(node.right)}"
+    def __str__(self):
+        return f"ExpressionTree: {self.inorder_expression()}"
+
+class CompactExpressionTree:
+    """Árbol de expresión almacenado en arreglos paralelos.
+
+    Cada nodo (una sola vez, aunque esté compartido) ocupa una posición en
+    opcodes/left/right/var_ids (para OP_CONST, var_ids guarda 0 o 1), en orden postfijo: los hijos siempre tienen un
+    índice menor que su padre. Un índice -1 indica ausencia de hijo o de raíz.
+    """
+
+    def __init__(self, variables):
+        self.variables = list(variables)
+        self.opcodes = array('b')
+        self.left = array('i')
+        self.right = array('i')
+        self.var_ids = array('i')
+        self.root = -1
+        self.__compiled = None
+        self.__compiled_columns = None
+
+    @classmethod
+    def from_tree(cls, tree):
+        compact = cls(sorted(tree.variables))
+        var_ids = {var: i for i, var in enumerate(compact.variables)}
+        indices = {}
+        stack = [(tree.root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if node is None or id(node) in indices:
+                continue
+            if node.value in _CONSTANTS and node.left is None and node.right is None:
+                indices[id(node)] = compact.__append(OP_CONST, -1, -1, int(node.value))
+            elif node.value in var_ids:
+                indices[id(node)] = compact.__append(OP_VAR, -1, -1, var_ids[node.value])
+            elif not visited:
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+            elif node.value == '¬':
+                # La negación guarda su operando siempre a la derecha
+                operand = node.left if node.left else node.right
+                indices[id(node)] = compact.__append(OP_NOT, -1, indices.get(id(operand), -1), -1)
             else:
-                return f"¬{self.inorder_expression(node.left)}"
+                indices[id(node)] = compact.__append(_OPCODES[node.value], indices.get(id(node.left), -1),
+                                                     indices.get(id(node.right), -1), -1)
+        compact.root = indices.get(id(tree.root), -1)
+        return compact
+
+    def __append(self, opcode, left, right, var_id):
+        self.opcodes.append(opcode)
+        self.left.append(left)
+        self.right.append(right)
+        self.var_ids.append(var_id)
+        return len(self.opcodes) - 1
 
-        # Operadores binarios
-        left_expr = self.inorder_expression(node.left)
-        right_expr = self.inorder_expression(node.right)
-        return f"({left_expr} {node.value} {right_expr})"
+    def evaluate(self, variables):
+        missing_vars = set(self.variables) - set(variables.keys())
+        if missing_vars:
+            raise ValueError(f"Faltan variables: {missing_vars}")
+
+        values = []
+        for opcode, left, right, var_id in zip(self.opcodes, self.left, self.right, self.var_ids):
+            if opcode == OP_VAR:
+                values.append(variables[self.variables[var_id]])
+                continue
+            if opcode == OP_CONST:
+                values.append(bool(var_id))
+                continue
+            right_value = values[right] if right >= 0 else False
+            if opcode == OP_NOT:
+                values.append(not right_value)
+                continue
+            left_value = values[left] if left >= 0 else False
+            if opcode == OP_AND:
+                values.append(left_value and right_value)
+            elif opcode == OP_OR:
+                values.append(left_value or right_value)
+            elif opcode == OP_IMPLIES:
+                values.append(not left_value or right_value)
+            else:
+                values.append(left_value == right_value)
+        return values[self.root] if self.root >= 0 else False
+
+    def compile(self):
+        """Genera (una sola vez) una función con los valores de las variables como argumentos."""
+        if self.__compiled is None:
+            self.__compiled = self.__load_function(self.__generate_source(_BOOL_OPERATIONS, 'False'))
+        return self.__compiled
+
+    def evaluate_columns(self):
+        if self.__compiled_columns is None:
+            self.__compiled_columns = self.__load_function(
+                self.__generate_source(_BITSET_OPERATIONS, '0', ['_m']))
+
+        columns = variable_columns(len(self.variables))
+        mask = (1 << (1 << len(self.variables))) - 1
+        return list(self.variables), self.__compiled_columns(*columns, mask)
+
+    @staticmethod
+    def __load_function(source):
+        namespace = {}
+        exec(source, {}, namespace)
+        return namespace['_evaluate']
+
+    def __generate_source(self, operations, empty, extra_args=()):
+        # Cada nodo se asigna a una variable temporal en orden postfijo, de modo
+        # que la función generada es una secuencia lineal de asignaciones.
+        args = [f"_v{i}" for i in range(len(self.variables))]
+        lines = [f"def _evaluate({', '.join([*args, *extra_args])}):"]
+        names = []
+        for i, (opcode, left, right, var_id) in enumerate(zip(self.opcodes, self.left, self.right, self.var_ids)):
+            if opcode == OP_VAR:
+                names.append(args[var_id])
+                continue
+            if opcode == OP_CONST:
+                names.append(operations[str(var_id)])
+                continue
+            right_name = names[right] if right >= 0 else empty
+            if opcode == OP_NOT:
+                code = operations['¬'].format(right_name)
+            else:
+                code = operations[_SYMBOLS[opcode]].format(names[left] if left >= 0 else empty, right_name)
+            names.append(f"_t{i}")
+            lines.append(f"    _t{i} = {code}")
+        lines.append(f"    return {names[self.root] if self.root >= 0 else empty}")
+        return "\n".join(lines)
+
+    def inorder_expression(self):
+        # Igual que en ExpressionTree: pila explícita de índices (enteros) y
+        # fragmentos de texto, unidos una sola vez al final
+        parts = []
+        stack = [self.root]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+                continue
+            if item < 0:
+                continue
+            opcode = self.opcodes[item]
+            if opcode == OP_VAR:
+                parts.append(self.variables[self.var_ids[item]])
+            elif opcode == OP_CONST:
+                parts.append(str(self.var_ids[item]))
+            elif opcode == OP_NOT:
+                stack.append(self.right[item])
+                parts.append('¬')
+            else:
+                stack.extend((')', self.right[item], f" {_SYMBOLS[opcode]} ", self.left[item]))
+                parts.append('(')
+        return ''.join(parts)
 
     def get_variables(self):
-        return self.variables.copy()
+        return set(self.variables)
+
+    def __len__(self):
+        return len(self.opcodes)
 
     def __str__(self):
-        return f"ExpressionTree: {self.inorder_expression()}"
\ No newline at end of file
+        return f"CompactExpressionTree: {self.inorder_expression()}"